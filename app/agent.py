@@ -2,26 +2,46 @@
 
 import os
 
+import google.auth
 from google.adk.agents import Agent
 from google.adk.apps.app import App
 
-# Configure Google Cloud environment (only if using Vertex AI)
-# If using AI Studio, GOOGLE_GENAI_USE_VERTEXAI should be "False" and GOOGLE_API_KEY set in .env
-use_vertexai = os.environ.get("GOOGLE_GENAI_USE_VERTEXAI", "True").lower() in ("true", "1", "yes")
-
-if use_vertexai:
-    import google.auth
-    _, project_id = google.auth.default()
-    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
-    os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "global")
-
+from app import codespace_tools, git_operations
+from app.analysis import lookup_repo_analysis, save_repo_analysis
+from app.app_utils.cassette import cassette_plugin_from_env
+from app.app_utils.instrumentation import instrument_tool
+from app.app_utils.ledger import ledger_plugin_from_env
+from app.app_utils.profiling import ProfilingPlugin
+from app.app_utils.tool_threads import off_loop
 from app.codespace_tools import (
     create_codespace,
-    run_in_codespace,
     delete_codespace,
-    list_codespaces
+    list_codespaces,
+    run_in_codespace,
+    run_in_codespaces,
 )
 from app.instructions import REPO_REVIVER_CODESPACE_INSTRUCTION
+from app.sharding import run_sharded_tests
+
+
+def configure_google_cloud() -> None:
+    """Defaults the Vertex AI project and location to the ADC project.
+
+    Only applies when using Vertex AI; with AI Studio,
+    GOOGLE_GENAI_USE_VERTEXAI should be "False" and GOOGLE_API_KEY set in .env
+    """
+    use_vertexai = os.environ.get("GOOGLE_GENAI_USE_VERTEXAI", "True").lower() in (
+        "true",
+        "1",
+        "yes",
+    )
+    if use_vertexai:
+        _, project_id = google.auth.default()
+        os.environ.setdefault("GOOGLE_CLOUD_PROJECT", project_id)
+        os.environ.setdefault("GOOGLE_CLOUD_LOCATION", "global")
+
+
+configure_google_cloud()
 
 # Single agent with GitHub Codespaces tools
 # This avoids Gemini's multi-tool limitation by having all tools on one agent
@@ -30,12 +50,34 @@ root_agent = Agent(
     model=os.environ.get("REPO_REVIVER_MODEL", "gemini-2.5-flash"),
     instruction=REPO_REVIVER_CODESPACE_INSTRUCTION,
     description="Analyzes and revives GitHub repositories using cloud-based GitHub Codespaces",
+    # Tools are wrapped for latency/payload metrics; internal calls between
+    # tools (e.g. run_sharded_tests -> run_in_codespaces) are not double counted.
+    # They block on gh, so they run in threads to keep the event loop serving
+    # other sessions.
     tools=[
-        create_codespace,
-        run_in_codespace,
-        delete_codespace,
-        list_codespaces
+        instrument_tool(off_loop(tool))
+        for tool in (
+            lookup_repo_analysis,
+            save_repo_analysis,
+            create_codespace,
+            run_in_codespace,
+            run_in_codespaces,
+            run_sharded_tests,
+            delete_codespace,
+            list_codespaces,
+        )
     ],
 )
 
-app = App(root_agent=root_agent, name="app")
+ledger_plugin = ledger_plugin_from_env()
+
+# Records or replays model and gh/git calls when $REPO_REVIVER_CASSETTE is set
+cassette_plugin = cassette_plugin_from_env(codespace_tools, git_operations)
+
+app = App(
+    root_agent=root_agent,
+    name="app",
+    plugins=[ProfilingPlugin()]
+    + ([ledger_plugin] if ledger_plugin else [])
+    + ([cassette_plugin] if cassette_plugin else []),
+)
@@ -15,19 +15,32 @@
 # mypy: disable-error-code="attr-defined,arg-type"
 import logging
 import os
+from collections.abc import AsyncIterable, Iterable
 from typing import Any
 
 import google.auth
 import vertexai
-from google.adk.artifacts import GcsArtifactService, InMemoryArtifactService
-from google.cloud import logging as google_cloud_logging
-from opentelemetry import trace
+from opentelemetry import metrics, trace
 from opentelemetry.sdk.trace import TracerProvider, export
+from opentelemetry.sdk.trace.export import SpanExporter
 from vertexai.agent_engines.templates.adk import AdkApp
 
 from app.agent import app as adk_app
+from app.agent import ledger_plugin
+from app.app_utils.artifacts import artifact_service_builder_from_env
+from app.app_utils.clients import get_logging_client, get_trace_client
+from app.app_utils.feedback import BufferedFeedbackSink
+from app.app_utils.instrumentation import build_meter_provider
+from app.app_utils.local_telemetry import (
+    TELEMETRY_DIR,
+    LocalJsonlSpanExporter,
+    LocalStructLogger,
+    use_local_telemetry,
+)
+from app.app_utils.profiling import request_profile
+from app.app_utils.sampling import tail_sampling_from_env
+from app.app_utils.sessions import session_service_builder_from_env
 from app.app_utils.tracing import CloudTraceLoggingSpanExporter
-from app.app_utils.typing import Feedback
 
 
 class AgentEngineApp(AdkApp):
@@ -35,21 +48,86 @@ class AgentEngineApp(AdkApp):
         """Set up logging and tracing for the agent engine app."""
         super().set_up()
         logging.basicConfig(level=logging.INFO)
-        logging_client = google_cloud_logging.Client()
-        self.logger = logging_client.logger(__name__)
-        provider = TracerProvider()
-        processor = export.BatchSpanProcessor(
-            CloudTraceLoggingSpanExporter(
-                project_id=os.environ.get("GOOGLE_CLOUD_PROJECT")
+        exporter: SpanExporter
+        if use_local_telemetry():
+            # No Google Cloud clients, so local runs need no credentials
+            self.logger = LocalStructLogger(
+                os.path.join(TELEMETRY_DIR, "feedback.jsonl")
             )
-        )
+            exporter = LocalJsonlSpanExporter()
+        else:
+            self.logger = get_logging_client().logger(__name__)
+            exporter = CloudTraceLoggingSpanExporter(
+                project_id=os.environ.get("GOOGLE_CLOUD_PROJECT"),
+                ledger=ledger_plugin.ledger if ledger_plugin else None,
+                client=get_trace_client(),
+            )
+        provider = TracerProvider()
+        processor = tail_sampling_from_env(export.BatchSpanProcessor(exporter))
         provider.add_span_processor(processor)
         trace.set_tracer_provider(provider)
+        metrics.set_meter_provider(build_meter_provider())
+        self.feedback_sink = BufferedFeedbackSink(self.logger)
+
+    async def async_stream_query(
+        self,
+        *,
+        message: str | dict[str, Any],
+        user_id: str,
+        session_id: str | None = None,
+        run_config: dict[str, Any] | None = None,
+        profile: bool = False,
+        **kwargs: Any,
+    ) -> AsyncIterable[dict[str, Any]]:
+        """Stream responses, optionally profiling the invocation.
+
+        With ``profile=True`` a cProfile profile of the invocation is saved as
+        a session artifact and linked from the invocation span.
+        """
+        if profile:
+            run_config = request_profile(run_config)
+        async for event in super().async_stream_query(
+            message=message,
+            user_id=user_id,
+            session_id=session_id,
+            run_config=run_config,
+            **kwargs,
+        ):
+            yield event
+
+    def stream_query(
+        self,
+        *,
+        message: str | dict[str, Any],
+        user_id: str,
+        session_id: str | None = None,
+        run_config: dict[str, Any] | None = None,
+        profile: bool = False,
+        **kwargs: Any,
+    ) -> Iterable[dict[str, Any]]:
+        """Stream responses synchronously, optionally profiling the invocation."""
+        if profile:
+            run_config = request_profile(run_config)
+        yield from super().stream_query(
+            message=message,
+            user_id=user_id,
+            session_id=session_id,
+            run_config=run_config,
+            **kwargs,
+        )
 
     def register_feedback(self, feedback: dict[str, Any]) -> None:
-        """Collect and log feedback."""
-        feedback_obj = Feedback.model_validate(feedback)
-        self.logger.log_struct(feedback_obj.model_dump(), severity="INFO")
+        """Collect and log feedback.
+
+        Feedback is validated immediately and written in background batches.
+        """
+        self.feedback_sink.submit(feedback)
+
+    def register_feedback_batch(
+        self, feedbacks: list[dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Collect and log several feedback entries in one request."""
+        return self.feedback_sink.submit_batch(feedbacks)
 
     def register_operations(self) -> dict[str, list[str]]:
         """Registers the operations of the Agent.
@@ -57,18 +135,20 @@ class AgentEngineApp(AdkApp):
         Extends the base operations to include feedback registration functionality.
         """
         operations = super().register_operations()
-        operations[""] = operations.get("", []) + ["register_feedback"]
+        operations[""] = [
+            *operations.get("", []),
+            "register_feedback",
+            "register_feedback_batch",
+        ]
         return operations
 
 
-_, project_id = google.auth.default()
+# An explicit project skips the credentials lookup, e.g. for the local mock server
+project_id = os.environ.get("GOOGLE_CLOUD_PROJECT") or google.auth.default()[1]
 vertexai.init(project=project_id, location="europe-west1")
 artifacts_bucket_name = os.environ.get("ARTIFACTS_BUCKET_NAME")
 agent_engine = AgentEngineApp(
     app=adk_app,
-    artifact_service_builder=lambda: GcsArtifactService(
-        bucket_name=artifacts_bucket_name
-    )
-    if artifacts_bucket_name
-    else InMemoryArtifactService(),
+    artifact_service_builder=artifact_service_builder_from_env(artifacts_bucket_name),
+    session_service_builder=session_service_builder_from_env(),
 )
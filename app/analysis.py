@@ -0,0 +1,134 @@
+"""Repository analysis shared across sessions, looked up before any codespace exists."""
+
+import json
+import re
+import subprocess
+from typing import Any
+
+from app import codespace_tools
+from app.app_utils import analysis_cache
+from app.app_utils.analysis_cache import get_analysis_cache
+
+# Sections the agent saves; the structure scan is saved by the bootstrap
+SAVED_SECTIONS = (analysis_cache.MANIFESTS, analysis_cache.OUTDATED_DEPENDENCIES)
+
+# Results are shared with every later session, so they are kept small
+MAX_RESULT_BYTES = 256 * 1024
+
+_SHA_RE = re.compile(r"^[0-9a-f]{40}$")
+
+
+def resolve_head_sha(repo: str) -> str:
+    """Returns the SHA of the default branch's HEAD via the GitHub API."""
+    result = codespace_tools.gh(
+        ["api", f"repos/{repo}/commits/HEAD", "--jq", ".sha"],
+        capture_output=True,
+        text=True,
+        check=True,
+        timeout=60,
+    )
+    return result.stdout.strip()
+
+
+def validate_result(section: str, head_sha: str, result: Any) -> None:
+    """Checks a result has the shape later sessions expect for its section.
+
+    Raises:
+        ValueError: The section, commit or result is invalid
+    """
+    if section not in SAVED_SECTIONS:
+        raise ValueError(
+            f"Unknown section {section!r}, expected one of {SAVED_SECTIONS}"
+        )
+    if not _SHA_RE.match(head_sha):
+        raise ValueError(f"head_sha must be a full commit SHA, got {head_sha!r}")
+    if not isinstance(result, dict):
+        raise ValueError(f"{section} result must be an object")
+    if section == analysis_cache.MANIFESTS:
+        if not all(isinstance(value, dict) for value in result.values()):
+            raise ValueError("manifests must map each manifest path to an object")
+    else:
+        outdated = result.get("outdated")
+        if not isinstance(outdated, list) or not all(
+            isinstance(entry, dict) and isinstance(entry.get("name"), str)
+            for entry in outdated
+        ):
+            raise ValueError(
+                'outdated_dependencies must be {"outdated": [{"name": ...}, ...]}'
+            )
+    size = len(json.dumps(result, default=str).encode())
+    if size > MAX_RESULT_BYTES:
+        raise ValueError(
+            f"{section} result is {size} bytes, at most {MAX_RESULT_BYTES}"
+        )
+
+
+def lookup_repo_analysis(repo_url: str) -> dict:
+    """Looks up the cached analysis of a repository's current commit.
+
+    Call this BEFORE `create_codespace`. Another session may already have
+    analyzed the same commit: `structure` is the bootstrap scan (root entries,
+    manifest files), `manifests` the parsed manifests and
+    `outdated_dependencies` the outdated-dependency check.
+
+    Args:
+        repo_url: GitHub repository URL (e.g., petroslamb/resume-copilot or full URL)
+
+    Returns:
+        dict with head_sha, cached section results and the sections still missing
+    """
+    cache = get_analysis_cache()
+    if cache is None:
+        return {"status": "error", "error": "Analysis cache is disabled"}
+    try:
+        repo = codespace_tools.normalize_repo(repo_url)
+        head_sha = resolve_head_sha(repo)
+        sections = cache.get(repo, head_sha)
+        return {
+            "status": "success",
+            "repo": repo,
+            "head_sha": head_sha,
+            "cached": bool(sections),
+            "analysis": sections,
+            "missing_sections": [
+                s for s in analysis_cache.SECTIONS if s not in sections
+            ],
+        }
+    except subprocess.CalledProcessError as e:
+        return {
+            "status": "error",
+            "error": e.stderr if e.stderr else "Could not resolve HEAD",
+        }
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+def save_repo_analysis(
+    repo_url: str, head_sha: str, section: str, result: dict
+) -> dict:
+    """Saves an analysis result of a commit for later sessions.
+
+    Save `manifests` after parsing the manifest files and
+    `outdated_dependencies` after checking for outdated dependencies, both
+    for the commit that was analyzed (`bootstrap.repository.head_sha`), BEFORE
+    applying any fixes. The structure scan is saved automatically.
+
+    Args:
+        repo_url: GitHub repository URL or owner/repo
+        head_sha: Full SHA of the commit the analysis was made on
+        section: "manifests" or "outdated_dependencies"
+        result: Structured result, e.g. {"package.json": {"dependencies": {...}}}
+            or {"outdated": [{"name": ..., "current": ..., "latest": ...}]}
+
+    Returns:
+        dict with save status
+    """
+    cache = get_analysis_cache()
+    if cache is None:
+        return {"status": "error", "error": "Analysis cache is disabled"}
+    try:
+        validate_result(section, head_sha, result)
+        cache.save(codespace_tools.normalize_repo(repo_url), head_sha, section, result)
+        return {"status": "success", "message": f"Saved {section} for {head_sha[:12]}"}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
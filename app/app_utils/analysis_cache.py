@@ -0,0 +1,158 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from app.app_utils.artifacts import BlobStore, GcsBlobStore, LocalBlobStore
+from app.app_utils.clients import get_storage_client
+
+# Bump when the bootstrap scan or the recorded analysis changes shape, so
+# results of the previous analyzer are no longer served
+ANALYZER_VERSION = "1"
+
+ENABLED = os.environ.get("REPO_REVIVER_ANALYSIS_CACHE", "True").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+ANALYSIS_CACHE_DIR = os.environ.get(
+    "ANALYSIS_CACHE_DIR", ".repo_reviver/analysis_cache"
+)
+
+STRUCTURE = "structure"
+MANIFESTS = "manifests"
+OUTDATED_DEPENDENCIES = "outdated_dependencies"
+SECTIONS = (STRUCTURE, MANIFESTS, OUTDATED_DEPENDENCIES)
+
+# Sections that depend on more than the commit: new releases make a commit's
+# dependencies outdated, so these expire (seconds)
+SECTION_TTL_SECONDS = {
+    OUTDATED_DEPENDENCIES: float(
+        os.environ.get("ANALYSIS_CACHE_OUTDATED_TTL_SECONDS", str(7 * 24 * 3600))
+    ),
+}
+
+# Attempts at an entry update that races with another session
+UPDATE_RETRIES = 5
+
+
+class AnalysisCache:
+    """
+    Repository analysis shared across sessions, keyed by commit.
+
+    Each (repository, HEAD SHA, analyzer version) has one JSON entry holding
+    the structured results of the structure scan, manifest parsing and
+    outdated-dependency checks, so a repository revived again at the same
+    commit starts from a lookup. Entries are updated with optimistic
+    concurrency, since sessions add sections independently.
+    """
+
+    def __init__(
+        self,
+        store: BlobStore,
+        analyzer_version: str = ANALYZER_VERSION,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.store = store
+        self.analyzer_version = analyzer_version
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "saved": 0}
+
+    def _name(self, repo: str, head_sha: str) -> str:
+        return f"analysis/v{self.analyzer_version}/{repo.lower()}/{head_sha}.json"
+
+    def _read(self, name: str) -> tuple[dict[str, Any], int]:
+        stored = self.store.read(name)
+        if stored is None:
+            return {}, 0
+        data, generation = stored
+        return json.loads(data), generation
+
+    def get(self, repo: str, head_sha: str) -> dict[str, Any]:
+        """Returns the unexpired cached sections for the commit, by section name."""
+        entry, _ = self._read(self._name(repo, head_sha))
+        now = self.clock()
+        sections = {
+            section: value["result"]
+            for section, value in (entry.get("sections") or {}).items()
+            if now - value["saved_at"] <= SECTION_TTL_SECONDS.get(section, float("inf"))
+        }
+        with self._lock:
+            self.stats["hits" if sections else "misses"] += 1
+        return sections
+
+    def save(self, repo: str, head_sha: str, section: str, result: Any) -> None:
+        """Stores one section of the commit's analysis, replacing a previous one."""
+        if section not in SECTIONS:
+            raise ValueError(
+                f"Unknown analysis section {section!r}, expected {SECTIONS}"
+            )
+        name = self._name(repo, head_sha)
+        for _ in range(UPDATE_RETRIES):
+            entry, generation = self._read(name)
+            entry.update(
+                repo=repo, head_sha=head_sha, analyzer_version=self.analyzer_version
+            )
+            entry.setdefault("sections", {})[section] = {
+                "saved_at": self.clock(),
+                "result": result,
+            }
+            data = json.dumps(entry, sort_keys=True).encode()
+            if self.store.write(name, data, "application/json", generation):
+                with self._lock:
+                    self.stats["saved"] += 1
+                return
+        raise RuntimeError(f"Concurrent updates kept conflicting on {name}")
+
+
+_cache: AnalysisCache | None = None
+_cache_lock = threading.Lock()
+
+
+def get_analysis_cache() -> AnalysisCache | None:
+    """Returns the process-wide analysis cache, or None when disabled.
+
+    Entries go to the artifacts bucket when $ARTIFACTS_BUCKET_NAME is set, so
+    all instances share them, otherwise to $ANALYSIS_CACHE_DIR.
+    """
+    global _cache
+    if not ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            bucket_name = os.environ.get("ARTIFACTS_BUCKET_NAME")
+            if bucket_name:
+                store: BlobStore = GcsBlobStore(bucket_name, get_storage_client())
+            else:
+                store = LocalBlobStore(ANALYSIS_CACHE_DIR)
+            _cache = AnalysisCache(store)
+        return _cache
+
+
+def save_analysis(repo: str, head_sha: str | None, section: str, result: Any) -> None:
+    """Stores a section if caching is enabled; failures are only logged."""
+    cache = get_analysis_cache()
+    if cache is None or not head_sha:
+        return
+    try:
+        cache.save(repo, head_sha, section, result)
+    except Exception as e:
+        logging.warning(f"Could not cache {section} analysis of {repo}: {e}")
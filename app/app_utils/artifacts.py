@@ -0,0 +1,476 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import contextlib
+import fcntl
+import gzip
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from collections.abc import Callable, Iterator
+from typing import Any, Protocol
+
+import google.cloud.storage as storage
+from google.adk.artifacts import InMemoryArtifactService
+from google.adk.artifacts.base_artifact_service import (
+    ArtifactVersion,
+    BaseArtifactService,
+)
+from google.api_core import exceptions
+from google.genai import types
+
+from app.app_utils.clients import get_storage_client
+
+ARTIFACTS_DIR = os.environ.get("ARTIFACTS_DIR", ".repo_reviver/artifacts")
+
+# Payloads in these formats are already compressed and stored as is
+INCOMPRESSIBLE_MIME_PREFIXES = ("image/", "video/", "audio/")
+INCOMPRESSIBLE_MIME_TYPES = {
+    "application/gzip",
+    "application/zip",
+    "application/x-gzip",
+    "application/zstd",
+}
+
+# Attempts at a manifest update that races with another writer
+MANIFEST_RETRIES = 5
+
+
+class BlobStore(Protocol):
+    """
+    Object storage used by ContentAddressedArtifactService.
+
+    ``generation`` implements optimistic concurrency: ``read`` returns the
+    object's current generation, and a ``write`` conditioned on it (0 meaning
+    "must not exist") returns False when the object changed in between.
+    """
+
+    def read(self, name: str) -> tuple[bytes, int] | None: ...
+
+    def exists(self, name: str) -> bool: ...
+
+    def write(
+        self, name: str, data: bytes, content_type: str, generation: int | None = None
+    ) -> bool: ...
+
+    def uri(self, name: str) -> str: ...
+
+
+class LocalBlobStore:
+    """
+    Blob store in a local directory, for offline use.
+
+    Each object has a write counter under ``.generations/``, which is also
+    the file ``flock``-ed around reads and conditional writes, so processes
+    sharing the directory (e.g. local workers) get the same optimistic
+    concurrency as with Cloud Storage.
+    """
+
+    def __init__(self, root: str = ARTIFACTS_DIR) -> None:
+        self.root = root
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.root, *name.split("/"))
+
+    @contextlib.contextmanager
+    def _locked(self, name: str, operation: int) -> Iterator[int]:
+        """Holds the flock of an object's generation file, yielding its fd."""
+        path = os.path.join(self.root, ".generations", *name.split("/"))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, operation)
+            yield fd
+        finally:
+            # Closing the file releases the lock
+            os.close(fd)
+
+    def _generation(self, fd: int, name: str) -> int:
+        counter = os.pread(fd, 32, 0).strip()
+        if counter:
+            return int(counter)
+        # Objects stored before their writes were counted
+        return 1 if os.path.exists(self._path(name)) else 0
+
+    def exists(self, name: str) -> bool:
+        return os.path.exists(self._path(name))
+
+    def read(self, name: str) -> tuple[bytes, int] | None:
+        path = self._path(name)
+        if not os.path.exists(path):
+            return None
+        with self._locked(name, fcntl.LOCK_SH) as fd:
+            with open(path, "rb") as f:
+                return f.read(), self._generation(fd, name)
+
+    def write(
+        self, name: str, data: bytes, content_type: str, generation: int | None = None
+    ) -> bool:
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._locked(name, fcntl.LOCK_EX) as fd:
+            current = self._generation(fd, name)
+            if generation is not None and current != generation:
+                return False
+            # Counted first: a crash in between causes a spurious conflict
+            # rather than a lost update
+            os.ftruncate(fd, 0)
+            os.pwrite(fd, str(current + 1).encode(), 0)
+            # Written aside and renamed so readers never see partial objects
+            temp_fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+            with os.fdopen(temp_fd, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        return True
+
+    def uri(self, name: str) -> str:
+        return "file://" + os.path.abspath(self._path(name))
+
+
+class GcsBlobStore:
+    """Blob store in a Cloud Storage bucket."""
+
+    def __init__(self, bucket_name: str, client: storage.Client) -> None:
+        self.bucket = client.bucket(bucket_name)
+
+    def read(self, name: str) -> tuple[bytes, int] | None:
+        blob = self.bucket.blob(name)
+        try:
+            data = blob.download_as_bytes()
+        except exceptions.NotFound:
+            return None
+        return data, blob.generation
+
+    def exists(self, name: str) -> bool:
+        # A metadata request; the payload is not downloaded
+        return self.bucket.blob(name).exists()
+
+    def write(
+        self, name: str, data: bytes, content_type: str, generation: int | None = None
+    ) -> bool:
+        try:
+            self.bucket.blob(name).upload_from_string(
+                data, content_type=content_type, if_generation_match=generation
+            )
+        except exceptions.PreconditionFailed:
+            return False
+        return True
+
+    def uri(self, name: str) -> str:
+        return f"gs://{self.bucket.name}/{name}"
+
+
+def _compressible(mime_type: str | None) -> bool:
+    mime_type = mime_type or ""
+    return mime_type not in INCOMPRESSIBLE_MIME_TYPES and not mime_type.startswith(
+        INCOMPRESSIBLE_MIME_PREFIXES
+    )
+
+
+class ContentAddressedArtifactService(BaseArtifactService):
+    """
+    Artifact service storing each distinct payload once, compressed.
+
+    Payloads are stored as ``blobs/<sha256>[.gz]`` and written only if absent,
+    so identical reports, diffs and logs from repeated revivals are uploaded
+    once. Each session (and each user, for ``user:`` artifacts) has a JSON
+    manifest mapping filenames to their versions, blob digests and metadata.
+    Deleting an artifact removes it from the manifest; blobs may be shared
+    and are kept.
+    """
+
+    def __init__(self, store: BlobStore) -> None:
+        self.store = store
+        # Digests known to be stored, to skip redundant writes
+        self._stored: set[str] = set()
+        self._lock = threading.Lock()
+        self.stats = {
+            "saved": 0,
+            "deduplicated": 0,
+            "payload_bytes": 0,
+            "uploaded_bytes": 0,
+        }
+
+    @staticmethod
+    def _manifest_name(
+        app_name: str, user_id: str, filename: str, session_id: str | None
+    ) -> str:
+        if filename.startswith("user:"):
+            return f"manifests/{app_name}/{user_id}/user.json"
+        if session_id is None:
+            raise ValueError(
+                "Session ID must be provided for session-scoped artifacts."
+            )
+        return f"manifests/{app_name}/{user_id}/sessions/{session_id}.json"
+
+    def _read_manifest(self, name: str) -> tuple[dict[str, list[dict]], int]:
+        current = self.store.read(name)
+        if current is None:
+            return {}, 0
+        data, generation = current
+        return json.loads(data), generation
+
+    def _update_manifest(self, name: str, update: Any) -> Any:
+        for _ in range(MANIFEST_RETRIES):
+            manifest, generation = self._read_manifest(name)
+            result = update(manifest)
+            encoded = json.dumps(manifest, sort_keys=True).encode()
+            if self.store.write(name, encoded, "application/json", generation):
+                return result
+        raise RuntimeError(f"Manifest {name} changed concurrently, giving up")
+
+    def _store_blob(self, payload: bytes, mime_type: str | None) -> dict[str, Any]:
+        digest = hashlib.sha256(payload).hexdigest()
+        compressed = _compressible(mime_type)
+        blob_name = f"blobs/{digest}.gz" if compressed else f"blobs/{digest}"
+        with self._lock:
+            known = blob_name in self._stored
+        written = 0
+        # Stored by another worker or instance: skip compressing and uploading
+        if not known and not self.store.exists(blob_name):
+            data = gzip.compress(payload, compresslevel=6) if compressed else payload
+            # Only the first writer of a digest stores it
+            if self.store.write(blob_name, data, "application/octet-stream", 0):
+                written = len(data)
+        if not known:
+            with self._lock:
+                self._stored.add(blob_name)
+        with self._lock:
+            self.stats["saved"] += 1
+            self.stats["payload_bytes"] += len(payload)
+            self.stats["uploaded_bytes"] += written
+            if not written:
+                self.stats["deduplicated"] += 1
+        return {"blob": blob_name, "sha256": digest, "size": len(payload)}
+
+    def _save(
+        self,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        artifact: types.Part,
+        session_id: str | None,
+        custom_metadata: dict[str, Any] | None,
+    ) -> int:
+        manifest_name = self._manifest_name(app_name, user_id, filename, session_id)
+        entry: dict[str, Any] = {
+            "create_time": time.time(),
+            "custom_metadata": custom_metadata or {},
+        }
+        if artifact.inline_data is not None:
+            entry["mime_type"] = artifact.inline_data.mime_type
+            entry.update(
+                self._store_blob(artifact.inline_data.data or b"", entry["mime_type"])
+            )
+        elif artifact.text is not None:
+            entry["mime_type"] = "text/plain"
+            entry["text"] = True
+            entry.update(self._store_blob(artifact.text.encode(), "text/plain"))
+        elif artifact.file_data is not None:
+            # Content lives elsewhere; only the reference is recorded
+            entry["mime_type"] = artifact.file_data.mime_type
+            entry["file_uri"] = artifact.file_data.file_uri
+        else:
+            raise ValueError("Not supported artifact type.")
+
+        def append(manifest: dict[str, list[dict]]) -> int:
+            versions = manifest.setdefault(filename, [])
+            entry["version"] = len(versions)
+            versions.append(entry)
+            return entry["version"]
+
+        return self._update_manifest(manifest_name, append)
+
+    def _versions(
+        self, app_name: str, user_id: str, filename: str, session_id: str | None
+    ) -> list[dict]:
+        manifest_name = self._manifest_name(app_name, user_id, filename, session_id)
+        manifest, _ = self._read_manifest(manifest_name)
+        return manifest.get(filename, [])
+
+    @staticmethod
+    def _select(versions: list[dict], version: int | None) -> dict | None:
+        if not versions:
+            return None
+        if version is None:
+            return versions[-1]
+        return next((entry for entry in versions if entry["version"] == version), None)
+
+    def _load(self, entry: dict) -> types.Part | None:
+        if "file_uri" in entry:
+            return types.Part(
+                file_data=types.FileData(
+                    file_uri=entry["file_uri"], mime_type=entry.get("mime_type")
+                )
+            )
+        stored = self.store.read(entry["blob"])
+        if stored is None:
+            logging.warning(f"Artifact blob {entry['blob']} is missing")
+            return None
+        data = stored[0]
+        if entry["blob"].endswith(".gz"):
+            data = gzip.decompress(data)
+        if entry.get("text"):
+            return types.Part.from_text(text=data.decode())
+        return types.Part.from_bytes(data=data, mime_type=entry["mime_type"])
+
+    def _artifact_version(self, entry: dict) -> ArtifactVersion:
+        uri = entry.get("file_uri") or self.store.uri(entry["blob"])
+        return ArtifactVersion(
+            version=entry["version"],
+            canonical_uri=uri,
+            custom_metadata=entry["custom_metadata"],
+            create_time=entry["create_time"],
+            mime_type=entry.get("mime_type"),
+        )
+
+    async def save_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        artifact: types.Part,
+        session_id: str | None = None,
+        custom_metadata: dict[str, Any] | None = None,
+    ) -> int:
+        return await asyncio.to_thread(
+            self._save,
+            app_name,
+            user_id,
+            filename,
+            artifact,
+            session_id,
+            custom_metadata,
+        )
+
+    async def load_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+        version: int | None = None,
+    ) -> types.Part | None:
+        versions = await asyncio.to_thread(
+            self._versions, app_name, user_id, filename, session_id
+        )
+        entry = self._select(versions, version)
+        if entry is None:
+            return None
+        return await asyncio.to_thread(self._load, entry)
+
+    async def list_artifact_keys(
+        self, *, app_name: str, user_id: str, session_id: str | None = None
+    ) -> list[str]:
+        names = [self._manifest_name(app_name, user_id, "user:", None)]
+        if session_id is not None:
+            names.append(self._manifest_name(app_name, user_id, "", session_id))
+        keys: set[str] = set()
+        for name in names:
+            manifest, _ = await asyncio.to_thread(self._read_manifest, name)
+            keys.update(filename for filename, versions in manifest.items() if versions)
+        return sorted(keys)
+
+    async def delete_artifact(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+    ) -> None:
+        manifest_name = self._manifest_name(app_name, user_id, filename, session_id)
+        await asyncio.to_thread(
+            self._update_manifest,
+            manifest_name,
+            lambda manifest: manifest.pop(filename, None),
+        )
+
+    async def list_versions(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+    ) -> list[int]:
+        versions = await asyncio.to_thread(
+            self._versions, app_name, user_id, filename, session_id
+        )
+        return [entry["version"] for entry in versions]
+
+    async def list_artifact_versions(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+    ) -> list[ArtifactVersion]:
+        versions = await asyncio.to_thread(
+            self._versions, app_name, user_id, filename, session_id
+        )
+        return [self._artifact_version(entry) for entry in versions]
+
+    async def get_artifact_version(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        filename: str,
+        session_id: str | None = None,
+        version: int | None = None,
+    ) -> ArtifactVersion | None:
+        versions = await asyncio.to_thread(
+            self._versions, app_name, user_id, filename, session_id
+        )
+        entry = self._select(versions, version)
+        return self._artifact_version(entry) if entry else None
+
+
+def build_artifact_service(bucket_name: str | None = None) -> BaseArtifactService:
+    """Build the artifact service for the configured storage.
+
+    Args:
+        bucket_name: Artifacts bucket; blobs and manifests go to Cloud Storage
+            when set, otherwise to $ARTIFACTS_DIR on the local filesystem
+
+    Returns:
+        A content-addressed artifact service
+    """
+    if bucket_name:
+        store: BlobStore = GcsBlobStore(bucket_name, get_storage_client())
+    else:
+        store = LocalBlobStore(ARTIFACTS_DIR)
+    return ContentAddressedArtifactService(store)
+
+
+def artifact_service_builder_from_env(
+    bucket_name: str | None,
+) -> Callable[[], BaseArtifactService]:
+    """Return the artifact service builder for the Agent Engine app.
+
+    Content-addressed storage is used with an artifacts bucket or when
+    $ARTIFACTS_DIR is set; otherwise artifacts stay in memory.
+    """
+    if bucket_name or os.environ.get("ARTIFACTS_DIR"):
+        return lambda: build_artifact_service(bucket_name)
+    return InMemoryArtifactService
@@ -0,0 +1,337 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Callable, Coroutine
+from typing import Any
+
+import click
+
+from app.app_utils.codespace_quota import TENANT_QUOTA
+
+DEFAULT_PROMPT = "Analyze and revive {repo_url}"
+RESUME_PROMPT = (
+    "Resume the revival of {repo_url}: call create_codespace to reattach to the "
+    "existing codespace and continue from the next incomplete phase."
+)
+
+# Each running session holds one codespace and all batch sessions belong to
+# one tenant, so more would only queue for the tenant's codespace quota
+DEFAULT_CONCURRENCY = TENANT_QUOTA
+
+ReviveFn = Callable[[dict[str, Any]], Coroutine[Any, Any, dict[str, Any]]]
+
+
+def load_batch_items(input_file: str) -> list[dict[str, Any]]:
+    """Load repositories to revive from a JSONL file.
+
+    Each line must contain a ``repo_url`` (or ``repo``) key. An ``id`` (or
+    ``request_id``) identifies the entry in checkpoints and results and defaults
+    to the repository itself. An optional ``prompt`` overrides the default one.
+
+    Args:
+        input_file: Path to the JSONL file
+
+    Returns:
+        List of normalized batch items
+    """
+    items = []
+    seen_ids = set()
+    with open(input_file) as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            entry = json.loads(line)
+            repo_url = entry.get("repo_url") or entry.get("repo")
+            if not repo_url:
+                logging.warning(f"Skipping line {line_number}: no repo_url")
+                continue
+            item_id = str(entry.get("id") or entry.get("request_id") or repo_url)
+            if item_id in seen_ids:
+                logging.warning(f"Skipping line {line_number}: duplicate id {item_id}")
+                continue
+            seen_ids.add(item_id)
+            items.append(
+                {
+                    "id": item_id,
+                    "repo_url": repo_url,
+                    "prompt": entry.get("prompt")
+                    or DEFAULT_PROMPT.format(repo_url=repo_url),
+                }
+            )
+    return items
+
+
+class BatchCheckpoint:
+    """Append-only record of per-repository batch progress.
+
+    Every state change is appended as one JSON line and fsynced, so a crashed
+    batch loses at most the line being written. On restart the latest record
+    per item wins and finished items are skipped.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.records: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # A torn final line from a crash mid-write
+                        continue
+                    self.records[record["id"]] = record
+
+    def is_finished(self, item_id: str) -> bool:
+        """Whether the item already completed in an earlier run."""
+        record = self.records.get(item_id)
+        return record is not None and record["status"] in ("success", "error")
+
+    def get(self, item_id: str) -> dict[str, Any] | None:
+        """Return the latest record for an item, if any."""
+        return self.records.get(item_id)
+
+    def update(self, item_id: str, status: str, **fields: Any) -> None:
+        """Record a new status for an item."""
+        record = {**self.records.get(item_id, {}), **fields}
+        record.update(
+            id=item_id,
+            status=status,
+            updated_at=datetime.datetime.now().isoformat(),
+        )
+        with self._lock:
+            self.records[item_id] = record
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            with open(self.path, "a") as f:
+                f.write(json.dumps(record) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def _append_line(path: str, line: str) -> None:
+    with open(path, "a") as f:
+        f.write(line + "\n")
+
+
+async def run_batch(
+    items: list[dict[str, Any]],
+    revive: ReviveFn,
+    checkpoint: BatchCheckpoint,
+    results_file: str,
+    concurrency: int = DEFAULT_CONCURRENCY,
+) -> dict[str, Any]:
+    """Revive a list of repositories with bounded concurrency.
+
+    Args:
+        items: Batch items from ``load_batch_items``
+        revive: Coroutine function that revives a single item
+        checkpoint: Checkpoint used to skip finished items and record progress
+        results_file: JSONL file that receives one result line per item
+        concurrency: Maximum number of sessions running at once
+
+    Returns:
+        dict with batch summary and throughput
+    """
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    pending = [item for item in items if not checkpoint.is_finished(item["id"])]
+    skipped = len(items) - len(pending)
+    if skipped:
+        logging.info(f"Resuming batch: skipping {skipped} finished repositories")
+
+    os.makedirs(os.path.dirname(results_file) or ".", exist_ok=True)
+    results_lock = asyncio.Lock()
+    batch_start = time.monotonic()
+
+    async def run_one(item: dict[str, Any]) -> dict[str, Any]:
+        queued_at = time.monotonic()
+        async with semaphore:
+            started_at = time.monotonic()
+            previous = checkpoint.get(item["id"]) or {}
+            # The fsync of each checkpoint line stays off the event loop
+            await asyncio.to_thread(
+                checkpoint.update,
+                item["id"],
+                "running",
+                repo_url=item["repo_url"],
+                attempts=previous.get("attempts", 0) + 1,
+            )
+            try:
+                outcome = await revive(item)
+                status = outcome.pop("status", "success")
+            except Exception as e:
+                logging.exception(f"Revival of {item['repo_url']} failed")
+                outcome = {"error": str(e)}
+                status = "error"
+            finished_at = time.monotonic()
+
+        fields = {
+            "repo_url": item["repo_url"],
+            "queue_seconds": round(started_at - queued_at, 3),
+            "duration_seconds": round(finished_at - started_at, 3),
+            **outcome,
+        }
+        await asyncio.to_thread(checkpoint.update, item["id"], status, **fields)
+        result = {"id": item["id"], "status": status, **fields}
+        async with results_lock:
+            await asyncio.to_thread(_append_line, results_file, json.dumps(result))
+        return result
+
+    results = await asyncio.gather(*(run_one(item) for item in pending))
+
+    elapsed = time.monotonic() - batch_start
+    succeeded = sum(1 for result in results if result["status"] == "success")
+    return {
+        "total": len(items),
+        "skipped": skipped,
+        "processed": len(results),
+        "succeeded": succeeded,
+        "failed": len(results) - succeeded,
+        "elapsed_seconds": round(elapsed, 3),
+        "repos_per_hour": round(len(results) * 3600 / elapsed, 2) if elapsed else 0.0,
+        "concurrency": concurrency,
+    }
+
+
+def batch_session_id(item_id: str) -> str:
+    """Stable session ID for a batch item, so a rerun resumes the same session."""
+    return "batch-" + hashlib.sha256(item_id.encode()).hexdigest()[:24]
+
+
+def build_reviver(
+    user_id: str = "batch", session_db_url: str | None = None
+) -> ReviveFn:
+    """Build a revive function that drives the root agent through an ADK Runner.
+
+    Sessions are kept in the durable session store, so an item that was running
+    when the batch crashed resumes its session (and codespace) on the next run.
+    """
+    from google.adk.runners import Runner
+    from google.genai import types
+
+    from app.agent import app as adk_app
+    from app.app_utils.sessions import build_session_service
+
+    runner = Runner(app=adk_app, session_service=build_session_service(session_db_url))
+
+    async def revive(item: dict[str, Any]) -> dict[str, Any]:
+        session_id = batch_session_id(item["id"])
+        session = await runner.session_service.get_session(
+            app_name=runner.app_name, user_id=user_id, session_id=session_id
+        )
+        resumed = session is not None
+        if session is None:
+            session = await runner.session_service.create_session(
+                app_name=runner.app_name, user_id=user_id, session_id=session_id
+            )
+        prompt = (
+            RESUME_PROMPT.format(repo_url=item["repo_url"])
+            if resumed
+            else item["prompt"]
+        )
+        message = types.Content(role="user", parts=[types.Part.from_text(text=prompt)])
+        tool_calls = 0
+        final_text = ""
+        first_event_seconds = None
+        start = time.monotonic()
+        async for event in runner.run_async(
+            user_id=user_id, session_id=session.id, new_message=message
+        ):
+            if first_event_seconds is None:
+                first_event_seconds = round(time.monotonic() - start, 3)
+            tool_calls += len(event.get_function_calls())
+            if event.is_final_response() and event.content and event.content.parts:
+                final_text = "".join(part.text or "" for part in event.content.parts)
+        return {
+            "status": "success",
+            "session_id": session.id,
+            "resumed": resumed,
+            "tool_calls": tool_calls,
+            "first_event_seconds": first_event_seconds,
+            "final_response": final_text,
+        }
+
+    return revive
+
+
+@click.command()
+@click.option(
+    "--input-file",
+    required=True,
+    help="JSONL file with one repository per line (repo_url, optional id/prompt)",
+)
+@click.option(
+    "--results-file",
+    default=".repo_reviver/batch/results.jsonl",
+    help="JSONL file that receives one result line per repository",
+)
+@click.option(
+    "--checkpoint-file",
+    default=".repo_reviver/batch/checkpoint.jsonl",
+    help="Checkpoint file used to resume an interrupted batch",
+)
+@click.option(
+    "--concurrency",
+    type=int,
+    default=DEFAULT_CONCURRENCY,
+    help="Concurrent sessions; more than the tenant codespace quota only queue "
+    "(default: $CODESPACE_TENANT_QUOTA or 2)",
+)
+@click.option(
+    "--user-id",
+    default="batch",
+    help="User ID for the batch sessions",
+)
+@click.option(
+    "--session-db-url",
+    default=None,
+    help="Durable session store URL (default: $SESSION_DB_URL or a local SQLite file)",
+)
+def run_batch_command(
+    input_file: str,
+    results_file: str,
+    checkpoint_file: str,
+    concurrency: int,
+    user_id: str,
+    session_db_url: str | None,
+) -> None:
+    """Revive every repository listed in a JSONL file."""
+    logging.basicConfig(level=logging.INFO)
+
+    items = load_batch_items(input_file)
+    checkpoint = BatchCheckpoint(checkpoint_file)
+    click.echo(f"📋 {len(items)} repositories, concurrency {concurrency}")
+
+    summary = asyncio.run(
+        run_batch(
+            items,
+            build_reviver(user_id=user_id, session_db_url=session_db_url),
+            checkpoint,
+            results_file,
+            concurrency=concurrency,
+        )
+    )
+    click.echo(f"\n✅ Batch finished: {json.dumps(summary, indent=2)}")
+
+
+if __name__ == "__main__":
+    run_batch_command()
@@ -0,0 +1,310 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from collections import defaultdict, deque
+from types import ModuleType
+from typing import Any
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+
+RECORD = "record"
+REPLAY = "replay"
+
+# Replay latency: "original" waits as long as the recorded call took, "zero"
+# answers immediately so only the orchestration overhead remains
+ORIGINAL_LATENCY = "original"
+ZERO_LATENCY = "zero"
+
+
+class CassetteMissError(Exception):
+    """Raised in replay mode for a call that is not in the cassette."""
+
+
+def _key(payload: Any) -> str:
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()[:16]
+
+
+def model_request_key(agent_name: str, llm_request: LlmRequest) -> str:
+    """
+    Identifies a model call by the conversation that led to it.
+
+    Tool responses are reduced to the tool name: they carry timings that differ
+    between runs, while the calls the model made are replayed verbatim.
+    """
+    turns = []
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            if part.function_call:
+                turns.append(["call", part.function_call.name, part.function_call.args])
+            elif part.function_response:
+                turns.append(["response", part.function_response.name])
+            elif part.text and content.role == "user":
+                turns.append(["user", part.text])
+    return _key([agent_name, turns])
+
+
+def subprocess_key(args: Any, input: str | bytes | None, cwd: str | None) -> str:
+    """Identifies a subprocess call by its command line, stdin and directory."""
+    if isinstance(input, bytes):
+        input = input.decode(errors="replace")
+    return _key([list(args), input, cwd])
+
+
+class Cassette:
+    """
+    Model and subprocess interactions recorded in a JSONL file.
+
+    Each line is one interaction with its ``kind``, ``key``, ``request``,
+    ``response`` and ``duration_seconds``. In replay mode, interactions with the
+    same key are served in recording order, so a command that is run twice
+    gets both of its recorded outputs.
+    """
+
+    def __init__(
+        self, path: str, mode: str = REPLAY, latency: str = ORIGINAL_LATENCY
+    ) -> None:
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"mode must be {RECORD!r} or {REPLAY!r}")
+        if latency not in (ORIGINAL_LATENCY, ZERO_LATENCY):
+            raise ValueError(
+                f"latency must be {ORIGINAL_LATENCY!r} or {ZERO_LATENCY!r}"
+            )
+        self.path = path
+        self.mode = mode
+        self.latency = latency
+        self._lock = threading.Lock()
+        self._interactions: dict[tuple[str, str], deque[dict]] = defaultdict(deque)
+        self.recorded_seconds = 0.0
+        if mode == REPLAY:
+            self._load()
+        else:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            # Each recording starts a new cassette
+            open(path, "w").close()
+
+    def _load(self) -> None:
+        self._interactions.clear()
+        self.recorded_seconds = 0.0
+        with open(self.path) as f:
+            for line in f:
+                if line.strip():
+                    interaction = json.loads(line)
+                    key = (interaction["kind"], interaction["key"])
+                    self._interactions[key].append(interaction)
+                    self.recorded_seconds += interaction["duration_seconds"]
+
+    def rewind(self) -> None:
+        """Serves the recorded interactions from the start again (replay mode)."""
+        self._load()
+
+    def record(
+        self,
+        kind: str,
+        key: str,
+        request: dict[str, Any],
+        response: dict[str, Any],
+        duration_seconds: float,
+    ) -> None:
+        """Appends one interaction to the cassette file."""
+        interaction = {
+            "kind": kind,
+            "key": key,
+            "request": request,
+            "response": response,
+            "duration_seconds": round(duration_seconds, 6),
+        }
+        with self._lock, open(self.path, "a") as f:
+            f.write(json.dumps(interaction, default=str) + "\n")
+
+    def next(self, kind: str, key: str) -> dict[str, Any]:
+        """Returns the next recorded interaction for a call.
+
+        Raises:
+            CassetteMissError: If the cassette has no (more) recordings of it
+        """
+        with self._lock:
+            interactions = self._interactions.get((kind, key))
+            if not interactions:
+                raise CassetteMissError(f"No recorded {kind} call with key {key}")
+            return interactions.popleft()
+
+    def replay_delay(self, interaction: dict[str, Any]) -> float:
+        """Seconds to wait before serving a replayed interaction."""
+        if self.latency == ZERO_LATENCY:
+            return 0.0
+        return interaction["duration_seconds"]
+
+
+class CassetteSubprocess:
+    """
+    Stand-in for the ``subprocess`` module that records or replays ``run``.
+
+    Installed in place of ``subprocess`` in the tool modules, so only their
+    ``gh`` and ``git`` calls go through the cassette.
+    """
+
+    CalledProcessError = subprocess.CalledProcessError
+    CompletedProcess = subprocess.CompletedProcess
+    TimeoutExpired = subprocess.TimeoutExpired
+    PIPE = subprocess.PIPE
+
+    def __init__(self, cassette: Cassette) -> None:
+        self.cassette = cassette
+
+    def run(self, args: Any, **kwargs: Any) -> subprocess.CompletedProcess:
+        key = subprocess_key(args, kwargs.get("input"), kwargs.get("cwd"))
+        if self.cassette.mode == REPLAY:
+            return self._replay(args, key, kwargs)
+        return self._record(args, key, kwargs)
+
+    def _record(
+        self, args: Any, key: str, kwargs: dict[str, Any]
+    ) -> subprocess.CompletedProcess:
+        start = time.monotonic()
+        response: dict[str, Any] = {}
+        try:
+            result = subprocess.run(args, **kwargs)
+            response = {
+                "returncode": result.returncode,
+                "stdout": result.stdout,
+                "stderr": result.stderr,
+            }
+            return result
+        except subprocess.CalledProcessError as e:
+            response = {
+                "returncode": e.returncode,
+                "stdout": e.stdout,
+                "stderr": e.stderr,
+            }
+            raise
+        except subprocess.TimeoutExpired as e:
+            response = {"timeout": e.timeout}
+            raise
+        finally:
+            if response:
+                request = {"args": list(args), "cwd": kwargs.get("cwd")}
+                self.cassette.record(
+                    "subprocess",
+                    key,
+                    request,
+                    _decode(response),
+                    time.monotonic() - start,
+                )
+
+    def _replay(
+        self, args: Any, key: str, kwargs: dict[str, Any]
+    ) -> subprocess.CompletedProcess:
+        interaction = self.cassette.next("subprocess", key)
+        time.sleep(self.cassette.replay_delay(interaction))
+        response = interaction["response"]
+        if "timeout" in response:
+            raise subprocess.TimeoutExpired(args, response["timeout"])
+        stdout, stderr = response["stdout"], response["stderr"]
+        if not (kwargs.get("text") or kwargs.get("encoding")):
+            stdout = stdout.encode() if stdout is not None else None
+            stderr = stderr.encode() if stderr is not None else None
+        if kwargs.get("check") and response["returncode"] != 0:
+            raise subprocess.CalledProcessError(
+                response["returncode"], args, output=stdout, stderr=stderr
+            )
+        return subprocess.CompletedProcess(args, response["returncode"], stdout, stderr)
+
+
+def _decode(response: dict[str, Any]) -> dict[str, Any]:
+    return {
+        name: value.decode(errors="replace") if isinstance(value, bytes) else value
+        for name, value in response.items()
+    }
+
+
+def install_subprocess_cassette(cassette: Cassette, *modules: ModuleType) -> None:
+    """Routes the ``subprocess.run`` calls of ``modules`` through the cassette."""
+    proxy = CassetteSubprocess(cassette)
+    for module in modules:
+        # The proxy stands in for the module's `subprocess` import
+        setattr(module, "subprocess", proxy)  # noqa: B010
+
+
+class CassettePlugin(BasePlugin):
+    """Records model responses to a cassette, or serves them from it."""
+
+    def __init__(self, cassette: Cassette) -> None:
+        super().__init__(name="cassette")
+        self.cassette = cassette
+        # (invocation ID, agent) -> (request key, start time) of the pending call
+        self._pending: dict[tuple[str, str], tuple[str, float]] = {}
+
+    async def before_model_callback(
+        self, *, callback_context: CallbackContext, llm_request: LlmRequest
+    ) -> LlmResponse | None:
+        key = model_request_key(callback_context.agent_name, llm_request)
+        if self.cassette.mode == REPLAY:
+            interaction = self.cassette.next("model", key)
+            await asyncio.sleep(self.cassette.replay_delay(interaction))
+            return LlmResponse.model_validate(interaction["response"])
+        pending_key = (callback_context.invocation_id, callback_context.agent_name)
+        self._pending[pending_key] = (key, time.monotonic())
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> LlmResponse | None:
+        if self.cassette.mode != RECORD or llm_response.partial:
+            return None
+        pending_key = (callback_context.invocation_id, callback_context.agent_name)
+        pending = self._pending.pop(pending_key, None)
+        if pending is None:
+            return None
+        key, start = pending
+        self.cassette.record(
+            "model",
+            key,
+            {"agent": callback_context.agent_name},
+            llm_response.model_dump(mode="json", exclude_none=True),
+            time.monotonic() - start,
+        )
+        return None
+
+
+def cassette_plugin_from_env(*tool_modules: ModuleType) -> CassettePlugin | None:
+    """
+    Returns a cassette plugin when $REPO_REVIVER_CASSETTE names a cassette file.
+
+    $REPO_REVIVER_CASSETTE_MODE selects ``record`` or ``replay`` (default) and
+    $REPO_REVIVER_CASSETTE_LATENCY ``original`` (default) or ``zero``. The
+    subprocess calls of ``tool_modules`` go through the same cassette.
+    """
+    path = os.environ.get("REPO_REVIVER_CASSETTE")
+    if not path:
+        return None
+    cassette = Cassette(
+        path,
+        mode=os.environ.get("REPO_REVIVER_CASSETTE_MODE", REPLAY),
+        latency=os.environ.get("REPO_REVIVER_CASSETTE_LATENCY", ORIGINAL_LATENCY),
+    )
+    install_subprocess_cassette(cassette, *tool_modules)
+    logging.info(f"Cassette {path} in {cassette.mode} mode")
+    return CassettePlugin(cassette)
@@ -0,0 +1,131 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import socket
+import threading
+from collections.abc import Callable
+from typing import Any, TypeVar
+
+import google.auth
+import google.cloud.storage as storage
+from google.auth.credentials import Credentials
+from google.auth.transport.requests import AuthorizedSession
+from google.cloud import logging as google_cloud_logging
+from google.cloud.trace_v2 import TraceServiceClient
+from requests.adapters import HTTPAdapter
+
+# Connections kept open per host in the shared HTTP pool
+HTTP_POOL_SIZE = int(os.environ.get("GCP_HTTP_POOL_SIZE", "32"))
+
+# Idle seconds before TCP keep-alive probes are sent on pooled connections
+HTTP_KEEPALIVE_SECONDS = int(os.environ.get("GCP_HTTP_KEEPALIVE_SECONDS", "60"))
+
+T = TypeVar("T")
+
+_clients: dict[tuple[str, str | None], Any] = {}
+_lock = threading.RLock()
+
+
+class KeepAliveHTTPAdapter(HTTPAdapter):
+    """HTTP adapter whose pooled connections use TCP keep-alive."""
+
+    def __init__(self, keepalive_seconds: int, **kwargs: Any) -> None:
+        self.keepalive_seconds = keepalive_seconds
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args: Any, **kwargs: Any) -> None:
+        socket_options = [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            socket_options += [
+                (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, self.keepalive_seconds),
+                (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, self.keepalive_seconds),
+            ]
+        kwargs["socket_options"] = socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _get_or_create(kind: str, project: str | None, factory: Callable[[], T]) -> T:
+    key = (kind, project)
+    with _lock:
+        if key not in _clients:
+            _clients[key] = factory()
+        return _clients[key]
+
+
+def get_credentials() -> tuple[Credentials, str | None]:
+    """Returns the application default credentials and project, resolved once."""
+    return _get_or_create("credentials", None, google.auth.default)
+
+
+def get_http_session() -> AuthorizedSession:
+    """Returns the shared authorized HTTP session with a sized connection pool."""
+
+    def create() -> AuthorizedSession:
+        credentials, _ = get_credentials()
+        session = AuthorizedSession(credentials)
+        adapter = KeepAliveHTTPAdapter(
+            HTTP_KEEPALIVE_SECONDS,
+            pool_connections=HTTP_POOL_SIZE,
+            pool_maxsize=HTTP_POOL_SIZE,
+        )
+        session.mount("https://", adapter)
+        return session
+
+    return _get_or_create("http", None, create)
+
+
+def storage_client_kwargs(project: str | None = None) -> dict[str, Any]:
+    """Keyword arguments that make a new storage.Client reuse the shared pool.
+
+    For clients constructed by other libraries, e.g. ADK's GcsArtifactService.
+    """
+    credentials, default_project = get_credentials()
+    return {
+        "project": project or default_project,
+        "credentials": credentials,
+        "_http": get_http_session(),
+    }
+
+
+def get_storage_client(project: str | None = None) -> storage.Client:
+    """Returns the shared Cloud Storage client for a project."""
+    return _get_or_create(
+        "storage", project, lambda: storage.Client(**storage_client_kwargs(project))
+    )
+
+
+def get_logging_client(project: str | None = None) -> google_cloud_logging.Client:
+    """Returns the shared Cloud Logging client (and its gRPC channel) for a project."""
+
+    def create() -> google_cloud_logging.Client:
+        credentials, default_project = get_credentials()
+        return google_cloud_logging.Client(
+            project=project or default_project, credentials=credentials
+        )
+
+    return _get_or_create("logging", project, create)
+
+
+def get_trace_client() -> TraceServiceClient:
+    """Returns the shared Cloud Trace client."""
+    return _get_or_create(
+        "trace", None, lambda: TraceServiceClient(credentials=get_credentials()[0])
+    )
+
+
+def reset_clients() -> None:
+    """Drops all shared clients, e.g. after forking a worker process."""
+    with _lock:
+        _clients.clear()
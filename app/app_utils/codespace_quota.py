@@ -0,0 +1,286 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import logging
+import os
+import re
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+# Codespaces the GitHub account may run at once, and per tenant (session user)
+ACCOUNT_LIMIT = int(os.environ.get("CODESPACE_ACCOUNT_LIMIT", "10"))
+TENANT_QUOTA = int(os.environ.get("CODESPACE_TENANT_QUOTA", "2"))
+
+# Relative shares of queued creations, e.g. "alice=2,batch=0.5" (default 1)
+TENANT_WEIGHTS = os.environ.get("CODESPACE_TENANT_WEIGHTS", "")
+
+# How long a creation may wait for a slot before the tool reports an error
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get("CODESPACE_QUEUE_TIMEOUT_SECONDS", "900"))
+
+# A slot is reclaimed after this long even if the codespace was never deleted
+# through the agent; created codespaces are retained for at most an hour
+LEASE_SECONDS = float(os.environ.get("CODESPACE_LEASE_SECONDS", "7200"))
+
+# When GitHub reports the account limit before ACCOUNT_LIMIT is reached (other
+# codespaces of the account), creations are held to the current count this long
+ACCOUNT_FULL_BACKOFF_SECONDS = 30.0
+
+# Session state keys overriding the tenant (default: the session user) and the
+# priority (higher is served first, default 0) of a session's creations
+TENANT_STATE_KEY = "tenant"
+PRIORITY_STATE_KEY = "priority"
+
+_ACCOUNT_LIMIT_RE = re.compile(
+    r"maximum number of (?:running |active )?codespaces|codespaces? (?:limit|quota)",
+    re.IGNORECASE,
+)
+
+
+class QueueTimeout(Exception):
+    """No codespace slot became available within the queue timeout."""
+
+
+def is_account_limit(message: str | None) -> bool:
+    """Whether gh output reports the account's concurrent codespace limit."""
+    return bool(message and _ACCOUNT_LIMIT_RE.search(message))
+
+
+def parse_weights(spec: str) -> dict[str, float]:
+    """Parses "tenant=weight,..." into a dict."""
+    weights = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        tenant, _, weight = item.partition("=")
+        weights[tenant.strip()] = float(weight)
+    return weights
+
+
+def tenant_of(tool_context: Any) -> tuple[str, int]:
+    """Returns the tenant and priority of the session calling a tool."""
+    if tool_context is None:
+        return "default", 0
+    state = tool_context.state
+    tenant = state.get(TENANT_STATE_KEY) or tool_context.session.user_id
+    return str(tenant), int(state.get(PRIORITY_STATE_KEY) or 0)
+
+
+@dataclass(eq=False)
+class Lease:
+    """A queued or granted codespace slot."""
+
+    tenant: str
+    priority: int
+    start_tag: float
+    ticket: int
+    enqueued: float
+    waited_seconds: float = 0.0
+    codespace_name: str | None = None
+    granted: float | None = None
+
+
+class CodespaceScheduler:
+    """
+    Hands out codespace slots within the account limit and per-tenant quotas.
+
+    Creations beyond the quota queue up instead of failing. Waiting requests
+    are served by priority, then by start-time fair queuing: each tenant's
+    requests are tagged with a virtual start time advancing by 1/weight per
+    request, so a tenant submitting a burst does not starve the others, and a
+    tenant with weight 2 gets twice the share of one with weight 1.
+    """
+
+    def __init__(
+        self,
+        capacity: int = ACCOUNT_LIMIT,
+        tenant_quota: int = TENANT_QUOTA,
+        weights: dict[str, float] | None = None,
+        lease_seconds: float = LEASE_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.capacity = capacity
+        self.tenant_quota = tenant_quota
+        self.weights = weights or {}
+        self.lease_seconds = lease_seconds
+        self.clock = clock
+        self._condition = threading.Condition()
+        self._tickets = itertools.count()
+        self._waiting: list[Lease] = []
+        self._active: list[Lease] = []
+        self._virtual_time = 0.0
+        self._last_finish: dict[str, float] = {}
+        self._ceiling = capacity
+        self._ceiling_until = 0.0
+        self.stats = {
+            "granted": 0,
+            "queued": 0,
+            "timeouts": 0,
+            "account_full": 0,
+            "expired": 0,
+            "max_queue": 0,
+            "waited_seconds": 0.0,
+        }
+
+    def _tenant_active(self, tenant: str) -> int:
+        return sum(1 for lease in self._active if lease.tenant == tenant)
+
+    def _expire(self, now: float) -> None:
+        expired = [
+            lease
+            for lease in self._active
+            if lease.granted is not None and now - lease.granted > self.lease_seconds
+        ]
+        for lease in expired:
+            logging.warning(f"Reclaiming codespace slot of {lease.codespace_name}")
+            self._active.remove(lease)
+            self.stats["expired"] += 1
+
+    def _next(self, now: float) -> Lease | None:
+        """The waiting request to serve next, if a slot is free for it."""
+        capacity = self.capacity
+        if now < self._ceiling_until:
+            capacity = min(capacity, self._ceiling)
+        if len(self._active) >= capacity:
+            return None
+        eligible = [
+            lease
+            for lease in self._waiting
+            if self._tenant_active(lease.tenant) < self.tenant_quota
+        ]
+        if not eligible:
+            return None
+        return min(eligible, key=lambda w: (-w.priority, w.start_tag, w.ticket))
+
+    def _wait_for_slot(self, lease: Lease, timeout: float) -> Lease:
+        deadline = self.clock() + timeout
+        self._waiting.append(lease)
+        self.stats["max_queue"] = max(self.stats["max_queue"], len(self._waiting))
+        queued = False
+        while True:
+            now = self.clock()
+            self._expire(now)
+            if self._next(now) is lease:
+                break
+            if not queued:
+                queued = True
+                self.stats["queued"] += 1
+            if now >= deadline:
+                self._waiting.remove(lease)
+                self.stats["timeouts"] += 1
+                self._condition.notify_all()
+                raise QueueTimeout(
+                    f"No codespace slot for tenant {lease.tenant} after "
+                    f"{timeout:.0f}s ({len(self._active)} active, "
+                    f"{len(self._waiting)} queued)"
+                )
+            # Slots also free up through lease expiry and the account backoff
+            self._condition.wait(min(deadline - now, ACCOUNT_FULL_BACKOFF_SECONDS))
+        self._waiting.remove(lease)
+        self._active.append(lease)
+        self._virtual_time = max(self._virtual_time, lease.start_tag)
+        lease.granted = self.clock()
+        waited = lease.granted - lease.enqueued
+        self.stats["granted"] += 1
+        # A requeued request adds only its latest wait
+        self.stats["waited_seconds"] += waited - lease.waited_seconds
+        lease.waited_seconds = waited
+        # Another request may fit in a slot that is still free
+        self._condition.notify_all()
+        return lease
+
+    def acquire(
+        self, tenant: str, priority: int = 0, timeout: float = QUEUE_TIMEOUT_SECONDS
+    ) -> Lease:
+        """Blocks until a codespace may be created for ``tenant``.
+
+        Raises:
+            QueueTimeout: No slot was granted within ``timeout`` seconds
+        """
+        with self._condition:
+            weight = self.weights.get(tenant, 1.0)
+            start_tag = max(self._virtual_time, self._last_finish.get(tenant, 0.0))
+            self._last_finish[tenant] = start_tag + 1 / weight
+            lease = Lease(
+                tenant=tenant,
+                priority=priority,
+                start_tag=start_tag,
+                ticket=next(self._tickets),
+                enqueued=self.clock(),
+            )
+            return self._wait_for_slot(lease, timeout)
+
+    def account_full(
+        self, lease: Lease, timeout: float = QUEUE_TIMEOUT_SECONDS
+    ) -> Lease:
+        """Requeues a creation GitHub rejected for the account limit.
+
+        The account is held to the codespaces currently active for a while,
+        since codespaces created elsewhere count against the limit too. The
+        request keeps its place in the fair queue.
+        """
+        with self._condition:
+            self._active.remove(lease)
+            self.stats["account_full"] += 1
+            self._ceiling = len(self._active)
+            self._ceiling_until = self.clock() + ACCOUNT_FULL_BACKOFF_SECONDS
+            lease.granted = None
+            return self._wait_for_slot(lease, timeout)
+
+    def assign(self, lease: Lease, codespace_name: str) -> None:
+        """Records the codespace created with a granted slot."""
+        with self._condition:
+            lease.codespace_name = codespace_name
+
+    def release(self, lease: Lease) -> None:
+        """Frees the slot of a creation that failed."""
+        with self._condition:
+            if lease in self._active:
+                self._active.remove(lease)
+                self._condition.notify_all()
+
+    def release_codespace(self, codespace_name: str) -> None:
+        """Frees the slot held by a deleted codespace."""
+        with self._condition:
+            for lease in self._active:
+                if lease.codespace_name == codespace_name:
+                    self._active.remove(lease)
+                    self._condition.notify_all()
+                    return
+
+    def snapshot(self) -> dict[str, Any]:
+        """Active and queued codespaces per tenant, with the scheduler stats."""
+        with self._condition:
+            tenants: dict[str, dict[str, int]] = {}
+            for state, leases in (("active", self._active), ("queued", self._waiting)):
+                for lease in leases:
+                    counts = tenants.setdefault(
+                        lease.tenant, {"active": 0, "queued": 0}
+                    )
+                    counts[state] += 1
+            return {"tenants": tenants, **self.stats}
+
+
+_scheduler: CodespaceScheduler | None = None
+_scheduler_lock = threading.Lock()
+
+
+def get_codespace_scheduler() -> CodespaceScheduler:
+    """Returns the process-wide codespace scheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = CodespaceScheduler(weights=parse_weights(TENANT_WEIGHTS))
+        return _scheduler
@@ -14,18 +14,40 @@
 
 import asyncio
 import datetime
+import hashlib
 import importlib
 import inspect
 import json
 import logging
+import os
 import warnings
 from typing import Any
 
 import click
 import google.auth
 import vertexai
+from google.genai import errors
 from vertexai._genai import _agent_engines_utils
-from vertexai._genai.types import AgentEngine, AgentEngineConfig
+from vertexai._genai.types import (
+    AgentEngine,
+    AgentEngineConfig,
+    EnvVar,
+    ReasoningEngineSpec,
+    ReasoningEngineSpecDeploymentSpec,
+    UpdateAgentEngineConfig,
+)
+
+# Fields a settings-only update replaces on the engine
+SETTINGS_UPDATE_MASK = (
+    "display_name",
+    "description",
+    "labels",
+    "spec.deployment_spec.env",
+    "spec.deployment_spec.min_instances",
+    "spec.deployment_spec.max_instances",
+    "spec.deployment_spec.resource_limits",
+    "spec.deployment_spec.container_concurrency",
+)
 
 # Suppress google-cloud-storage version compatibility warning
 warnings.filterwarnings(
@@ -64,14 +86,169 @@ def parse_key_value_pairs(kv_string: str | None) -> dict[str, str]:
     return result
 
 
+def hash_source_files(paths: list[str]) -> str:
+    """Hash the contents and relative paths of files and directories.
+
+    Bytecode and cache directories are skipped so rebuilding them does not
+    count as a code change.
+    """
+    digest = hashlib.sha256()
+    for root_path in sorted(paths):
+        if os.path.isfile(root_path):
+            files = [root_path]
+        else:
+            files = []
+            for dirpath, dirnames, filenames in os.walk(root_path):
+                dirnames[:] = sorted(d for d in dirnames if d != "__pycache__")
+                files.extend(
+                    os.path.join(dirpath, name)
+                    for name in sorted(filenames)
+                    if not name.endswith((".pyc", ".pyo"))
+                )
+        for path in files:
+            digest.update(os.path.relpath(path).encode())
+            digest.update(b"\0")
+            with open(path, "rb") as f:
+                digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def hash_config(config_fields: dict[str, Any]) -> str:
+    """Hash the deployment settings that can change without a code upload."""
+    encoded = json.dumps(config_fields, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def read_deployment_metadata(
+    metadata_file: str = "deployment_metadata.json",
+) -> dict[str, Any]:
+    """Read the metadata recorded by the previous deployment, if any."""
+    try:
+        with open(metadata_file) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def plan_deployment(
+    previous: dict[str, Any], fingerprint: dict[str, str], force: bool = False
+) -> str:
+    """Decide how much of the agent engine needs to be redeployed.
+
+    Args:
+        previous: Metadata of the previous deployment
+        fingerprint: Target project/location, entrypoint and hashes of the
+            current source, requirements and config
+        force: Always push a full update
+
+    Returns:
+        "create" without a recorded engine for the target, "skip" when nothing
+        changed, "config" when only deployment settings changed, else "full"
+    """
+    engine_id = previous.get("remote_agent_engine_id")
+    same_target = all(
+        previous.get(key) == fingerprint[key] for key in ("project", "location")
+    )
+    if not engine_id or engine_id == "None" or not same_target:
+        return "create"
+    if force:
+        return "full"
+    code_unchanged = all(
+        previous.get(key) == fingerprint[key]
+        for key in ("source_hash", "requirements_hash", "entrypoint")
+    )
+    if not code_unchanged:
+        return "full"
+    if previous.get("config_hash") == fingerprint["config_hash"]:
+        return "skip"
+    return "config"
+
+
+def find_existing_agent(
+    client: Any, previous: dict[str, Any], display_name: str, plan: str
+) -> Any:
+    """Look up the deployed engine by its recorded resource name.
+
+    Falls back to listing engines by display name when nothing is recorded
+    for this project and location, or the recorded engine no longer exists.
+    """
+    engine_id = previous.get("remote_agent_engine_id")
+    if plan != "create":
+        try:
+            return client.agent_engines.get(name=engine_id)
+        except errors.ClientError as e:
+            if e.code != 404:
+                raise
+            logging.warning(f"Recorded agent engine {engine_id} not found")
+    matching_agents = [
+        agent
+        for agent in client.agent_engines.list()
+        if agent.api_resource.display_name == display_name
+    ]
+    return matching_agents[0] if matching_agents else None
+
+
+def build_settings_update(config: AgentEngineConfig) -> UpdateAgentEngineConfig:
+    """Build the request updating an engine's settings without its code.
+
+    `agent_engines.update` only sends the deployment spec (env vars, scaling,
+    resources) along with new code, so a settings-only update sets the spec
+    and its update mask explicitly.
+
+    Args:
+        config: Deployment settings, without source packages
+
+    Returns:
+        The update request config, with the mask of every field it sets
+    """
+    deployment_spec = ReasoningEngineSpecDeploymentSpec(
+        env=[
+            EnvVar(name=name, value=value)
+            for name, value in (config.env_vars or {}).items()
+        ],
+        min_instances=config.min_instances,
+        max_instances=config.max_instances,
+        resource_limits=config.resource_limits,
+        container_concurrency=config.container_concurrency,
+    )
+    update_mask = list(SETTINGS_UPDATE_MASK)
+    if config.service_account is not None:
+        update_mask.append("spec.service_account")
+    return UpdateAgentEngineConfig(
+        display_name=config.display_name,
+        description=config.description,
+        labels=config.labels,
+        spec=ReasoningEngineSpec(
+            deployment_spec=deployment_spec, service_account=config.service_account
+        ),
+        update_mask=",".join(update_mask),
+    )
+
+
+def update_settings(client: Any, name: str, config: AgentEngineConfig) -> AgentEngine:
+    """Apply deployment settings to an existing engine and wait for the update."""
+    operation = client.agent_engines._update(
+        name=name, config=build_settings_update(config)
+    )
+    operation = _agent_engines_utils._await_operation(
+        operation_name=operation.name,
+        get_operation_fn=client.agent_engines._get_agent_operation,
+    )
+    if operation.error:
+        raise RuntimeError(f"Failed to update Agent Engine: {operation.error}")
+    return client.agent_engines.get(name=name)
+
+
 def write_deployment_metadata(
     remote_agent: Any,
     metadata_file: str = "deployment_metadata.json",
+    fingerprint: dict[str, str] | None = None,
 ) -> None:
-    """Write deployment metadata to file."""
+    """Write deployment metadata, including the content hashes, to file."""
     metadata = {
         "remote_agent_engine_id": remote_agent.api_resource.name,
         "deployment_timestamp": datetime.datetime.now().isoformat(),
+        **(fingerprint or {}),
     }
 
     with open(metadata_file, "w") as f:
@@ -194,6 +371,17 @@ def print_deployment_success(
     default=1,
     help="Number of worker processes (default: 1)",
 )
+@click.option(
+    "--force",
+    is_flag=True,
+    default=False,
+    help="Push a full update even if nothing changed since the last deploy",
+)
+@click.option(
+    "--metadata-file",
+    default="deployment_metadata.json",
+    help="File recording the deployed engine and content hashes",
+)
 def deploy_agent_engine_app(
     project: str | None,
     location: str,
@@ -212,7 +400,9 @@ def deploy_agent_engine_app(
     memory: str,
     container_concurrency: int,
     num_workers: int,
-) -> AgentEngine:
+    force: bool,
+    metadata_file: str,
+) -> AgentEngine | None:
     """Deploy the agent engine app to Vertex AI."""
 
     logging.basicConfig(level=logging.INFO)
@@ -228,6 +418,8 @@ def deploy_agent_engine_app(
 
     if not project:
         _, project = google.auth.default()
+    if not project:
+        raise click.UsageError("No default GCP project found, pass --project")
 
     print("""
     ╔═══════════════════════════════════════════════════════════╗
@@ -254,6 +446,35 @@ def deploy_agent_engine_app(
 
     source_packages_list = list(source_packages)
 
+    # Settings that are applied without uploading code
+    deployment_config = AgentEngineConfig(
+        display_name=display_name,
+        description=description,
+        env_vars=env_vars,
+        service_account=service_account,
+        labels=labels_dict,
+        min_instances=min_instances,
+        max_instances=max_instances,
+        resource_limits={"cpu": cpu, "memory": memory},
+        container_concurrency=container_concurrency,
+    )
+    fingerprint = {
+        "project": project,
+        "location": location,
+        "source_hash": hash_source_files(source_packages_list),
+        "requirements_hash": hash_source_files([requirements_file]),
+        "entrypoint": f"{entrypoint_module}.{entrypoint_object}",
+        "config_hash": hash_config(deployment_config.model_dump(mode="json")),
+    }
+    previous = read_deployment_metadata(metadata_file)
+    plan = plan_deployment(previous, fingerprint, force=force)
+    if plan == "skip":
+        click.echo(
+            "\n✅ No changes since the last deployment of "
+            f"{previous['remote_agent_engine_id']} (use --force to redeploy)"
+        )
+        return None
+
     # Initialize vertexai client
     client = vertexai.Client(
         project=project,
@@ -261,6 +482,24 @@ def deploy_agent_engine_app(
     )
     vertexai.init(project=project, location=location)
 
+    existing_agent = find_existing_agent(client, previous, display_name, plan)
+    if existing_agent is None:
+        plan = "create"
+    elif plan == "create":
+        # Engine found by display name without recorded hashes
+        plan = "full"
+
+    if plan == "config":
+        click.echo(
+            f"\n⚡ Code unchanged, updating deployment settings of {display_name}"
+        )
+        remote_agent = update_settings(
+            client, existing_agent.api_resource.name, deployment_config
+        )
+        write_deployment_metadata(remote_agent, metadata_file, fingerprint)
+        print_deployment_success(remote_agent, location, project)
+        return remote_agent
+
     # Add agent garden labels if configured
 
     # Dynamically import the agent instance to generate class_methods
@@ -276,46 +515,38 @@ def deploy_agent_engine_app(
     class_methods_list = generate_class_methods_from_agent(agent_instance)
 
     config = AgentEngineConfig(
-        display_name=display_name,
-        description=description,
+        display_name=deployment_config.display_name,
+        description=deployment_config.description,
+        env_vars=deployment_config.env_vars,
+        service_account=deployment_config.service_account,
+        labels=deployment_config.labels,
+        min_instances=deployment_config.min_instances,
+        max_instances=deployment_config.max_instances,
+        resource_limits=deployment_config.resource_limits,
+        container_concurrency=deployment_config.container_concurrency,
         source_packages=source_packages_list,
         entrypoint_module=entrypoint_module,
         entrypoint_object=entrypoint_object,
         class_methods=class_methods_list,
-        env_vars=env_vars,
-        service_account=service_account,
         requirements_file=requirements_file,
-        labels=labels_dict,
-        min_instances=min_instances,
-        max_instances=max_instances,
-        resource_limits={"cpu": cpu, "memory": memory},
-        container_concurrency=container_concurrency,
         agent_framework="google-adk",
     )
 
-    # Check if an agent with this name already exists
-    existing_agents = list(client.agent_engines.list())
-    matching_agents = [
-        agent
-        for agent in existing_agents
-        if agent.api_resource.display_name == display_name
-    ]
-
     # Deploy the agent (create or update)
-    if matching_agents:
+    if existing_agent is not None:
         click.echo(f"\n📝 Updating existing agent: {display_name}")
     else:
         click.echo(f"\n🚀 Creating new agent: {display_name}")
 
     click.echo("🚀 Deploying to Vertex AI Agent Engine (this can take 3-5 minutes)...")
-    if matching_agents:
+    if existing_agent is not None:
         remote_agent = client.agent_engines.update(
-            name=matching_agents[0].api_resource.name, config=config
+            name=existing_agent.api_resource.name, config=config
         )
     else:
         remote_agent = client.agent_engines.create(config=config)
 
-    write_deployment_metadata(remote_agent)
+    write_deployment_metadata(remote_agent, metadata_file, fingerprint)
     print_deployment_success(remote_agent, location, project)
 
     return remote_agent
@@ -0,0 +1,96 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import atexit
+from typing import Any
+
+from google.cloud import logging as google_cloud_logging
+from pydantic import ValidationError
+
+from app.app_utils.log_batching import BLOCK, BatchedLogWriter
+from app.app_utils.typing import Feedback
+
+
+class BufferedFeedbackSink:
+    """
+    Validates feedback on the request path and writes it to Cloud Logging in batches.
+
+    Feedback is queued on a ``BatchedLogWriter`` that blocks (instead of
+    dropping) when full, so no accepted feedback is lost. Queued entries are
+    flushed on ``shutdown``, which is also registered with ``atexit``.
+    """
+
+    def __init__(
+        self,
+        logger: google_cloud_logging.Logger,
+        flush_interval: float = 1.0,
+        max_queue_entries: int = 10_000,
+        block_timeout: float = 5.0,
+    ) -> None:
+        """
+        Initialize the sink.
+
+        :param logger: Logger receiving the feedback entries
+        :param flush_interval: Maximum seconds feedback waits before being written
+        :param max_queue_entries: Queued entries before callers are blocked
+        :param block_timeout: Seconds a caller waits for space in a full queue
+        """
+        self.writer = BatchedLogWriter(
+            logger,
+            flush_interval=flush_interval,
+            max_queue_entries=max_queue_entries,
+            overflow_policy=BLOCK,
+            block_timeout=block_timeout,
+        )
+        atexit.register(self.shutdown)
+
+    def submit(self, feedback: dict[str, Any]) -> None:
+        """
+        Validate and queue one feedback entry.
+
+        :param feedback: The feedback payload
+        :raises ValidationError: If the feedback is invalid
+        :raises RuntimeError: If the queue stayed full for ``block_timeout``
+        """
+        feedback_obj = Feedback.model_validate(feedback)
+        if not self.writer.write(feedback_obj.model_dump(), severity="INFO"):
+            raise RuntimeError("Feedback queue is full, try again later")
+
+    def submit_batch(self, feedbacks: list[dict[str, Any]]) -> dict[str, Any]:
+        """
+        Validate and queue several feedback entries.
+
+        Invalid entries are skipped and reported instead of failing the batch.
+
+        :param feedbacks: The feedback payloads
+        :return: Count of accepted entries and the index and error of rejected ones
+        """
+        accepted = 0
+        rejected = []
+        for index, feedback in enumerate(feedbacks):
+            try:
+                self.submit(feedback)
+                accepted += 1
+            except (ValidationError, RuntimeError) as e:
+                rejected.append({"index": index, "error": str(e)})
+        return {"accepted": accepted, "rejected": rejected}
+
+    def flush(self, timeout: float | None = 10.0) -> bool:
+        """Write all queued feedback and wait until it is committed."""
+        return self.writer.flush(timeout=timeout)
+
+    def shutdown(self) -> None:
+        """Flush queued feedback and stop the background writer."""
+        self.writer.shutdown()
+        atexit.unregister(self.shutdown)
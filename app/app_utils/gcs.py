@@ -12,11 +12,23 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import gzip
+import hashlib
 import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 
 import google.cloud.storage as storage
 from google.api_core import exceptions
 
+from app.app_utils.clients import get_storage_client
+
+# Payload digests remembered as stored, least recently used first; a forgotten
+# digest costs one rejected conditional upload, not a duplicate object
+KNOWN_DIGESTS_SIZE = 4096
+
 
 def create_bucket_if_not_exists(bucket_name: str, project: str, location: str) -> None:
     """Creates a new bucket if it doesn't already exist.
@@ -26,7 +38,7 @@ def create_bucket_if_not_exists(bucket_name: str, project: str, location: str) -
         project: Google Cloud project ID
         location: Location to create the bucket in (defaults to europe-west1)
     """
-    storage_client = storage.Client(project=project)
+    storage_client = get_storage_client(project)
 
     if bucket_name.startswith("gs://"):
         bucket_name = bucket_name[5:]
@@ -40,3 +52,141 @@ def create_bucket_if_not_exists(bucket_name: str, project: str, location: str) -
             project=project,
         )
         logging.info(f"Created bucket {bucket.name} in {bucket.location}")
+
+
+class SpanPayloadOffloader:
+    """Uploads oversized span payloads to GCS in the background.
+
+    Payloads are gzip-compressed and stored under a content-addressed name
+    (the SHA-256 of the uncompressed payload), so identical prompt payloads are
+    stored once and their URI is known before the upload finishes. Uploads run
+    on a bounded thread pool with retries; the bucket existence check is cached.
+    """
+
+    def __init__(
+        self,
+        storage_client: storage.Client,
+        bucket_name: str,
+        max_workers: int = 4,
+        max_pending: int = 64,
+        max_retries: int = 3,
+        retry_backoff: float = 0.5,
+        bucket_check_ttl: float = 300.0,
+    ) -> None:
+        """Initializes the offloader.
+
+        Args:
+            storage_client: Google Cloud Storage client
+            bucket_name: Bucket that receives the payloads
+            max_workers: Number of upload threads
+            max_pending: Maximum queued uploads before new payloads are dropped
+            max_retries: Upload attempts per payload
+            retry_backoff: Base delay between attempts, doubled on each retry
+            bucket_check_ttl: Seconds before a missing bucket is checked again
+        """
+        self.storage_client = storage_client
+        self.bucket_name = bucket_name
+        self.bucket = storage_client.bucket(bucket_name)
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.bucket_check_ttl = bucket_check_ttl
+        self.stats = {
+            "uploaded": 0,
+            "deduplicated": 0,
+            "failed": 0,
+            "dropped": 0,
+            "raw_bytes": 0,
+            "compressed_bytes": 0,
+        }
+        self._bucket_exists: bool | None = None
+        self._bucket_checked_at = 0.0
+        self._known_digests: OrderedDict[str, None] = OrderedDict()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="SpanPayloadOffload"
+        )
+
+    def bucket_exists(self) -> bool:
+        """Returns whether the bucket exists, checking GCS at most once per TTL."""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._bucket_exists
+            fresh = now - self._bucket_checked_at < self.bucket_check_ttl
+        # A positive answer never expires; a missing bucket is re-checked
+        if cached or (cached is not None and fresh):
+            return cached
+        exists = self.bucket.exists()
+        with self._lock:
+            self._bucket_exists = exists
+            self._bucket_checked_at = now
+        return exists
+
+    @staticmethod
+    def blob_name(digest: str) -> str:
+        return f"spans/{digest}.json.gz"
+
+    def offload(self, content: str) -> str | None:
+        """Schedules a payload upload and returns its GCS URI immediately.
+
+        Args:
+            content: The JSON payload
+
+        Returns:
+            The gs:// URI of the payload, or None if the upload queue is full
+        """
+        data = content.encode()
+        digest = hashlib.sha256(data).hexdigest()
+        uri = f"gs://{self.bucket_name}/{self.blob_name(digest)}"
+        with self._lock:
+            if digest in self._known_digests:
+                self._known_digests.move_to_end(digest)
+                self.stats["deduplicated"] += 1
+                return uri
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.stats["dropped"] += 1
+            return None
+        with self._lock:
+            self._known_digests[digest] = None
+            if len(self._known_digests) > KNOWN_DIGESTS_SIZE:
+                self._known_digests.popitem(last=False)
+        self._executor.submit(self._upload, digest, data)
+        return uri
+
+    def _upload(self, digest: str, data: bytes) -> None:
+        try:
+            compressed = gzip.compress(data)
+            blob = self.bucket.blob(self.blob_name(digest))
+            blob.content_encoding = "gzip"
+            for attempt in range(self.max_retries):
+                try:
+                    # Only create the object if it doesn't exist yet
+                    blob.upload_from_string(
+                        compressed, "application/json", if_generation_match=0
+                    )
+                    with self._lock:
+                        self.stats["uploaded"] += 1
+                        self.stats["raw_bytes"] += len(data)
+                        self.stats["compressed_bytes"] += len(compressed)
+                    return
+                except exceptions.PreconditionFailed:
+                    with self._lock:
+                        self.stats["deduplicated"] += 1
+                    return
+                except Exception:
+                    if attempt == self.max_retries - 1:
+                        raise
+                    time.sleep(self.retry_backoff * 2**attempt)
+        except Exception:
+            logging.exception(f"Failed to upload span payload {digest} to GCS")
+            with self._lock:
+                self.stats["failed"] += 1
+                # Allow a later identical payload to retry the upload
+                self._known_digests.pop(digest, None)
+        finally:
+            self._slots.release()
+
+    def shutdown(self, wait: bool = True) -> None:
+        """Waits for pending uploads and stops the upload threads."""
+        self._executor.shutdown(wait=wait)
@@ -0,0 +1,246 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import contextvars
+import functools
+import hashlib
+import inspect
+import json
+import os
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from opentelemetry import metrics, trace
+from opentelemetry.exporter.cloud_monitoring import CloudMonitoringMetricsExporter
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import (
+    ConsoleMetricExporter,
+    MetricExporter,
+    PeriodicExportingMetricReader,
+)
+
+from app.app_utils.local_telemetry import TELEMETRY_DIR, use_local_telemetry
+
+METER_NAME = "repo_reviver.tools"
+
+
+class ToolInstruments:
+    """The tool call instruments of one meter."""
+
+    def __init__(self, meter: metrics.Meter) -> None:
+        self.duration = meter.create_histogram(
+            "repo_reviver.tool.duration", unit="s", description="Tool call duration"
+        )
+        self.output_bytes = meter.create_histogram(
+            "repo_reviver.tool.output_bytes",
+            unit="By",
+            description="Size of the JSON encoded tool response",
+        )
+        self.calls = meter.create_counter(
+            "repo_reviver.tool.calls", description="Tool calls by returned status"
+        )
+        self.retries = meter.create_counter(
+            "repo_reviver.tool.retries",
+            description="Tool calls repeating an identical call that failed",
+        )
+
+
+# Created on the global proxy meter, so they start reporting once a
+# MeterProvider is installed in AgentEngineApp.set_up
+_instruments = ToolInstruments(metrics.get_meter(METER_NAME))
+
+# Number of recently failed calls remembered for retry detection
+MAX_TRACKED_FAILURES = 1024
+
+# (tool, status, duration) of the last instrumented call in the current
+# context; ADK runs each function call and its tool callbacks in one task
+_last_call: contextvars.ContextVar[tuple[str, str, float] | None] = (
+    contextvars.ContextVar("repo_reviver_last_tool_call", default=None)
+)
+
+_failed_calls: collections.OrderedDict[str, None] = collections.OrderedDict()
+_failed_calls_lock = threading.Lock()
+
+
+def _call_key(name: str, kwargs: dict[str, Any]) -> str:
+    arguments = {k: v for k, v in kwargs.items() if k != "tool_context"}
+    encoded = json.dumps([name, arguments], sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+def _is_retry(key: str) -> bool:
+    with _failed_calls_lock:
+        return key in _failed_calls
+
+
+def _remember_outcome(key: str, failed: bool) -> None:
+    with _failed_calls_lock:
+        if failed:
+            _failed_calls[key] = None
+            _failed_calls.move_to_end(key)
+            while len(_failed_calls) > MAX_TRACKED_FAILURES:
+                _failed_calls.popitem(last=False)
+        else:
+            _failed_calls.pop(key, None)
+
+
+def _response_status(result: Any) -> str:
+    if isinstance(result, dict):
+        return str(result.get("status", "success"))
+    return "success"
+
+
+def _record(
+    instruments: ToolInstruments,
+    name: str,
+    key: str,
+    retry: bool,
+    start: float,
+    result: Any,
+    status: str,
+) -> None:
+    duration = time.perf_counter() - start
+    output_bytes = (
+        len(json.dumps(result, default=str).encode()) if result is not None else 0
+    )
+    attributes = {"tool": name, "status": status}
+    _last_call.set((name, status, duration))
+    instruments.duration.record(duration, attributes)
+    instruments.output_bytes.record(output_bytes, {"tool": name})
+    instruments.calls.add(1, attributes)
+    if retry:
+        instruments.retries.add(1, {"tool": name})
+    _remember_outcome(key, failed=status not in ("success", "partial"))
+
+    # ADK runs each tool inside its "execute_tool <name>" span
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attributes(
+            {
+                "repo_reviver.tool.duration_ms": round(duration * 1000, 3),
+                "repo_reviver.tool.output_bytes": output_bytes,
+                "repo_reviver.tool.status": status,
+                "repo_reviver.tool.retry": retry,
+            }
+        )
+
+
+def last_tool_call(name: str) -> tuple[str, float] | None:
+    """Returns the status and duration of the last call to tool ``name``.
+
+    Only calls made in the current context count, e.g. the call an ADK
+    after-tool callback runs for.
+    """
+    call = _last_call.get()
+    if call is None or call[0] != name:
+        return None
+    return call[1], call[2]
+
+
+def instrument_tool(
+    func: Callable[..., Any], meter_provider: MeterProvider | None = None
+) -> Callable[..., Any]:
+    """Record duration, response size, status and retries of an agent tool.
+
+    Metrics go to ``meter_provider`` (the global one by default) and the same
+    values are set as attributes on the current tool span. The status is the
+    ``status`` field of the returned dict ("exception" if the tool raised). A
+    call is counted as a retry when it repeats the arguments of a recent failed
+    call to the same tool. The wrapper keeps the tool's signature and
+    docstring, so the function declaration the model sees is unchanged.
+
+    Args:
+        func: The tool function, sync or async
+        meter_provider: Provider of the meter recording the metrics
+
+    Returns:
+        The instrumented tool
+    """
+    name = func.__name__
+    instruments = (
+        _instruments
+        if meter_provider is None
+        else ToolInstruments(meter_provider.get_meter(METER_NAME))
+    )
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+            key = _call_key(name, kwargs)
+            retry = _is_retry(key)
+            start = time.perf_counter()
+            try:
+                result = await func(*args, **kwargs)
+            except Exception:
+                _record(instruments, name, key, retry, start, None, "exception")
+                raise
+            _record(
+                instruments, name, key, retry, start, result, _response_status(result)
+            )
+            return result
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        key = _call_key(name, kwargs)
+        retry = _is_retry(key)
+        start = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        except Exception:
+            _record(instruments, name, key, retry, start, None, "exception")
+            raise
+        _record(instruments, name, key, retry, start, result, _response_status(result))
+        return result
+
+    return wrapper
+
+
+def build_meter_provider(export_interval_millis: int | None = None) -> MeterProvider:
+    """Build a MeterProvider exporting to Cloud Monitoring or local files.
+
+    With ``TELEMETRY_EXPORTER=local`` metrics are appended as JSON lines to
+    ``metrics.jsonl`` in the telemetry directory instead.
+
+    Args:
+        export_interval_millis: Export period, defaults to $METRICS_EXPORT_INTERVAL_MILLIS or 60s
+
+    Returns:
+        The meter provider
+    """
+    if export_interval_millis is None:
+        export_interval_millis = int(
+            os.environ.get("METRICS_EXPORT_INTERVAL_MILLIS", "60000")
+        )
+    exporter: MetricExporter
+    if use_local_telemetry():
+        os.makedirs(TELEMETRY_DIR, exist_ok=True)
+        exporter = ConsoleMetricExporter(
+            out=open(os.path.join(TELEMETRY_DIR, "metrics.jsonl"), "a"),
+            formatter=lambda metrics_data: metrics_data.to_json(indent=None) + "\n",
+        )
+    else:
+        exporter = CloudMonitoringMetricsExporter(
+            project_id=os.environ.get("GOOGLE_CLOUD_PROJECT"),
+            add_unique_identifier=True,
+        )
+    reader = PeriodicExportingMetricReader(
+        exporter, export_interval_millis=export_interval_millis
+    )
+    return MeterProvider(metric_readers=[reader])
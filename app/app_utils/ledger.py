@@ -0,0 +1,339 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import datetime
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+import click
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from app.app_utils import instrumentation
+
+# Sessions are recorded only when $LEDGER_DB is set; reports default to this
+LEDGER_DB = os.environ.get("LEDGER_DB", ".repo_reviver/ledger.db")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS codespaces (
+    session_id TEXT NOT NULL,
+    codespace_name TEXT NOT NULL,
+    machine_type TEXT,
+    created_at REAL NOT NULL,
+    deleted_at REAL,
+    PRIMARY KEY (session_id, codespace_name)
+);
+CREATE TABLE IF NOT EXISTS tool_calls (
+    session_id TEXT NOT NULL,
+    tool TEXT NOT NULL,
+    status TEXT,
+    duration_seconds REAL NOT NULL,
+    at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS model_calls (
+    session_id TEXT NOT NULL,
+    model TEXT,
+    prompt_tokens INTEGER NOT NULL,
+    response_tokens INTEGER NOT NULL,
+    at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS gcs_offloads (
+    session_id TEXT NOT NULL,
+    bytes INTEGER NOT NULL,
+    at REAL NOT NULL
+);
+"""
+
+REPORT_QUERY = """
+WITH sessions AS (
+    SELECT session_id FROM codespaces UNION
+    SELECT session_id FROM tool_calls UNION
+    SELECT session_id FROM model_calls UNION
+    SELECT session_id FROM gcs_offloads
+)
+SELECT
+    s.session_id,
+    (SELECT GROUP_CONCAT(DISTINCT machine_type) FROM codespaces c
+        WHERE c.session_id = s.session_id) AS machine_types,
+    (SELECT COUNT(*) FROM codespaces c WHERE c.session_id = s.session_id) AS codespaces,
+    (SELECT COUNT(*) FROM codespaces c
+        WHERE c.session_id = s.session_id AND c.deleted_at IS NULL) AS open_codespaces,
+    (SELECT COALESCE(SUM(COALESCE(deleted_at, :now) - created_at), 0) / 60.0 FROM codespaces c
+        WHERE c.session_id = s.session_id) AS codespace_minutes,
+    (SELECT COUNT(*) FROM tool_calls t WHERE t.session_id = s.session_id) AS tool_calls,
+    (SELECT COALESCE(SUM(duration_seconds), 0) FROM tool_calls t
+        WHERE t.session_id = s.session_id) AS tool_seconds,
+    (SELECT COUNT(*) FROM model_calls m WHERE m.session_id = s.session_id) AS model_calls,
+    (SELECT COALESCE(SUM(prompt_tokens), 0) FROM model_calls m
+        WHERE m.session_id = s.session_id) AS prompt_tokens,
+    (SELECT COALESCE(SUM(response_tokens), 0) FROM model_calls m
+        WHERE m.session_id = s.session_id) AS response_tokens,
+    (SELECT COALESCE(SUM(bytes), 0) FROM gcs_offloads g
+        WHERE g.session_id = s.session_id) AS gcs_bytes,
+    (SELECT MIN(at) FROM (
+        SELECT created_at AS at FROM codespaces c WHERE c.session_id = s.session_id
+        UNION ALL SELECT at FROM tool_calls t WHERE t.session_id = s.session_id
+        UNION ALL SELECT at FROM model_calls m WHERE m.session_id = s.session_id
+    )) AS started_at
+FROM sessions s
+"""
+
+REPORT_COLUMNS = [
+    "codespace_minutes",
+    "tool_calls",
+    "tool_seconds",
+    "model_calls",
+    "prompt_tokens",
+    "response_tokens",
+    "gcs_bytes",
+]
+
+
+class CostLedger:
+    """Per-session resource usage persisted in a local SQLite database."""
+
+    def __init__(self, path: str = LEDGER_DB):
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        # Opened lazily so importing the agent never touches the disk
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.executescript(SCHEMA)
+        return self._connection
+
+    def _execute(self, query: str, params: tuple | dict) -> None:
+        with self._lock:
+            connection = self._connect()
+            connection.execute(query, params)
+            connection.commit()
+
+    def codespace_created(
+        self, session_id: str, codespace_name: str, machine_type: str | None
+    ) -> None:
+        """Records the start of a codespace's billable lifetime."""
+        self._execute(
+            "INSERT OR IGNORE INTO codespaces VALUES (?, ?, ?, ?, NULL)",
+            (session_id, codespace_name, machine_type, time.time()),
+        )
+
+    def codespace_deleted(self, session_id: str, codespace_name: str) -> None:
+        """Records the end of a codespace's billable lifetime."""
+        self._execute(
+            "UPDATE codespaces SET deleted_at = ? "
+            "WHERE session_id = ? AND codespace_name = ? AND deleted_at IS NULL",
+            (time.time(), session_id, codespace_name),
+        )
+
+    def tool_call(
+        self, session_id: str, tool: str, status: str | None, duration_seconds: float
+    ) -> None:
+        """Records one tool call."""
+        self._execute(
+            "INSERT INTO tool_calls VALUES (?, ?, ?, ?, ?)",
+            (session_id, tool, status, duration_seconds, time.time()),
+        )
+
+    def model_call(
+        self,
+        session_id: str,
+        model: str | None,
+        prompt_tokens: int,
+        response_tokens: int,
+    ) -> None:
+        """Records the token usage of one model call."""
+        self._execute(
+            "INSERT INTO model_calls VALUES (?, ?, ?, ?, ?)",
+            (session_id, model, prompt_tokens, response_tokens, time.time()),
+        )
+
+    def gcs_offload(self, session_id: str, num_bytes: int) -> None:
+        """Records span payload bytes offloaded to GCS."""
+        self._execute(
+            "INSERT INTO gcs_offloads VALUES (?, ?, ?)",
+            (session_id, num_bytes, time.time()),
+        )
+
+    def report(self, sort_by: str = "codespace_minutes", limit: int = 20) -> list[dict]:
+        """Returns per-session totals, most expensive first.
+
+        Args:
+            sort_by: One of REPORT_COLUMNS
+            limit: Maximum number of sessions
+
+        Returns:
+            List of per-session rows; open codespaces are counted until now
+        """
+        if sort_by not in REPORT_COLUMNS:
+            raise ValueError(f"sort_by must be one of {REPORT_COLUMNS}")
+        with self._lock:
+            connection = self._connect()
+            connection.row_factory = sqlite3.Row
+            try:
+                rows = connection.execute(
+                    f"{REPORT_QUERY} ORDER BY {sort_by} DESC LIMIT :limit",
+                    {"now": time.time(), "limit": limit},
+                ).fetchall()
+            finally:
+                connection.row_factory = None
+        return [dict(row) for row in rows]
+
+
+class LedgerPlugin(BasePlugin):
+    """Records tool calls, codespace lifetimes and token usage in a CostLedger.
+
+    Tool durations come from the tool instrumentation, and the SQLite writes
+    run in worker threads so callbacks never block the event loop.
+    """
+
+    def __init__(self, ledger: CostLedger) -> None:
+        super().__init__(name="cost_ledger")
+        self.ledger = ledger
+
+    async def _finish_tool(
+        self, tool: BaseTool, tool_context: ToolContext, status: str
+    ) -> None:
+        call = instrumentation.last_tool_call(tool.name)
+        status, duration = call if call is not None else (status, 0.0)
+        await asyncio.to_thread(
+            self.ledger.tool_call, tool_context.session.id, tool.name, status, duration
+        )
+
+    async def after_tool_callback(
+        self,
+        *,
+        tool: BaseTool,
+        tool_args: dict[str, Any],
+        tool_context: ToolContext,
+        result: dict,
+    ) -> dict | None:
+        status = result.get("status") if isinstance(result, dict) else None
+        await self._finish_tool(tool, tool_context, status or "success")
+        if status != "success":
+            return None
+        session_id = tool_context.session.id
+        if tool.name == "create_codespace" and not result.get("resumed"):
+            await asyncio.to_thread(
+                self.ledger.codespace_created,
+                session_id,
+                result["codespace_name"],
+                result.get("machine_type"),
+            )
+        elif tool.name == "delete_codespace":
+            await asyncio.to_thread(
+                self.ledger.codespace_deleted, session_id, tool_args["codespace_name"]
+            )
+        return None
+
+    async def on_tool_error_callback(
+        self,
+        *,
+        tool: BaseTool,
+        tool_args: dict[str, Any],
+        tool_context: ToolContext,
+        error: Exception,
+    ) -> dict | None:
+        await self._finish_tool(tool, tool_context, "exception")
+        return None
+
+    async def after_model_callback(
+        self, *, callback_context: CallbackContext, llm_response: LlmResponse
+    ) -> LlmResponse | None:
+        usage = llm_response.usage_metadata
+        # Streamed chunks repeat the usage; count the final response only
+        if usage is None or llm_response.partial:
+            return None
+        await asyncio.to_thread(
+            self.ledger.model_call,
+            callback_context.session.id,
+            llm_response.model_version,
+            usage.prompt_token_count or 0,
+            usage.candidates_token_count or 0,
+        )
+        return None
+
+
+def ledger_plugin_from_env() -> LedgerPlugin | None:
+    """Returns a ledger plugin recording to $LEDGER_DB, if it is set."""
+    ledger_db = os.environ.get("LEDGER_DB")
+    if not ledger_db:
+        return None
+    return LedgerPlugin(CostLedger(ledger_db))
+
+
+def _format_bytes(num_bytes: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if num_bytes < 1024:
+            return f"{num_bytes:.0f}{unit}"
+        num_bytes /= 1024
+    return f"{num_bytes:.1f}TB"
+
+
+@click.command()
+@click.option("--ledger-db", default=LEDGER_DB, help="Ledger SQLite database")
+@click.option(
+    "--sort-by",
+    type=click.Choice(REPORT_COLUMNS),
+    default="codespace_minutes",
+    help="Column to rank sessions by",
+)
+@click.option("--limit", type=int, default=20, help="Number of sessions to show")
+@click.option("--json-output", is_flag=True, default=False, help="Print rows as JSON")
+def ledger_report_command(
+    ledger_db: str, sort_by: str, limit: int, json_output: bool
+) -> None:
+    """Report the most expensive revival sessions."""
+    if not os.path.exists(ledger_db):
+        click.echo(f"No ledger found at {ledger_db}")
+        return
+    rows = CostLedger(ledger_db).report(sort_by=sort_by, limit=limit)
+    if json_output:
+        click.echo(json.dumps(rows, indent=2))
+        return
+    click.echo(
+        f"{'session':<38} {'started':<16} {'cs min':>8} {'tools':>6} {'tool s':>8} "
+        f"{'prompt tok':>11} {'resp tok':>9} {'gcs':>7}"
+    )
+    for row in rows:
+        started = (
+            datetime.datetime.fromtimestamp(row["started_at"]).strftime(
+                "%Y-%m-%d %H:%M"
+            )
+            if row["started_at"]
+            else "-"
+        )
+        open_marker = "*" if row["open_codespaces"] else " "
+        click.echo(
+            f"{row['session_id']:<38} {started:<16} "
+            f"{row['codespace_minutes']:>7.1f}{open_marker} {row['tool_calls']:>6} "
+            f"{row['tool_seconds']:>8.1f} {row['prompt_tokens']:>11} "
+            f"{row['response_tokens']:>9} {_format_bytes(row['gcs_bytes']):>7}"
+        )
+    click.echo("* codespace still open, counted until now")
+
+
+if __name__ == "__main__":
+    ledger_report_command()
@@ -0,0 +1,265 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import glob
+import gzip
+import json
+import logging
+import os
+import threading
+import time
+from collections.abc import Iterator, Sequence
+from typing import Any
+
+import click
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+
+from app.app_utils.tracing import span_to_dict
+
+TELEMETRY_DIR = os.environ.get("TELEMETRY_DIR", ".repo_reviver/telemetry")
+
+# ADK names tool spans "execute_tool <name>" and sets this attribute
+TOOL_NAME_ATTRIBUTE = "gen_ai.tool.name"
+
+
+def use_local_telemetry() -> bool:
+    """Whether $TELEMETRY_EXPORTER selects local files instead of Google Cloud."""
+    return os.environ.get("TELEMETRY_EXPORTER", "cloud").lower() == "local"
+
+
+class LocalJsonlSpanExporter(SpanExporter):
+    """
+    Writes spans as gzip-compressed JSONL files on local disk.
+
+    Spans are encoded with the same ``span_to_dict`` used for Cloud Logging,
+    plus a ``duration_ms`` field. Each ``export`` call appends its whole batch
+    as one gzip member, so the exporter is cheap behind a
+    ``BatchSpanProcessor``. Files rotate at ``max_file_bytes`` and only the
+    newest ``max_files`` are kept.
+    """
+
+    def __init__(
+        self,
+        directory: str = TELEMETRY_DIR,
+        max_file_bytes: int = 50 * 1024 * 1024,
+        max_files: int = 20,
+    ) -> None:
+        """
+        Initialize the exporter.
+
+        :param directory: Directory receiving the span files
+        :param max_file_bytes: Compressed size at which a new file is started
+        :param max_files: Number of span files kept on disk
+        """
+        self.directory = directory
+        self.max_file_bytes = max_file_bytes
+        self.max_files = max_files
+        self._lock = threading.Lock()
+        self._path: str | None = None
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        """
+        Append a batch of spans to the current file.
+
+        :param spans: Spans to export
+        :return: The export result
+        """
+        lines = []
+        for span in spans:
+            span_dict = span_to_dict(span)
+            if span.start_time is not None and span.end_time is not None:
+                span_dict["duration_ms"] = (span.end_time - span.start_time) / 1e6
+            lines.append(json.dumps(span_dict, default=str))
+        if not lines:
+            return SpanExportResult.SUCCESS
+        data = gzip.compress(("\n".join(lines) + "\n").encode(), compresslevel=1)
+        try:
+            with self._lock:
+                path = self._current_path()
+                with open(path, "ab") as f:
+                    f.write(data)
+        except OSError:
+            logging.exception("Failed to write spans to local telemetry file")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def _current_path(self) -> str:
+        if self._path is None or (
+            os.path.exists(self._path)
+            and os.path.getsize(self._path) >= self.max_file_bytes
+        ):
+            self._sequence += 1
+            self._path = os.path.join(
+                self.directory,
+                f"spans-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{self._sequence}.jsonl.gz",
+            )
+            self._remove_old_files()
+        return self._path
+
+    def _remove_old_files(self) -> None:
+        files = sorted(span_files(self.directory), key=os.path.getmtime)
+        # Keep room for the file about to be created
+        for path in files[: max(len(files) - self.max_files + 1, 0)]:
+            os.remove(path)
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return True
+
+
+class LocalStructLogger:
+    """Minimal stand-in for a Cloud Logging logger that appends JSONL locally."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+
+    def log_struct(self, info: dict[str, Any], **kwargs: Any) -> None:
+        self._append([json.dumps({**kwargs, "jsonPayload": info}, default=str)])
+
+    def batch(self) -> "LocalLogBatch":
+        return LocalLogBatch(self)
+
+    def _append(self, lines: list[str]) -> None:
+        with self._lock, open(self.path, "a") as f:
+            f.write("".join(line + "\n" for line in lines))
+
+
+class LocalLogBatch:
+    """Collects entries for a ``LocalStructLogger`` and appends them in one write."""
+
+    def __init__(self, logger: LocalStructLogger) -> None:
+        self.logger = logger
+        self.lines: list[str] = []
+
+    def log_struct(self, info: dict[str, Any], **kwargs: Any) -> None:
+        self.lines.append(json.dumps({**kwargs, "jsonPayload": info}, default=str))
+
+    def commit(self) -> None:
+        self.logger._append(self.lines)
+        self.lines = []
+
+
+def span_files(directory: str) -> list[str]:
+    """List the span files in a telemetry directory."""
+    return glob.glob(os.path.join(directory, "spans-*.jsonl.gz"))
+
+
+def iter_spans(directory: str = TELEMETRY_DIR) -> Iterator[dict[str, Any]]:
+    """
+    Read every span written to a telemetry directory, oldest file first.
+
+    :param directory: The telemetry directory
+    :return: Iterator over span dictionaries
+    """
+    for path in sorted(span_files(directory), key=os.path.getmtime):
+        try:
+            with gzip.open(path, "rt") as f:
+                for line in f:
+                    if line.strip():
+                        yield json.loads(line)
+        except (EOFError, gzip.BadGzipFile):
+            # A file still being written can end with a partial member
+            logging.warning(f"Skipping truncated telemetry file {path}")
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    index = min(round(fraction * (len(values) - 1)), len(values) - 1)
+    return values[index]
+
+
+def latency_report(
+    spans: Iterator[dict[str, Any]], all_spans: bool = False
+) -> list[dict[str, Any]]:
+    """
+    Summarize span latency per tool (or per span name).
+
+    :param spans: Span dictionaries as written by ``LocalJsonlSpanExporter``
+    :param all_spans: Group every span by name instead of only tool spans
+    :return: Rows with count, errors and latency percentiles, slowest total first
+    """
+    durations: dict[str, list[float]] = {}
+    errors: dict[str, int] = {}
+    for span in spans:
+        attributes = span.get("attributes") or {}
+        name = attributes.get(TOOL_NAME_ATTRIBUTE)
+        if name is None:
+            if not all_spans:
+                continue
+            name = span["name"]
+        if "duration_ms" not in span:
+            continue
+        durations.setdefault(name, []).append(span["duration_ms"])
+        if (span.get("status") or {}).get("status_code") == "ERROR":
+            errors[name] = errors.get(name, 0) + 1
+
+    rows = []
+    for name, values in durations.items():
+        values.sort()
+        rows.append(
+            {
+                "name": name,
+                "count": len(values),
+                "errors": errors.get(name, 0),
+                "p50_ms": round(_percentile(values, 0.5), 1),
+                "p95_ms": round(_percentile(values, 0.95), 1),
+                "max_ms": round(values[-1], 1),
+                "total_ms": round(sum(values), 1),
+            }
+        )
+    return sorted(rows, key=lambda row: -row["total_ms"])
+
+
+@click.command()
+@click.option(
+    "--telemetry-dir",
+    default=TELEMETRY_DIR,
+    help="Directory written by the local span exporter",
+)
+@click.option(
+    "--all-spans",
+    is_flag=True,
+    default=False,
+    help="Report every span name instead of only tool calls",
+)
+@click.option("--json-output", is_flag=True, default=False, help="Print rows as JSON")
+def tool_latency_command(
+    telemetry_dir: str, all_spans: bool, json_output: bool
+) -> None:
+    """Report per-tool latency from local telemetry files."""
+    rows = latency_report(iter_spans(telemetry_dir), all_spans=all_spans)
+    if json_output:
+        click.echo(json.dumps(rows, indent=2))
+        return
+    if not rows:
+        click.echo(f"No spans found in {telemetry_dir}")
+        return
+    click.echo(
+        f"{'name':<40} {'count':>7} {'errors':>7} {'p50 ms':>10} {'p95 ms':>10} {'max ms':>10}"
+    )
+    for row in rows:
+        click.echo(
+            f"{row['name']:<40} {row['count']:>7} {row['errors']:>7} "
+            f"{row['p50_ms']:>10} {row['p95_ms']:>10} {row['max_ms']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    tool_latency_command()
@@ -0,0 +1,230 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import logging
+import threading
+import time
+from typing import Any
+
+from google.api_core import exceptions
+from google.cloud import logging as google_cloud_logging
+
+DROP_NEWEST = "drop_newest"
+DROP_OLDEST = "drop_oldest"
+BLOCK = "block"
+
+
+class BatchedLogWriter:
+    """
+    Buffers structured log entries and writes them to Cloud Logging in batches.
+
+    Entries are queued by ``write`` and committed by a background thread with a
+    single ``entries.write`` call per batch, once ``max_batch_entries`` or
+    ``max_batch_bytes`` is reached or ``flush_interval`` seconds have passed.
+    When the queue is full (the sink is slower than the producers) the
+    ``overflow_policy`` decides between dropping the new entry, dropping the
+    oldest queued entry, or blocking the caller for up to ``block_timeout``.
+    """
+
+    def __init__(
+        self,
+        logger: google_cloud_logging.Logger,
+        max_batch_entries: int = 500,
+        max_batch_bytes: int = 5 * 1024 * 1024,
+        flush_interval: float = 2.0,
+        max_queue_entries: int = 10_000,
+        overflow_policy: str = DROP_NEWEST,
+        block_timeout: float = 1.0,
+    ) -> None:
+        """
+        Initialize the writer and start its background flush thread.
+
+        :param logger: Cloud Logging logger to write through
+        :param max_batch_entries: Entry count that triggers a flush
+        :param max_batch_bytes: Approximate payload size that triggers a flush
+        :param flush_interval: Maximum seconds an entry waits before being flushed
+        :param max_queue_entries: Queue capacity before the overflow policy applies
+        :param overflow_policy: One of ``drop_newest``, ``drop_oldest`` or ``block``
+        :param block_timeout: Seconds to wait for space with the ``block`` policy
+        """
+        if overflow_policy not in (DROP_NEWEST, DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unknown overflow policy: {overflow_policy}")
+        self.logger = logger
+        self.max_batch_entries = max_batch_entries
+        self.max_batch_bytes = max_batch_bytes
+        self.flush_interval = flush_interval
+        self.max_queue_entries = max_queue_entries
+        self.overflow_policy = overflow_policy
+        self.block_timeout = block_timeout
+
+        self.stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "batches": 0,
+            "failed_batches": 0,
+        }
+        self._queue: collections.deque[tuple[dict[str, Any], dict[str, Any], int]] = (
+            collections.deque()
+        )
+        self._queued_bytes = 0
+        self._flush_requested = False
+        self._in_flight = 0
+        self._closed = False
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(
+            target=self._run, name="BatchedLogWriter", daemon=True
+        )
+        self._thread.start()
+
+    def write(self, info: dict[str, Any], size: int = 1024, **kwargs: Any) -> bool:
+        """
+        Queue a structured entry without waiting for the network.
+
+        :param info: The structured payload
+        :param size: Approximate payload size in bytes, used for batch sizing
+        :param kwargs: Entry fields such as ``labels`` and ``severity``
+        :return: Whether the entry was accepted
+        """
+        with self._condition:
+            if self._closed:
+                self.stats["dropped"] += 1
+                return False
+            if len(self._queue) >= self.max_queue_entries:
+                if self.overflow_policy == DROP_NEWEST:
+                    self.stats["dropped"] += 1
+                    return False
+                if self.overflow_policy == DROP_OLDEST:
+                    _, _, dropped_size = self._queue.popleft()
+                    self._queued_bytes -= dropped_size
+                    self.stats["dropped"] += 1
+                elif not self._condition.wait_for(
+                    lambda: len(self._queue) < self.max_queue_entries or self._closed,
+                    timeout=self.block_timeout,
+                ):
+                    self.stats["dropped"] += 1
+                    return False
+            self._queue.append((info, kwargs, size))
+            self._queued_bytes += size
+            self.stats["enqueued"] += 1
+            if self._batch_ready():
+                self._condition.notify_all()
+        return True
+
+    def flush(self, timeout: float | None = None) -> bool:
+        """
+        Write all queued entries and wait until they are committed.
+
+        :param timeout: Maximum seconds to wait
+        :return: Whether the queue was drained in time
+        """
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: not self._queue and not self._in_flight, timeout=timeout
+            )
+
+    def shutdown(self, timeout: float | None = 10.0) -> None:
+        """Flush remaining entries and stop the background thread."""
+        self.flush(timeout=timeout)
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout=timeout)
+
+    def _batch_ready(self) -> bool:
+        return (
+            len(self._queue) >= self.max_batch_entries
+            or self._queued_bytes >= self.max_batch_bytes
+        )
+
+    def _take_batch(self) -> list[tuple[dict[str, Any], dict[str, Any], int]]:
+        batch: list[tuple[dict[str, Any], dict[str, Any], int]] = []
+        batch_bytes = 0
+        while self._queue and len(batch) < self.max_batch_entries:
+            if batch and batch_bytes + self._queue[0][2] > self.max_batch_bytes:
+                break
+            entry = self._queue.popleft()
+            batch.append(entry)
+            batch_bytes += entry[2]
+        self._queued_bytes -= batch_bytes
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            with self._condition:
+                deadline = time.monotonic() + self.flush_interval
+                while not (
+                    self._closed or self._flush_requested or self._batch_ready()
+                ):
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._condition.wait(remaining)
+                if self._closed and not self._queue:
+                    return
+                batch = self._take_batch()
+                if not self._queue:
+                    self._flush_requested = False
+                self._in_flight = len(batch)
+                # Producers blocked on a full queue can continue now
+                self._condition.notify_all()
+
+            if batch:
+                self._commit(batch)
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+
+    def _commit(self, batch: list[tuple[dict[str, Any], dict[str, Any], int]]) -> None:
+        try:
+            logger_batch = self.logger.batch()
+            for info, kwargs, _ in batch:
+                logger_batch.log_struct(info, **kwargs)
+            # Without partial success a rejected batch writes nothing, so the
+            # entry-by-entry retry below cannot duplicate entries
+            logger_batch.commit(partial_success=False)
+            with self._condition:
+                self.stats["written"] += len(batch)
+                self.stats["batches"] += 1
+        except exceptions.InvalidArgument:
+            # One malformed entry rejects the whole batch; keep the others
+            logging.warning(
+                f"Batch of {len(batch)} log entries rejected, writing them one by one"
+            )
+            with self._condition:
+                self.stats["failed_batches"] += 1
+            self._commit_each(batch)
+        except Exception:
+            logging.exception(f"Failed to write {len(batch)} log entries")
+            with self._condition:
+                self.stats["dropped"] += len(batch)
+                self.stats["failed_batches"] += 1
+
+    def _commit_each(
+        self, batch: list[tuple[dict[str, Any], dict[str, Any], int]]
+    ) -> None:
+        written = 0
+        for info, kwargs, _ in batch:
+            try:
+                self.logger.log_struct(info, **kwargs)
+                written += 1
+            except Exception as e:
+                logging.warning(f"Dropping invalid log entry: {e}")
+        with self._condition:
+            self.stats["written"] += written
+            self.stats["dropped"] += len(batch) - written
@@ -0,0 +1,154 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import cProfile
+import io
+import logging
+import marshal
+import os
+import pstats
+import time
+from typing import Any, cast
+
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.plugins.base_plugin import BasePlugin
+from google.genai import types
+from opentelemetry import trace
+
+# RunConfig.custom_metadata key set per request by
+# AgentEngineApp.(async_)stream_query(profile=True); the run config reaches the
+# invocation also when the runner drives it from another thread
+PROFILE_METADATA_KEY = "repo_reviver_profile"
+
+# Functions listed in the text summary saved next to the profile
+SUMMARY_FUNCTIONS = 40
+
+# A profile still active after this long belongs to an invocation that failed
+# before its after-run callback and is discarded
+STALE_PROFILE_SECONDS = 3600
+
+
+def request_profile(run_config: dict[str, Any] | None) -> dict[str, Any]:
+    """Returns a copy of a run config dict requesting a profile."""
+    run_config = dict(run_config or {})
+    run_config["custom_metadata"] = {
+        **(run_config.get("custom_metadata") or {}),
+        PROFILE_METADATA_KEY: True,
+    }
+    return run_config
+
+
+def profiling_enabled(invocation_context: InvocationContext) -> bool:
+    """Whether the invocation should be profiled."""
+    run_config = invocation_context.run_config
+    metadata = (run_config.custom_metadata if run_config else None) or {}
+    return bool(metadata.get(PROFILE_METADATA_KEY)) or os.environ.get(
+        "REPO_REVIVER_PROFILE", "False"
+    ).lower() in ("true", "1", "yes")
+
+
+class ProfilingPlugin(BasePlugin):
+    """
+    Captures a cProfile profile of an invocation and saves it as artifacts.
+
+    Enabled per request with ``(async_)stream_query(..., profile=True)`` or for
+    every invocation with $REPO_REVIVER_PROFILE. The raw profile
+    (``profile-<invocation_id>.prof``, loadable with ``pstats`` or snakeviz)
+    and a text summary sorted by cumulative time are saved through the
+    invocation's artifact service, and their names are set on the
+    ``invocation`` span. When disabled, each invocation costs one flag check.
+
+    cProfile records everything on the event loop thread, so invocations
+    running concurrently with a profiled one appear in its profile; only one
+    invocation per process is profiled at a time.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(name="profiling")
+        # (invocation ID, profiler, start time) of the profile being captured
+        self._active: tuple[str, cProfile.Profile, float] | None = None
+
+    async def before_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> types.Content | None:
+        if not profiling_enabled(invocation_context):
+            return None
+        if self._active is not None:
+            invocation_id, stale_profiler, started = self._active
+            if time.monotonic() - started < STALE_PROFILE_SECONDS:
+                logging.warning(
+                    f"Skipping profile of invocation {invocation_context.invocation_id}: "
+                    f"invocation {invocation_id} is being profiled"
+                )
+                return None
+            stale_profiler.disable()
+        profiler = cProfile.Profile()
+        self._active = (invocation_context.invocation_id, profiler, time.monotonic())
+        profiler.enable()
+        return None
+
+    async def after_run_callback(
+        self, *, invocation_context: InvocationContext
+    ) -> None:
+        if self._active is None or self._active[0] != invocation_context.invocation_id:
+            return
+        profiler = self._active[1]
+        profiler.disable()
+        self._active = None
+        try:
+            await self._save(profiler, invocation_context)
+        except Exception:
+            logging.exception("Failed to save invocation profile")
+
+    async def _save(
+        self, profiler: cProfile.Profile, invocation_context: InvocationContext
+    ) -> None:
+        span = trace.get_current_span()
+        if invocation_context.artifact_service is None:
+            logging.warning("No artifact service configured, profile discarded")
+            return
+
+        profiler.create_stats()
+        summary = io.StringIO()
+        stats = pstats.Stats(profiler, stream=summary)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(SUMMARY_FUNCTIONS)
+
+        base_name = f"profile-{invocation_context.invocation_id}"
+        artifacts = {
+            f"{base_name}.prof": types.Part.from_bytes(
+                # The stats table is missing from the pstats stubs
+                data=marshal.dumps(cast(Any, stats).stats),
+                mime_type="application/octet-stream",
+            ),
+            f"{base_name}.txt": types.Part.from_text(text=summary.getvalue()),
+        }
+        for filename, artifact in artifacts.items():
+            version = await invocation_context.artifact_service.save_artifact(
+                app_name=invocation_context.app_name,
+                user_id=invocation_context.user_id,
+                session_id=invocation_context.session.id,
+                filename=filename,
+                artifact=artifact,
+            )
+            attribute = "profile" if filename.endswith(".prof") else "profile_summary"
+            span.set_attribute(f"repo_reviver.{attribute}.artifact", filename)
+            span.set_attribute(f"repo_reviver.{attribute}.version", version)
+        span.set_attribute(
+            "repo_reviver.profile.total_seconds",
+            round(stats.get_stats_profile().total_tt, 3),
+        )
+        logging.info(
+            f"Saved profile of invocation {invocation_context.invocation_id} "
+            f"as artifact {base_name}.prof"
+        )
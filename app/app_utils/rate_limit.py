@@ -0,0 +1,402 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import itertools
+import json
+import logging
+import os
+import re
+import sqlite3
+import subprocess
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from typing import Any, Protocol, TypeVar
+
+T = TypeVar("T")
+
+# Sustained GitHub API operations per minute and burst size, shared by all
+# sessions. GitHub's secondary limits start well above a request per second
+# for reads but are far lower for content creation, so the default is modest.
+# 0 disables the governor, e.g. when gh is faked or replayed.
+RATE_PER_MINUTE = float(os.environ.get("GH_RATE_LIMIT_PER_MINUTE", "60"))
+BURST = float(os.environ.get("GH_RATE_LIMIT_BURST", "10"))
+
+# SQLite file shared by the workers of one host; unset keeps the bucket in-process
+RATE_LIMIT_DB = os.environ.get("GH_RATE_LIMIT_DB")
+
+# How often `gh api rate_limit` is consulted (0 disables), and how many core
+# requests are held back before pausing until the limit resets
+REFRESH_SECONDS = float(os.environ.get("GH_RATE_LIMIT_REFRESH_SECONDS", "60"))
+RESERVE = int(os.environ.get("GH_RATE_LIMIT_RESERVE", "50"))
+
+# Retries of a rate-limited gh command, with a growing pause shared by all callers
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 5.0
+MAX_BACKOFF_SECONDS = 60.0
+
+_RATE_LIMITED_RE = re.compile(
+    r"rate limit|HTTP 429|abuse detection|too many requests", re.IGNORECASE
+)
+# Errors gh reports itself, e.g. "error getting codespace info: HTTP 403: ..."
+_GH_ERROR_LINE_RE = re.compile(r"^error [\w ]+: ")
+# gh commands inside codespace scripts that call the GitHub API
+_GH_API_COMMAND_RE = re.compile(
+    r"\bgh\s+(api|pr|issue|repo|release|run|workflow|gist|label)\b"
+)
+
+
+def is_rate_limited(message: str | None) -> bool:
+    """Whether gh output reports a primary or secondary rate limit."""
+    return bool(message and _RATE_LIMITED_RE.search(message))
+
+
+def command_rate_limited(error: subprocess.CalledProcessError) -> bool:
+    """Whether a failed gh command reports a rate limit anywhere in its output."""
+    return is_rate_limited(f"{error.stderr or ''}{error.stdout or ''}")
+
+
+def ssh_rate_limited(error: subprocess.CalledProcessError) -> bool:
+    """Whether `gh codespace ssh` itself, not the remote script, was rate limited.
+
+    The output of an ssh call is mostly the remote script's (e.g. a test suite
+    exercising its own rate limiter), so only gh's own error lines count.
+    """
+    return any(
+        is_rate_limited(line)
+        for line in (error.stderr or "").splitlines()
+        if _GH_ERROR_LINE_RE.match(line)
+    )
+
+
+def count_gh_api_calls(commands: str) -> int:
+    """Counts gh commands calling the GitHub API in a shell script."""
+    return len(_GH_API_COMMAND_RE.findall(commands))
+
+
+class TokenBucket(Protocol):
+    def take(self, cost: float) -> float:
+        """Takes ``cost`` tokens, or returns the seconds to wait before retrying.
+
+        A cost above the capacity could never be covered, so it takes a full
+        bucket instead.
+        """
+        ...
+
+    def pause(self, seconds: float) -> None:
+        """Withholds all tokens for ``seconds``."""
+        ...
+
+
+class InMemoryTokenBucket:
+    """Token bucket shared by the threads of one process."""
+
+    def __init__(
+        self,
+        rate_per_second: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self.updated = clock()
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def take(self, cost: float) -> float:
+        cost = min(cost, self.capacity)
+        with self._lock:
+            now = self.clock()
+            if now < self.paused_until:
+                return self.paused_until - now
+            self.tokens = min(
+                self.capacity, self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            if self.tokens >= cost:
+                self.tokens -= cost
+                return 0.0
+            return (cost - self.tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self.paused_until = max(self.paused_until, self.clock() + seconds)
+            self.tokens = 0.0
+
+
+class SqliteTokenBucket:
+    """
+    Token bucket in a SQLite file, shared by the worker processes of a host.
+
+    Each take is one ``BEGIN IMMEDIATE`` transaction, so the database lock
+    serializes updates across processes. Uses wall-clock time.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        rate_per_second: float,
+        capacity: float,
+        name: str = "github",
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = path
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.name = name
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._connection = sqlite3.connect(
+                self.path, timeout=30, isolation_level=None, check_same_thread=False
+            )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (name TEXT PRIMARY KEY, "
+                "tokens REAL NOT NULL, updated REAL NOT NULL, paused_until REAL NOT NULL)"
+            )
+        return self._connection
+
+    def _transaction(
+        self, update: Callable[[float, float, float, float], tuple]
+    ) -> Any:
+        with self._lock:
+            connection = self._connect()
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                now = self.clock()
+                row = connection.execute(
+                    "SELECT tokens, updated, paused_until FROM buckets WHERE name = ?",
+                    (self.name,),
+                ).fetchone()
+                tokens, updated, paused_until = row or (self.capacity, now, 0.0)
+                tokens, paused_until, result = update(
+                    now, tokens, updated, paused_until
+                )
+                connection.execute(
+                    "INSERT OR REPLACE INTO buckets VALUES (?, ?, ?, ?)",
+                    (self.name, tokens, now, paused_until),
+                )
+                connection.execute("COMMIT")
+                return result
+            except BaseException:
+                connection.execute("ROLLBACK")
+                raise
+
+    def take(self, cost: float) -> float:
+        cost = min(cost, self.capacity)
+
+        def update(
+            now: float, tokens: float, updated: float, paused_until: float
+        ) -> tuple[float, float, float]:
+            if now < paused_until:
+                return tokens, paused_until, paused_until - now
+            tokens = min(self.capacity, tokens + (now - updated) * self.rate)
+            if tokens >= cost:
+                return tokens - cost, paused_until, 0.0
+            return tokens, paused_until, (cost - tokens) / self.rate
+
+        return self._transaction(update)
+
+    def pause(self, seconds: float) -> None:
+        self._transaction(
+            lambda now, tokens, updated, paused_until: (
+                0.0,
+                max(paused_until, now + seconds),
+                None,
+            )
+        )
+
+
+def read_gh_rate_limit() -> dict[str, Any] | None:
+    """Returns the core REST limit from `gh api rate_limit`, which is not counted."""
+    try:
+        result = subprocess.run(
+            ["gh", "api", "rate_limit"],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=30,
+        )
+        return json.loads(result.stdout)["resources"]["core"]
+    except Exception:
+        return None
+
+
+class GitHubGovernor:
+    """
+    Spaces out GitHub API operations of all sessions with a token bucket.
+
+    Callers are served first come, first served: each waits for the callers
+    ahead of it, then for enough tokens. A rate-limited gh command pauses the
+    bucket for everyone with a growing backoff and is retried when safe, so
+    load beyond the limit queues up instead of failing. The core limit read
+    from `gh api rate_limit` pauses the bucket until its reset when it is
+    nearly exhausted.
+    """
+
+    def __init__(
+        self,
+        bucket: TokenBucket | None,
+        refresh_seconds: float = REFRESH_SECONDS,
+        reserve: int = RESERVE,
+        rate_limit_reader: Callable[[], dict[str, Any] | None] = read_gh_rate_limit,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.bucket = bucket
+        self.refresh_seconds = refresh_seconds
+        self.reserve = reserve
+        self.rate_limit_reader = rate_limit_reader
+        self.sleep = sleep
+        self._condition = threading.Condition()
+        self._tickets = itertools.count()
+        self._queue: deque[int] = deque()
+        self._refresh_lock = threading.Lock()
+        self._next_refresh = 0.0
+        self._consecutive_limits = 0
+        self.stats = {
+            "calls": 0,
+            "waited_seconds": 0.0,
+            "max_queue": 0,
+            "rate_limited": 0,
+            "retries": 0,
+        }
+
+    def _refresh(self) -> None:
+        """Pauses until the reset when few core requests remain."""
+        if not self.refresh_seconds or time.monotonic() < self._next_refresh:
+            return
+        if not self._refresh_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_refresh = time.monotonic() + self.refresh_seconds
+            core = self.rate_limit_reader()
+            if (
+                self.bucket is not None
+                and core
+                and core.get("remaining", self.reserve + 1) <= self.reserve
+            ):
+                seconds = max(0.0, core["reset"] - time.time())
+                logging.warning(
+                    f"GitHub core rate limit at {core['remaining']}, "
+                    f"pausing gh calls for {seconds:.0f}s"
+                )
+                self.bucket.pause(seconds)
+        finally:
+            self._refresh_lock.release()
+
+    def acquire(self, cost: float = 1) -> float:
+        """Blocks until this caller's turn and ``cost`` tokens; returns seconds waited."""
+        if cost <= 0 or self.bucket is None:
+            return 0.0
+        self._refresh()
+        start = time.monotonic()
+        with self._condition:
+            ticket = next(self._tickets)
+            self._queue.append(ticket)
+            self.stats["max_queue"] = max(self.stats["max_queue"], len(self._queue))
+            while self._queue[0] != ticket:
+                self._condition.wait()
+        try:
+            while (wait := self.bucket.take(cost)) > 0:
+                self.sleep(wait)
+        finally:
+            with self._condition:
+                self._queue.popleft()
+                self._condition.notify_all()
+        waited = time.monotonic() - start
+        with self._condition:
+            self.stats["calls"] += 1
+            self.stats["waited_seconds"] += waited
+        return waited
+
+    def rate_limited(self) -> None:
+        """Pauses all callers after GitHub rejected a request."""
+        with self._condition:
+            self._consecutive_limits += 1
+            self.stats["rate_limited"] += 1
+            backoff = min(
+                MAX_BACKOFF_SECONDS,
+                BACKOFF_SECONDS * 2 ** (self._consecutive_limits - 1),
+            )
+        logging.warning(f"GitHub rate limit hit, pausing gh calls for {backoff:.0f}s")
+        if self.bucket is not None:
+            self.bucket.pause(backoff)
+
+    def call(
+        self,
+        fn: Callable[[], T],
+        cost: float = 1,
+        retry: bool = True,
+        rate_limited: Callable[
+            [subprocess.CalledProcessError], bool
+        ] = command_rate_limited,
+    ) -> T:
+        """Runs a gh command under the governor.
+
+        Args:
+            fn: Runs the command, raising CalledProcessError on failure
+            cost: GitHub API operations the command performs
+            retry: Whether the command may be re-run after a rate limit (False
+                for scripts that may have partially completed)
+            rate_limited: Whether a failure was caused by GitHub's rate limit
+                (`ssh_rate_limited` for commands run in a codespace)
+
+        Returns:
+            The result of ``fn``
+        """
+        for attempt in range(MAX_RETRIES + 1):
+            self.acquire(cost)
+            try:
+                result = fn()
+            except subprocess.CalledProcessError as e:
+                if not rate_limited(e):
+                    raise
+                self.rate_limited()
+                if not retry or attempt == MAX_RETRIES:
+                    raise
+                with self._condition:
+                    self.stats["retries"] += 1
+                continue
+            with self._condition:
+                self._consecutive_limits = 0
+            return result
+        raise AssertionError("unreachable")
+
+
+_governor: GitHubGovernor | None = None
+_governor_lock = threading.Lock()
+
+
+def get_github_governor() -> GitHubGovernor:
+    """Returns the process-wide governor, backed by $GH_RATE_LIMIT_DB if set."""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            rate = RATE_PER_MINUTE / 60
+            bucket: TokenBucket | None = None
+            if rate <= 0:
+                logging.info("GitHub rate-limit governor disabled")
+            elif RATE_LIMIT_DB:
+                bucket = SqliteTokenBucket(RATE_LIMIT_DB, rate, BURST)
+            else:
+                bucket = InMemoryTokenBucket(rate, BURST)
+            _governor = GitHubGovernor(bucket)
+        return _governor
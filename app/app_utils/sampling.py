@@ -0,0 +1,263 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import collections
+import fnmatch
+import os
+import threading
+import time
+from typing import Any
+
+from opentelemetry.context import Context
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.trace import StatusCode
+
+# Attributes holding full prompts and responses, truncated on kept traces
+DEFAULT_TRUNCATION_RULES = {
+    "gcp.vertex.agent.llm_request": 16 * 1024,
+    "gcp.vertex.agent.llm_response": 16 * 1024,
+    "gcp.vertex.agent.tool_call_args": 4 * 1024,
+    "gcp.vertex.agent.tool_response": 4 * 1024,
+}
+
+TRUNCATION_SUFFIX = "...[truncated]"
+
+
+def parse_truncation_rules(value: str) -> dict[str, int]:
+    """
+    Parse truncation rules of the form ``pattern=max_chars,pattern=max_chars``.
+
+    :param value: The rules, patterns may use shell-style wildcards
+    :return: Mapping of attribute pattern to maximum string length
+    """
+    rules = {}
+    for rule in value.split(","):
+        if not rule.strip():
+            continue
+        pattern, _, limit = rule.partition("=")
+        rules[pattern.strip()] = int(limit)
+    return rules
+
+
+class TailSamplingSpanProcessor(SpanProcessor):
+    """
+    Buffers spans per trace and decides whether to export a trace once it ends.
+
+    Traces containing an error, or whose root span is slower than
+    ``slow_threshold`` seconds, are always kept; other traces are kept with
+    probability ``sample_rate``, decided deterministically from the trace ID.
+    Kept spans have long string attributes truncated according to
+    ``truncation_rules`` before being passed to the ``delegate`` processor.
+    Traces whose root never ends locally are decided after ``decision_wait``
+    seconds, or when more than ``max_buffered_traces`` are pending.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        sample_rate: float = 0.1,
+        slow_threshold: float = 30.0,
+        truncation_rules: dict[str, int] | None = None,
+        decision_wait: float = 300.0,
+        max_buffered_traces: int = 1000,
+    ) -> None:
+        """
+        Initialize the processor.
+
+        :param delegate: Processor receiving the spans of kept traces
+        :param sample_rate: Fraction of normal traces to keep, between 0 and 1
+        :param slow_threshold: Root span duration in seconds above which a trace is kept
+        :param truncation_rules: Maximum string length per attribute pattern
+        :param decision_wait: Seconds to wait for a trace's root span
+        :param max_buffered_traces: Pending traces before the oldest is decided
+        """
+        if not 0.0 <= sample_rate <= 1.0:
+            raise ValueError(f"sample_rate must be between 0 and 1, got {sample_rate}")
+        self.delegate = delegate
+        self.sample_rate = sample_rate
+        self.slow_threshold_ns = int(slow_threshold * 1e9)
+        self.truncation_rules = (
+            DEFAULT_TRUNCATION_RULES if truncation_rules is None else truncation_rules
+        )
+        self.decision_wait = decision_wait
+        self.max_buffered_traces = max_buffered_traces
+        self.stats = {
+            "traces_kept": 0,
+            "traces_dropped": 0,
+            "spans_kept": 0,
+            "spans_dropped": 0,
+            "kept_errors": 0,
+            "kept_slow": 0,
+            "attributes_truncated": 0,
+        }
+        # trace_id -> (first seen, spans), ordered by first seen
+        self._traces: collections.OrderedDict[int, tuple[float, list[ReadableSpan]]] = (
+            collections.OrderedDict()
+        )
+        self._lock = threading.Lock()
+        self._threshold = int(sample_rate * (1 << 64))
+
+    def on_start(self, span: Span, parent_context: Context | None = None) -> None:
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        trace_id = span.context.trace_id
+        is_root = span.parent is None or span.parent.is_remote
+        decided: list[tuple[list[ReadableSpan], ReadableSpan | None]] = []
+        with self._lock:
+            _, spans = self._traces.setdefault(trace_id, (time.monotonic(), []))
+            spans.append(span)
+            if is_root:
+                decided.append((self._traces.pop(trace_id)[1], span))
+            decided.extend(self._expire())
+        for spans, root in decided:
+            self._decide(spans, root)
+
+    def _expire(
+        self, force: bool = False
+    ) -> list[tuple[list[ReadableSpan], ReadableSpan | None]]:
+        """Removes the traces due for a decision without their root span.
+
+        Traces waiting longer than ``decision_wait`` or beyond
+        ``max_buffered_traces`` are due, and every trace when ``force`` is set.
+        """
+        expired: list[tuple[list[ReadableSpan], ReadableSpan | None]] = []
+        deadline = time.monotonic() - self.decision_wait
+        while self._traces:
+            trace_id, (first_seen, spans) = next(iter(self._traces.items()))
+            if (
+                not force
+                and first_seen > deadline
+                and len(self._traces) <= self.max_buffered_traces
+            ):
+                break
+            del self._traces[trace_id]
+            expired.append((spans, None))
+        return expired
+
+    def should_keep(
+        self, spans: list[ReadableSpan], root: ReadableSpan | None
+    ) -> str | None:
+        """
+        Decide whether a finished trace is exported.
+
+        :param spans: All buffered spans of the trace
+        :param root: The local root span, if it ended
+        :return: The reason to keep the trace (``error``, ``slow`` or ``sampled``) or None
+        """
+        if any(span.status.status_code == StatusCode.ERROR for span in spans):
+            return "error"
+        start = min(span.start_time or 0 for span in spans)
+        end = max(span.end_time or 0 for span in spans)
+        if root is not None:
+            start, end = root.start_time or 0, root.end_time or 0
+        if end - start >= self.slow_threshold_ns:
+            return "slow"
+        # The low 64 bits of W3C trace IDs are random, so this keeps a stable
+        # fraction of traces and the same decision on every replica
+        if (spans[0].context.trace_id & ((1 << 64) - 1)) < self._threshold:
+            return "sampled"
+        return None
+
+    def _decide(self, spans: list[ReadableSpan], root: ReadableSpan | None) -> None:
+        reason = self.should_keep(spans, root)
+        with self._lock:
+            if reason is None:
+                self.stats["traces_dropped"] += 1
+                self.stats["spans_dropped"] += len(spans)
+                return
+            self.stats["traces_kept"] += 1
+            self.stats["spans_kept"] += len(spans)
+            if reason == "error":
+                self.stats["kept_errors"] += 1
+            elif reason == "slow":
+                self.stats["kept_slow"] += 1
+        for span in spans:
+            self.delegate.on_end(self._truncate(span))
+
+    def _truncate(self, span: ReadableSpan) -> ReadableSpan:
+        if not self.truncation_rules or not span.attributes:
+            return span
+        attributes: dict[str, Any] | None = None
+        for key, value in span.attributes.items():
+            if not isinstance(value, str):
+                continue
+            limit = self._limit_for(key)
+            if limit is None or len(value) <= limit:
+                continue
+            if attributes is None:
+                attributes = dict(span.attributes)
+            attributes[key] = value[:limit] + TRUNCATION_SUFFIX
+            with self._lock:
+                self.stats["attributes_truncated"] += 1
+        if attributes is None:
+            return span
+        return ReadableSpan(
+            name=span.name,
+            context=span.context,
+            parent=span.parent,
+            resource=span.resource,
+            attributes=attributes,
+            events=span.events,
+            links=span.links,
+            kind=span.kind,
+            status=span.status,
+            start_time=span.start_time,
+            end_time=span.end_time,
+            instrumentation_scope=span.instrumentation_scope,
+        )
+
+    def _limit_for(self, key: str) -> int | None:
+        limit = self.truncation_rules.get(key)
+        if limit is not None:
+            return limit
+        for pattern, pattern_limit in self.truncation_rules.items():
+            if fnmatch.fnmatchcase(key, pattern):
+                return pattern_limit
+        return None
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        """Decide all buffered traces and flush the delegate."""
+        with self._lock:
+            pending = self._expire(force=True)
+        for spans, root in pending:
+            self._decide(spans, root)
+        return self.delegate.force_flush(timeout_millis)
+
+    def shutdown(self) -> None:
+        self.force_flush()
+        self.delegate.shutdown()
+
+
+def tail_sampling_from_env(delegate: SpanProcessor) -> SpanProcessor:
+    """
+    Wrap a processor with tail sampling when $TRACE_SAMPLE_RATE is set.
+
+    $TRACE_SLOW_THRESHOLD_SECONDS and $TRACE_TRUNCATION_RULES
+    (``pattern=max_chars,...``) tune the sampler. Without $TRACE_SAMPLE_RATE
+    every span is exported unchanged.
+
+    :param delegate: The exporting processor
+    :return: The processor to register on the tracer provider
+    """
+    sample_rate = os.environ.get("TRACE_SAMPLE_RATE")
+    if not sample_rate:
+        return delegate
+    rules = os.environ.get("TRACE_TRUNCATION_RULES")
+    return TailSamplingSpanProcessor(
+        delegate,
+        sample_rate=float(sample_rate),
+        slow_threshold=float(os.environ.get("TRACE_SLOW_THRESHOLD_SECONDS", "30")),
+        truncation_rules=parse_truncation_rules(rules) if rules is not None else None,
+    )
@@ -0,0 +1,54 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import os
+from collections.abc import Callable
+
+from google.adk.sessions import BaseSessionService, DatabaseSessionService
+
+LOCAL_SESSION_DB_URL = "sqlite:///.repo_reviver/sessions.db"
+
+
+def build_session_service(db_url: str | None = None) -> BaseSessionService:
+    """Build a durable session service backed by a SQL database.
+
+    Sessions, and the revival workflow checkpoints kept in their state, survive
+    worker restarts, so a retried session reattaches to its codespace instead of
+    starting over. Any SQLAlchemy URL works (e.g. ``postgresql://...`` or a
+    Cloud SQL instance in production); locally it defaults to a SQLite file.
+
+    Args:
+        db_url: Database URL, defaults to $SESSION_DB_URL or a local SQLite file
+
+    Returns:
+        The session service
+    """
+    db_url = db_url or os.environ.get("SESSION_DB_URL") or LOCAL_SESSION_DB_URL
+    if db_url.startswith("sqlite:///"):
+        db_path = db_url.removeprefix("sqlite:///")
+        os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+    logging.info(f"Using durable session store at {db_url.split('@')[-1]}")
+    return DatabaseSessionService(db_url=db_url)
+
+
+def session_service_builder_from_env() -> Callable[[], BaseSessionService] | None:
+    """Return a session service builder when $SESSION_DB_URL is configured.
+
+    Without it the Agent Engine default applies (Vertex AI sessions when
+    deployed, in-memory otherwise).
+    """
+    if not os.environ.get("SESSION_DB_URL"):
+        return None
+    return build_session_service
@@ -0,0 +1,48 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import asyncio
+import functools
+import inspect
+from collections.abc import Callable
+from typing import Any
+
+
+def off_loop(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Run a blocking agent tool in a worker thread instead of on the event loop.
+
+    ADK calls sync tools on the event loop, so a tool waiting on gh, a codespace
+    slot or the GitHub rate limit would stall every other session of the
+    process. The returned coroutine function runs ``func`` via
+    ``asyncio.to_thread``, which copies the context (e.g. the current span)
+    into the thread. The signature and docstring are kept, so the function
+    declaration and ``tool_context`` injection are unchanged.
+
+    Wrap before `instrument_tool`, so the instrumented call (and the
+    per-call context it sets for plugin callbacks) stays on the event loop.
+
+    Args:
+        func: The tool function; coroutine functions are returned as is
+
+    Returns:
+        The tool as a coroutine function
+    """
+    if inspect.iscoroutinefunction(func):
+        return func
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> Any:
+        return await asyncio.to_thread(func, *args, **kwargs)
+
+    return wrapper
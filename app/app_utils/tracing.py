@@ -14,14 +14,171 @@
 
 import json
 import logging
+import sys
+from collections import OrderedDict
 from collections.abc import Sequence
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 import google.cloud.storage as storage
 from google.cloud import logging as google_cloud_logging
 from opentelemetry.exporter.cloud_trace import CloudTraceSpanExporter
+from opentelemetry.sdk.resources import Resource
 from opentelemetry.sdk.trace import ReadableSpan
 from opentelemetry.sdk.trace.export import SpanExportResult
+from opentelemetry.sdk.util import ns_to_iso_str
+from opentelemetry.trace import SpanContext, format_span_id, format_trace_id
+
+from app.app_utils.clients import get_logging_client, get_storage_client
+from app.app_utils.gcs import SpanPayloadOffloader
+from app.app_utils.ledger import CostLedger
+from app.app_utils.log_batching import BatchedLogWriter
+
+# Cloud Logging rejects entries above 256 KB; keep headroom for the envelope
+MAX_ATTRIBUTES_BYTES = 255 * 1024
+
+# ADK sets this on LLM call spans, used to attribute offloaded bytes to a session
+SESSION_ID_ATTRIBUTE = "gcp.vertex.agent.session_id"
+
+# Attribute values above this size move to GCS when a span is offloaded
+MAX_RETAINED_VALUE_BYTES = 4 * 1024
+
+# Room kept for the uri_payload and url_payload attributes of an offloaded span
+PAYLOAD_REFERENCE_BYTES = 512
+
+# Formatted resources kept, least recently used first; processes normally
+# have one tracer provider, but each new provider would otherwise leak one
+RESOURCE_CACHE_SIZE = 16
+_resource_cache: OrderedDict[int, tuple[Resource, dict[str, Any]]] = OrderedDict()
+
+
+def _format_context(context: SpanContext) -> dict[str, str]:
+    return {
+        "trace_id": f"0x{format_trace_id(context.trace_id)}",
+        "span_id": f"0x{format_span_id(context.span_id)}",
+        "trace_state": repr(context.trace_state),
+    }
+
+
+def _format_attributes(attributes: Any) -> dict[str, Any] | None:
+    if attributes is None:
+        return None
+    # Sequence attributes are tuples; JSON (and Cloud Logging) expects lists
+    return {
+        key: list(value) if isinstance(value, tuple) else value
+        for key, value in attributes.items()
+    }
+
+
+def _format_resource(resource: Resource) -> dict[str, Any]:
+    # Spans from one provider share a Resource, so format it only once
+    cached = _resource_cache.get(id(resource))
+    if cached is None or cached[0] is not resource:
+        cached = (
+            resource,
+            {
+                "attributes": _format_attributes(resource.attributes),
+                "schema_url": resource.schema_url,
+            },
+        )
+        _resource_cache[id(resource)] = cached
+        if len(_resource_cache) > RESOURCE_CACHE_SIZE:
+            _resource_cache.popitem(last=False)
+    _resource_cache.move_to_end(id(resource))
+    return cached[1]
+
+
+def span_to_dict(span: ReadableSpan) -> dict[str, Any]:
+    """
+    Encode a span directly into the dict produced by ``json.loads(span.to_json())``.
+
+    Avoids serializing every span to a JSON string only to parse it back.
+
+    :param span: The span to encode
+    :return: The span as a JSON-compatible dictionary
+    """
+    status = {"status_code": str(span.status.status_code.name)}
+    if span.status.description:
+        status["description"] = span.status.description
+
+    return {
+        "name": span.name,
+        "context": _format_context(span.context) if span.context else None,
+        "kind": str(span.kind),
+        "parent_id": f"0x{format_span_id(span.parent.span_id)}"
+        if span.parent is not None
+        else None,
+        "start_time": ns_to_iso_str(span.start_time) if span.start_time else None,
+        "end_time": ns_to_iso_str(span.end_time) if span.end_time else None,
+        "status": status,
+        "attributes": _format_attributes(span.attributes),
+        "events": [
+            {
+                "name": event.name,
+                "timestamp": ns_to_iso_str(event.timestamp),
+                "attributes": _format_attributes(event.attributes),
+            }
+            for event in span.events
+        ],
+        "links": [
+            {
+                "context": _format_context(link.context),
+                "attributes": _format_attributes(link.attributes),
+            }
+            for link in span.links
+        ],
+        "resource": _format_resource(span.resource),
+    }
+
+
+def _string_size(value: str) -> int:
+    size = len(value) if value.isascii() else len(value.encode())
+    # Quotes plus one extra byte per common escaped character
+    return (
+        size
+        + 2
+        + value.count('"')
+        + value.count("\\")
+        + value.count("\n")
+        + value.count("\t")
+    )
+
+
+def estimate_json_size(value: Any, limit: int | None = None) -> int:
+    """
+    Estimate the UTF-8 size of ``json.dumps(value)`` without serializing it.
+
+    Walks the value and sums the size of its parts, stopping early once
+    ``limit`` is exceeded, so oversized attributes are detected after scanning
+    only as much as needed.
+
+    :param value: A JSON-compatible value
+    :param limit: Optional size after which counting stops
+    :return: The estimated size in bytes (a value above ``limit`` if exceeded)
+    """
+    if limit is None:
+        limit = sys.maxsize
+    if isinstance(value, str):
+        return _string_size(value)
+    if isinstance(value, dict):
+        # Braces, plus ": " and ", " separators per item
+        total = 2
+        for key, nested in value.items():
+            total += 4 + _string_size(str(key))
+            total += estimate_json_size(nested, limit - total)
+            if total > limit:
+                break
+        return total
+    if isinstance(value, (list, tuple)):
+        total = 2
+        for nested in value:
+            total += 2 + estimate_json_size(nested, limit - total)
+            if total > limit:
+                break
+        return total
+    if isinstance(value, bool) or value is None:
+        return 5
+    return len(str(value))
 
 
 class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
@@ -39,6 +196,9 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
         storage_client: storage.Client | None = None,
         bucket_name: str | None = None,
         debug: bool = False,
+        log_writer: BatchedLogWriter | None = None,
+        offloader: SpanPayloadOffloader | None = None,
+        ledger: CostLedger | None = None,
         **kwargs: Any,
     ) -> None:
         """
@@ -48,32 +208,45 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
         :param storage_client: Google Cloud Storage client
         :param bucket_name: Name of the GCS bucket to store large payloads
         :param debug: Enable debug mode for additional logging
+        :param log_writer: Batched writer for span log entries (created if omitted)
+        :param offloader: Background uploader for oversized payloads (created if omitted)
+        :param ledger: Cost ledger recording offloaded bytes per session
         :param kwargs: Additional arguments to pass to the parent class
         """
         super().__init__(**kwargs)
         self.debug = debug
-        self.logging_client = logging_client or google_cloud_logging.Client(
-            project=self.project_id
-        )
+        self.logging_client = logging_client or get_logging_client(self.project_id)
         self.logger = self.logging_client.logger(__name__)
-        self.storage_client = storage_client or storage.Client(project=self.project_id)
-        self.bucket_name = (
-            bucket_name or f"{self.project_id}-repo-reviver-logs"
+        self.log_writer = log_writer or BatchedLogWriter(self.logger)
+        # Cloud Trace export runs alongside span encoding and log queueing
+        self._trace_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="CloudTraceExport"
         )
+        self.storage_client = storage_client or get_storage_client(self.project_id)
+        self.bucket_name = bucket_name or f"{self.project_id}-repo-reviver-logs"
         self.bucket = self.storage_client.bucket(self.bucket_name)
+        self.offloader = offloader or SpanPayloadOffloader(
+            self.storage_client, self.bucket_name
+        )
+        self.ledger = ledger
 
     def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
         """
         Export the spans to Google Cloud Logging and Cloud Trace.
 
+        The Cloud Trace export starts first on a worker thread; log entries are
+        queued on the batched writer meanwhile and written in the background.
+
         :param spans: A sequence of spans to export
-        :return: The result of the export operation
+        :return: The result of the Cloud Trace export
         """
+        # Export spans to Google Cloud Trace using the parent class method
+        trace_result = self._trace_executor.submit(super().export, spans)
         for span in spans:
             span_context = span.get_span_context()
             trace_id = format(span_context.trace_id, "x")
             span_id = format(span_context.span_id, "x")
-            span_dict = json.loads(span.to_json())
+            span_dict = span_to_dict(span)
 
             span_dict["trace"] = f"projects/{self.project_id}/traces/{trace_id}"
             span_dict["span_id"] = span_id
@@ -85,67 +258,111 @@ class CloudTraceLoggingSpanExporter(CloudTraceSpanExporter):
             if self.debug:
                 print(span_dict)
 
-            # Log the span data to Google Cloud Logging
-            self.logger.log_struct(
+            # Queue the span data for a batched write to Google Cloud Logging
+            self.log_writer.write(
                 span_dict,
+                size=estimate_json_size(span_dict, limit=MAX_ATTRIBUTES_BYTES),
                 labels={
                     "type": "agent_telemetry",
                     "service_name": "repo-reviver",
                 },
                 severity="INFO",
             )
-        # Export spans to Google Cloud Trace using the parent class method
-        return super().export(spans)
+        return trace_result.result()
 
-    def store_in_gcs(self, content: str, span_id: str) -> str:
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
         """
-        Initiate storing large content in Google Cloud Storage/
+        Write all queued span log entries.
+
+        :param timeout_millis: Maximum time to wait
+        :return: Whether all entries were written in time
+        """
+        return self.log_writer.flush(timeout=timeout_millis / 1000)
+
+    def shutdown(self) -> None:
+        """Flush queued log entries and uploads and stop the background workers."""
+        self.offloader.shutdown()
+        self.log_writer.shutdown()
+        self._trace_executor.shutdown(wait=True)
+        super().shutdown()
+
+    def store_in_gcs(self, content: str) -> str:
+        """
+        Schedule storing large content in Google Cloud Storage.
+
+        The upload happens in the background; the content-addressed URI is
+        returned right away.
 
         :param content: The content to store
-        :param span_id: The ID of the span
-        :return: The  GCS URI of the stored content
+        :return: The GCS URI of the stored content
         """
-        if not self.storage_client.bucket(self.bucket_name).exists():
+        if not self.offloader.bucket_exists():
             logging.warning(
                 f"Bucket {self.bucket_name} not found. "
                 "Unable to store span attributes in GCS."
             )
             return "GCS bucket not found"
 
-        blob_name = f"spans/{span_id}.json"
-        blob = self.bucket.blob(blob_name)
-
-        blob.upload_from_string(content, "application/json")
-        return f"gs://{self.bucket_name}/{blob_name}"
+        uri = self.offloader.offload(content)
+        if uri is None:
+            logging.warning("GCS offload queue full, dropping span attributes")
+            return "GCS offload queue full"
+        return uri
 
     def _process_large_attributes(self, span_dict: dict, span_id: str) -> dict:
         """
         Process large attribute values by storing them in GCS if they exceed the size
         limit of Google Cloud Logging.
 
+        Only the large values are moved to GCS; small attributes stay on the log
+        entry so it remains searchable and below the Cloud Logging limit.
+
         :param span_dict: The span data dictionary
-        :param trace_id: The trace ID
         :param span_id: The span ID
         :return: The updated span dictionary
         """
-        attributes = span_dict["attributes"]
-        if len(json.dumps(attributes).encode()) > 255 * 1024:  # 250 KB
+        attributes = span_dict["attributes"] or {}
+        if (
+            estimate_json_size(attributes, limit=MAX_ATTRIBUTES_BYTES)
+            > MAX_ATTRIBUTES_BYTES
+        ):
             # Separate large payload from other attributes
-            attributes_payload = dict(attributes.items())
-            attributes_retain = dict(attributes.items())
+            attributes_payload = {}
+            attributes_retain = {}
+            item_sizes = {}
+            for key, value in attributes.items():
+                value_size = estimate_json_size(value, limit=MAX_RETAINED_VALUE_BYTES)
+                if value_size > MAX_RETAINED_VALUE_BYTES:
+                    attributes_payload[key] = value
+                else:
+                    attributes_retain[key] = value
+                    item_sizes[key] = 4 + _string_size(str(key)) + value_size
+
+            # Many values below the threshold can still add up past the limit;
+            # move the largest remaining ones until the retained entry fits
+            retained_bytes = 2 + sum(item_sizes.values()) + PAYLOAD_REFERENCE_BYTES
+            for key in sorted(item_sizes, key=item_sizes.__getitem__, reverse=True):
+                if retained_bytes <= MAX_ATTRIBUTES_BYTES:
+                    break
+                attributes_payload[key] = attributes_retain.pop(key)
+                retained_bytes -= item_sizes[key]
 
             # Store large payload in GCS
-            gcs_uri = self.store_in_gcs(json.dumps(attributes_payload), span_id)
+            content = json.dumps(attributes_payload)
+            gcs_uri = self.store_in_gcs(content)
+            session_id = attributes.get(SESSION_ID_ATTRIBUTE)
+            if self.ledger is not None and session_id and gcs_uri.startswith("gs://"):
+                self.ledger.gcs_offload(session_id, len(content))
             attributes_retain["uri_payload"] = gcs_uri
-            attributes_retain["url_payload"] = (
-                f"https://storage.mtls.cloud.google.com/"
-                f"{self.bucket_name}/spans/{span_id}.json"
-            )
+            if gcs_uri.startswith("gs://"):
+                attributes_retain["url_payload"] = (
+                    "https://storage.mtls.cloud.google.com/" + gcs_uri[len("gs://") :]
+                )
 
             span_dict["attributes"] = attributes_retain
             logging.info(
-                "Length of payload span above 250 KB, storing attributes in GCS "
-                "to avoid large log entry errors"
+                f"Length of payload span {span_id} above 250 KB, storing attributes "
+                "in GCS to avoid large log entry errors"
             )
 
         return span_dict
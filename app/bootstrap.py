@@ -0,0 +1,124 @@
+"""Deterministic codespace bootstrap that runs before the model's first turn."""
+
+import shlex
+from typing import Any
+
+MARKER = "__RR__"
+
+# Files that identify how a project is built, in rough order of importance
+MANIFEST_FILES = [
+    "package.json",
+    "requirements.txt",
+    "pyproject.toml",
+    "setup.py",
+    "Pipfile",
+    "go.mod",
+    "Cargo.toml",
+    "pom.xml",
+    "build.gradle",
+    "Gemfile",
+    "composer.json",
+    "Dockerfile",
+    "docker-compose.yml",
+    "Makefile",
+]
+
+MAX_MANIFESTS = 50
+
+GIT_EMAIL = "agent@reporeviver.com"
+GIT_NAME = "RepoReviver Agent"
+
+
+def build_bootstrap_script(repo: str, clone_dir: str = "repo") -> str:
+    """Builds the shell script that prepares a fresh codespace in one invocation.
+
+    The script verifies git/gh, configures the git identity, clones the
+    repository (or reuses an existing clone) and discovers manifest files. Each
+    fact is printed as a `__RR__ key=value` line so it can be parsed reliably
+    from the surrounding ssh noise.
+
+    Args:
+        repo: Repository in owner/repo format
+        clone_dir: Directory to clone into, relative to the ssh working dir
+
+    Returns:
+        Shell script to pass to `run_in_codespace`
+    """
+    url = shlex.quote(f"https://github.com/{repo}")
+    target = shlex.quote(clone_dir)
+    name_filters = " -o ".join(f"-name {shlex.quote(f)}" for f in MANIFEST_FILES)
+    return f"""
+emit() {{ printf '{MARKER} %s=%s\\n' "$1" "$(printf '%s' "$2" | tr '\\n' ' ')"; }}
+emit git_version "$(git --version 2>&1)"
+emit gh_version "$(gh --version 2>&1 | head -n 1)"
+emit user "$(whoami)"
+emit pwd "$(pwd)"
+git config --global user.email {shlex.quote(GIT_EMAIL)} \\
+  && git config --global user.name {shlex.quote(GIT_NAME)} \\
+  && emit git_identity configured || emit git_identity failed
+if [ -d {target}/.git ]; then
+  emit clone existing
+elif err=$(git clone --quiet {url} {target} 2>&1); then
+  emit clone cloned
+else
+  emit clone failed
+  emit clone_error "$(printf '%s' "$err" | tail -n 3)"
+fi
+if cd {target} 2>/dev/null; then
+  emit branch "$(git rev-parse --abbrev-ref HEAD 2>/dev/null)"
+  emit head_sha "$(git rev-parse HEAD 2>/dev/null)"
+  ls -Ap | grep -vx '.git/' | while read -r f; do emit entry "$f"; done
+  find . -maxdepth 3 \\( -name node_modules -o -name .git -o -name vendor \\) -prune \\
+    -o -type f \\( {name_filters} \\) -print 2>/dev/null \\
+    | sort | head -n {MAX_MANIFESTS} | while read -r f; do emit manifest "${{f#./}}"; done
+fi
+"""
+
+
+def parse_bootstrap_output(output: str, clone_dir: str = "repo") -> dict[str, Any]:
+    """Parses the marker lines printed by the bootstrap script into a summary.
+
+    Args:
+        output: stdout of the bootstrap script
+        clone_dir: Directory the repository was cloned into
+
+    Returns:
+        dict with environment, clone and repository details
+    """
+    values: dict[str, str] = {}
+    entries: list[str] = []
+    manifests: list[str] = []
+    prefix = MARKER + " "
+    for line in output.splitlines():
+        if not line.startswith(prefix) or "=" not in line:
+            continue
+        key, value = line[len(prefix) :].split("=", 1)
+        value = value.strip()
+        if key == "entry":
+            entries.append(value)
+        elif key == "manifest":
+            manifests.append(value)
+        else:
+            values[key] = value
+
+    clone_status = values.get("clone", "unknown")
+    summary: dict[str, Any] = {
+        "status": "success" if clone_status in ("cloned", "existing") else "error",
+        "environment": {
+            "git_version": values.get("git_version"),
+            "gh_version": values.get("gh_version"),
+            "user": values.get("user"),
+            "pwd": values.get("pwd"),
+            "git_identity_configured": values.get("git_identity") == "configured",
+        },
+        "clone": {"status": clone_status, "path": clone_dir},
+        "repository": {
+            "branch": values.get("branch"),
+            "head_sha": values.get("head_sha"),
+            "root_entries": entries,
+            "manifests": manifests,
+        },
+    }
+    if "clone_error" in values:
+        summary["clone"]["error"] = values["clone_error"]
+    return summary
@@ -1,50 +1,245 @@
 import subprocess
 import json
-from typing import Optional
+import os
+import shlex
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
 
+from google.adk.tools.tool_context import ToolContext
 
-def create_codespace(repo_url: str) -> dict:
+from app import prefetch, workflow
+from app.app_utils import analysis_cache, codespace_quota
+from app.app_utils.codespace_quota import get_codespace_scheduler
+from app.app_utils.rate_limit import (
+    command_rate_limited,
+    count_gh_api_calls,
+    get_github_governor,
+    ssh_rate_limited,
+)
+from app.bootstrap import build_bootstrap_script, parse_bootstrap_output
+
+# Run the deterministic bootstrap (env checks, git identity, clone, manifest
+# discovery) as part of create_codespace unless explicitly disabled.
+BOOTSTRAP_ENABLED = os.environ.get("REPO_REVIVER_BOOTSTRAP", "True").lower() in ("true", "1", "yes")
+
+# 2-core machine (true smallest/cheapest)
+MACHINE_TYPE = "basicLinux32gb"
+
+
+def normalize_repo(repo_url: str) -> str:
+    """Converts a full GitHub URL to owner/repo format."""
+    if repo_url.startswith("http"):
+        # https://github.com/owner/repo -> owner/repo
+        repo_url = "/".join(repo_url.rstrip("/").split("/")[-2:])
+    return repo_url.removesuffix(".git")
+
+
+def gh(
+    args: list[str],
+    cost: int = 1,
+    retry: bool = True,
+    rate_limited: Callable[[subprocess.CalledProcessError], bool] = command_rate_limited,
+    **kwargs: Any,
+) -> subprocess.CompletedProcess:
+    """Runs a gh command under the shared GitHub rate-limit governor.
+
+    Calls wait their turn instead of tripping GitHub's limits, and rate-limited
+    commands are retried after a backoff unless ``retry`` is False.
+    """
+    return get_github_governor().call(
+        lambda: subprocess.run(['gh', *args], **kwargs),
+        cost=cost,
+        retry=retry,
+        rate_limited=rate_limited,
+    )
+
+
+def _ssh(
+    codespace_name: str, commands: str, timeout: int = 300, retry: bool = False
+) -> subprocess.CompletedProcess:
+    """Runs commands in a codespace over `gh codespace ssh`, passed via stdin.
+
+    gh commands in the script count against the rate limit too. Scripts are
+    not retried by default since they may have partially run.
+    """
+    return gh([
+        'codespace', 'ssh',
+        '-c', codespace_name
+    ], cost=1 + count_gh_api_calls(commands), retry=retry,
+        # A failing script's own output must not pause every session
+        rate_limited=ssh_rate_limited,
+        input=commands, capture_output=True, text=True, check=True, timeout=timeout)
+
+
+# Prefetches the root listing, README and manifests after a clone or checkout
+prefetcher = prefetch.Prefetcher(
+    lambda codespace_name, script: _ssh(codespace_name, script, retry=True)
+)
+
+
+def bootstrap_codespace(codespace_name: str, repo: str) -> dict:
+    """Prepares a fresh codespace in a single remote invocation.
+
+    Verifies git/gh, configures the git identity, clones the repository into
+    `repo` and discovers manifest files, without any model round trips.
+
+    Args:
+        codespace_name: Name of the codespace
+        repo: Repository in owner/repo format
+
+    Returns:
+        dict with the structured bootstrap summary
+    """
+    try:
+        # Idempotent: an existing clone is reused
+        result = _ssh(codespace_name, build_bootstrap_script(repo), retry=True)
+        summary = parse_bootstrap_output(result.stdout)
+        if summary["status"] == "success":
+            # Later sessions on the same commit find the scan without a codespace
+            repository = summary["repository"]
+            analysis_cache.save_analysis(
+                repo, repository["head_sha"], analysis_cache.STRUCTURE, repository
+            )
+            if prefetch.ENABLED:
+                files = prefetch.predict_reads(repository["root_entries"], repository["manifests"])
+                prefetcher.start(codespace_name, summary["clone"]["path"], files)
+        return summary
+    except subprocess.TimeoutExpired:
+        return {"status": "error", "error": "Bootstrap timed out after 5 minutes"}
+    except subprocess.CalledProcessError as e:
+        return {"status": "error", "error": e.stderr if e.stderr else "Bootstrap failed"}
+    except Exception as e:
+        return {"status": "error", "error": str(e)}
+
+
+def _codespace_exists(codespace_name: str) -> bool:
+    """Checks whether a codespace still exists (running or stopped)."""
+    try:
+        gh([
+            'codespace', 'view',
+            '-c', codespace_name,
+            '--json', 'state'
+        ], capture_output=True, text=True, check=True, timeout=60)
+        return True
+    except Exception:
+        return False
+
+
+def _resume_codespace(repo_url: str, tool_context: ToolContext | None) -> dict | None:
+    """Reattaches to the codespace recorded in the session for this repo, if any."""
+    progress = workflow.get_progress(tool_context)
+    codespace_name = progress.get("codespace_name")
+    if progress.get("repo") != repo_url or not codespace_name:
+        return None
+
+    start = time.monotonic()
+    if not _codespace_exists(codespace_name):
+        return None
+    response = {
+        "status": "success",
+        "codespace_name": codespace_name,
+        "message": f"Reattached to existing codespace: {codespace_name}"
+    }
+    if BOOTSTRAP_ENABLED:
+        # Reuses the existing clone and reports the current branch state
+        response["bootstrap"] = bootstrap_codespace(codespace_name, repo_url)
+    response.update(workflow.resume_summary(progress, time.monotonic() - start))
+    return response
+
+
+def create_codespace(repo_url: str, tool_context: ToolContext | None = None) -> dict:
     """Creates a GitHub Codespace for repository analysis.
     
+    The codespace is bootstrapped before returning: git and gh are verified,
+    the git identity is configured and the repository is cloned into `repo`.
+    If this session already created a codespace for the repository and it
+    still exists, it is reattached instead and the completed workflow phases
+    are returned so the revival can continue where it stopped. When the
+    user's codespace quota or the account limit is reached, the call waits
+    for a free slot; the wait is reported as queue_wait_seconds.
+
     Args:
         repo_url: GitHub repository URL (e.g., petroslamb/resume-copilot or full URL)
     
     Returns:
-        dict with codespace_name and status
+        dict with codespace_name, status and bootstrap summary
     """
     try:
-        # Extract owner/repo from URL if full URL provided
-        if repo_url.startswith("http"):
-            # https://github.com/owner/repo -> owner/repo
-            repo_url = "/".join(repo_url.rstrip("/").split("/")[-2:])
-        
-        result = subprocess.run([
-            'gh', 'codespace', 'create',
-            '-R', repo_url,  # Use -R flag for repo
-            '-m', 'basicLinux32gb',  # 2-core machine (true smallest/cheapest)
-            '--retention-period', '1h',  # Auto-delete after 1 hour
-        ], capture_output=True, text=True, check=True)
+        repo_url = normalize_repo(repo_url)
         
-        # Extract codespace name from output (first line usually contains the name)
-        codespace_name = result.stdout.strip().split('\n')[0] if result.stdout else None
+        resumed = _resume_codespace(repo_url, tool_context)
+        if resumed:
+            return resumed
+
+        scheduler = get_codespace_scheduler()
+        lease = scheduler.acquire(*codespace_quota.tenant_of(tool_context))
+        start = time.monotonic()
+        try:
+            while True:
+                try:
+                    result = gh([
+                        'codespace', 'create',
+                        '-R', repo_url,  # Use -R flag for repo
+                        '-m', MACHINE_TYPE,
+                        '--retention-period', '1h',  # Auto-delete after 1 hour
+                    ], capture_output=True, text=True, check=True)
+                    break
+                except subprocess.CalledProcessError as e:
+                    if not codespace_quota.is_account_limit(e.stderr):
+                        raise
+                    # Codespaces outside this process fill the account; wait for a slot
+                    lease = scheduler.account_full(lease)
+                    start = time.monotonic()
+
+            # Extract codespace name from output (first line usually contains the name)
+            codespace_name = result.stdout.strip().split('\n')[0] if result.stdout else None
+        except BaseException:
+            scheduler.release(lease)
+            raise
         
         if not codespace_name:
+            scheduler.release(lease)
             return {"status": "error", "error": "Failed to extract codespace name from output"}
+        scheduler.assign(lease, codespace_name)
         
-        return {
+        workflow.start_revival(
+            tool_context, repo_url, codespace_name, seconds=round(time.monotonic() - start, 3)
+        )
+
+        response = {
             "status": "success",
             "codespace_name": codespace_name,
+            "machine_type": MACHINE_TYPE,
+            "queue_wait_seconds": round(lease.waited_seconds, 3),
             "message": f"Codespace created: {codespace_name}"
         }
+        if BOOTSTRAP_ENABLED:
+            start = time.monotonic()
+            bootstrap = bootstrap_codespace(codespace_name, repo_url)
+            if bootstrap["status"] == "success":
+                workflow.record_phase(
+                    tool_context, workflow.CLONED, seconds=round(time.monotonic() - start, 3)
+                )
+            response["bootstrap"] = bootstrap
+        return response
     except subprocess.CalledProcessError as e:
         return {"status": "error", "error": e.stderr}
     except Exception as e:
         return {"status": "error", "error": str(e)}
 
 
-def run_in_codespace(codespace_name: str, commands: str) -> dict:
+def run_in_codespace(
+    codespace_name: str, commands: str, tool_context: ToolContext | None = None
+) -> dict:
     """Executes commands in a GitHub Codespace.
     
+    Successful commands that create the fix branch, commit fixes or open the
+    pull request are recorded as workflow checkpoints in the session. Plain
+    `cd`/`cat`/`ls` reads of files prefetched after the clone are answered
+    without a round trip.
+
     Args:
         codespace_name: Name of the codespace
         commands: Shell commands to execute (multiline supported)
@@ -53,12 +248,27 @@ def run_in_codespace(codespace_name: str, commands: str) -> dict:
         dict with command output and status
     """
     try:
+        reads = prefetch.parse_reads(commands) if prefetch.ENABLED else None
+        if reads:
+            served = prefetcher.serve(codespace_name, reads)
+            prefetcher.record(
+                tool_context, hit=served is not None,
+                saved_seconds=served["saved_seconds"] if served else 0.0
+            )
+            if served:
+                return {"status": "success", "output": served["output"], "stderr": None}
+        elif reads is None:
+            # Anything but a plain read may modify the workspace
+            prefetcher.invalidate(codespace_name)
+
         # Pass commands via stdin to avoid quoting issues
-        result = subprocess.run([
-            'gh', 'codespace', 'ssh',
-            '-c', codespace_name
-        ], input=commands, capture_output=True, text=True, check=True, timeout=300)
+        result = _ssh(codespace_name, commands)
         
+        for phase, details in workflow.detect_phases(commands, result.stdout):
+            workflow.record_phase(tool_context, phase, **details)
+        if prefetch.ENABLED and prefetch.modifies_checkout(commands):
+            prefetcher.restart(codespace_name)
+
         return {
             "status": "success",
             "output": result.stdout,
@@ -76,7 +286,78 @@ def run_in_codespace(codespace_name: str, commands: str) -> dict:
         return {"status": "error", "error": str(e)}
 
 
-def delete_codespace(codespace_name: str) -> dict:
+def run_in_codespaces(
+    targets: list[dict], max_concurrency: int = 4, tool_context: ToolContext | None = None
+) -> dict:
+    """Executes independent command sets concurrently across codespaces or working dirs.
+
+    Use this instead of several sequential `run_in_codespace` calls when the work
+    is independent, e.g. installing and testing separate packages of a monorepo
+    or related repositories in different codespaces. Wall time approaches the
+    slowest target instead of the sum of all targets.
+
+    Args:
+        targets: List of targets, each a dict with:
+            - codespace_name: Name of the codespace
+            - commands: Shell commands to execute (multiline supported)
+            - cwd: Optional working directory to run the commands in (e.g. "repo/packages/api")
+            - label: Optional name for the target in the results (defaults to cwd or codespace_name)
+        max_concurrency: Maximum number of targets running at the same time
+
+    Returns:
+        dict with overall status ("success", "partial" or "error") and per-target results
+    """
+    if not targets:
+        return {"status": "error", "error": "No targets given"}
+
+    def run_target(target: dict) -> dict:
+        codespace_name = target.get("codespace_name")
+        commands = target.get("commands")
+        cwd = target.get("cwd")
+        label = target.get("label") or cwd or codespace_name
+        if not codespace_name or not commands:
+            return {"target": label, "status": "error", "error": "codespace_name and commands are required"}
+        if cwd:
+            commands = f"cd {shlex.quote(cwd)} || exit 1\n{commands}"
+        start = time.monotonic()
+        # Checkpoints are recorded afterwards, outside the worker threads
+        result = run_in_codespace(codespace_name, commands)
+        return {
+            "target": label,
+            "codespace_name": codespace_name,
+            "cwd": cwd,
+            "duration_seconds": round(time.monotonic() - start, 3),
+            **result,
+        }
+
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(max_concurrency, len(targets)))) as executor:
+        results = list(executor.map(run_target, targets))
+    wall_seconds = round(time.monotonic() - start, 3)
+
+    for target, result in zip(targets, results, strict=True):
+        if result["status"] == "success":
+            for phase, details in workflow.detect_phases(target["commands"], result.get("output")):
+                workflow.record_phase(tool_context, phase, **details)
+
+    failed = sum(1 for result in results if result["status"] != "success")
+    if failed == 0:
+        status = "success"
+    elif failed == len(results):
+        status = "error"
+    else:
+        status = "partial"
+    return {
+        "status": status,
+        "succeeded": len(results) - failed,
+        "failed": failed,
+        "wall_seconds": wall_seconds,
+        "serial_seconds": round(sum(result.get("duration_seconds", 0.0) for result in results), 3),
+        "results": results,
+    }
+
+
+def delete_codespace(codespace_name: str, tool_context: ToolContext | None = None) -> dict:
     """Deletes a GitHub Codespace.
     
     Args:
@@ -86,12 +367,15 @@ def delete_codespace(codespace_name: str) -> dict:
         dict with deletion status
     """
     try:
-        subprocess.run([
-            'gh', 'codespace', 'delete',
+        gh([
+            'codespace', 'delete',
             '-c', codespace_name,
             '--force'
         ], capture_output=True, text=True, check=True)
         
+        get_codespace_scheduler().release_codespace(codespace_name)
+        prefetcher.forget(codespace_name)
+        workflow.forget_codespace(tool_context, codespace_name)
         return {
             "status": "success",
             "message": f"Deleted codespace: {codespace_name}"
@@ -109,8 +393,8 @@ def list_codespaces() -> dict:
         dict with list of codespaces and their details
     """
     try:
-        result = subprocess.run([
-            'gh', 'codespace', 'list',
+        result = gh([
+            'codespace', 'list',
             '--json', 'name,repository,state,createdAt'
         ], capture_output=True, text=True, check=True)
         
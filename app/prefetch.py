@@ -0,0 +1,238 @@
+"""Speculative prefetch of the reads the model makes right after a clone or checkout."""
+
+import base64
+import logging
+import os
+import posixpath
+import re
+import shlex
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+ENABLED = os.environ.get("REPO_REVIVER_PREFETCH", "True").lower() in (
+    "true",
+    "1",
+    "yes",
+)
+
+MARKER = "__RR_PREFETCH__"
+
+# Files larger than this are left to a real round trip
+MAX_FILE_BYTES = 256 * 1024
+MAX_FILES = 20
+
+# `ls` variants of the clone root that are prefetched (flags sorted)
+LS_FLAGS = ("", "a", "A", "l", "al", "Al")
+
+# How long a matching read waits for a prefetch still in flight
+WAIT_SECONDS = 30.0
+
+# Session state key holding the prefetch stats of the session
+STATE_KEY = "prefetch"
+
+_README_RE = re.compile(r"^readme(\.\w+)?$", re.IGNORECASE)
+_CHECKOUT_RE = re.compile(r"\bgit\s+(checkout|switch|pull|clone|reset|merge|rebase)\b")
+# Anything beyond plain words: quoting, expansion, globs, pipes, redirection
+_UNSAFE_RE = re.compile(r"[|<>$`'\"*?\[\]{}()\\~!#&;]")
+_SEPARATOR_RE = re.compile(r"\s*(?:&&|;|\n)\s*")
+
+
+def predict_reads(root_entries: list[str], manifests: list[str]) -> list[str]:
+    """Files the model is expected to read next: READMEs, then manifests."""
+    readmes = [entry for entry in root_entries if _README_RE.match(entry)]
+    return list(dict.fromkeys(readmes + manifests))[:MAX_FILES]
+
+
+def build_prefetch_script(clone_dir: str, files: list[str]) -> str:
+    """Builds the script printing each predicted read as a base64 marker line."""
+    lines = [
+        f"cd {shlex.quote(clone_dir)} 2>/dev/null || exit 0",
+        f'emit() {{ printf \'{MARKER} %s %s %s\\n\' "$1" "$(base64 | tr -d \'\\n\')" "$2"; }}',
+    ]
+    for flags in LS_FLAGS:
+        option = f" -{flags}" if flags else ""
+        lines.append(f"ls{option} | emit ls:{flags} .")
+    for path in files:
+        quoted = shlex.quote(path)
+        lines.append(
+            f"[ -f {quoted} ] && [ $(wc -c < {quoted}) -le {MAX_FILE_BYTES} ] "
+            f"&& cat -- {quoted} | emit cat {quoted}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def parse_prefetch_output(output: str, clone_dir: str) -> dict[tuple[str, str], str]:
+    """Parses the marker lines into read results keyed like `parse_reads`."""
+    results = {}
+    for line in output.splitlines():
+        parts = line.split(" ", 3)
+        if len(parts) != 4 or parts[0] != MARKER:
+            continue
+        _, kind, encoded, arg = parts
+        try:
+            content = base64.b64decode(encoded).decode()
+        except ValueError:
+            continue
+        path = posixpath.normpath(posixpath.join(clone_dir, arg))
+        results[(kind, path)] = content
+    return results
+
+
+def parse_reads(commands: str) -> list[tuple[str, str]] | None:
+    """Parses commands made only of `cd`, `cat` and `ls` into read keys.
+
+    Returns None when the commands do anything else, or use shell syntax whose
+    output a cached read could not reproduce exactly.
+    """
+    if _UNSAFE_RE.search(commands.replace("&&", " ").replace(";", " ")):
+        return None
+    cwd = ""
+    reads = []
+    for command in filter(None, _SEPARATOR_RE.split(commands.strip())):
+        words = command.split()
+        name, args = words[0], words[1:]
+        if name == "cd" and len(args) == 1 and not args[0].startswith("/"):
+            cwd = posixpath.normpath(posixpath.join(cwd, args[0]))
+            if cwd.startswith(".."):
+                return None
+        elif name == "cat" and args and not any(a.startswith("-") for a in args):
+            reads += [
+                ("cat", posixpath.normpath(posixpath.join(cwd, arg))) for arg in args
+            ]
+        elif name == "ls":
+            flags = "".join(
+                sorted({c for a in args if a.startswith("-") for c in a[1:]})
+            )
+            paths = [a for a in args if not a.startswith("-")]
+            if len(paths) > 1 or any(p.startswith("/") for p in paths):
+                return None
+            path = posixpath.normpath(posixpath.join(cwd, *paths[:1]))
+            reads.append((f"ls:{flags}", path))
+        else:
+            return None
+    return reads
+
+
+class _Entry:
+    """The prefetched reads of one codespace."""
+
+    def __init__(self) -> None:
+        self.ready = threading.Event()
+        self.results: dict[tuple[str, str], str] = {}
+        self.seconds = 0.0
+
+
+class Prefetcher:
+    """
+    Fetches the likely next reads of a fresh clone in the background.
+
+    After a clone or checkout, the root listing, READMEs and manifest files
+    are fetched with one remote call while the model is still thinking.
+    `run_in_codespace` calls made only of `cd`/`cat`/`ls` over those paths are
+    then answered from memory; any other command may modify the workspace and
+    drops the prefetched reads of its codespace.
+    """
+
+    def __init__(self, run: Callable[[str, str], Any]) -> None:
+        self.run = run
+        self._entries: dict[str, _Entry] = {}
+        self._predictions: dict[str, tuple[str, list[str]]] = {}
+        self._lock = threading.Lock()
+        self.stats = {"prefetches": 0, "hits": 0, "misses": 0, "saved_seconds": 0.0}
+
+    def start(
+        self, codespace_name: str, clone_dir: str, files: list[str]
+    ) -> threading.Thread:
+        """Starts prefetching ``files`` and the root listing of ``clone_dir``."""
+        with self._lock:
+            entry = _Entry()
+            self._entries[codespace_name] = entry
+            self._predictions[codespace_name] = (clone_dir, files)
+            self.stats["prefetches"] += 1
+        thread = threading.Thread(
+            target=self._fetch,
+            args=(codespace_name, clone_dir, files, entry),
+            name=f"prefetch-{codespace_name}",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def _fetch(
+        self, codespace_name: str, clone_dir: str, files: list[str], entry: _Entry
+    ) -> None:
+        start = time.monotonic()
+        try:
+            result = self.run(codespace_name, build_prefetch_script(clone_dir, files))
+            results = parse_prefetch_output(result.stdout, clone_dir)
+        except Exception as e:
+            logging.info(f"Prefetch in {codespace_name} failed: {e}")
+            results = {}
+        with self._lock:
+            # Results of a prefetch invalidated meanwhile may be stale
+            if self._entries.get(codespace_name) is entry:
+                entry.results = results
+                entry.seconds = time.monotonic() - start
+        entry.ready.set()
+
+    def restart(self, codespace_name: str) -> None:
+        """Prefetches the last prediction again, e.g. after a checkout."""
+        with self._lock:
+            prediction = self._predictions.get(codespace_name)
+        if prediction:
+            self.start(codespace_name, *prediction)
+
+    def invalidate(self, codespace_name: str) -> None:
+        """Drops the prefetched reads of a codespace whose workspace changed."""
+        with self._lock:
+            self._entries.pop(codespace_name, None)
+
+    def forget(self, codespace_name: str) -> None:
+        """Drops everything about a deleted codespace."""
+        with self._lock:
+            self._entries.pop(codespace_name, None)
+            self._predictions.pop(codespace_name, None)
+
+    def serve(
+        self, codespace_name: str, reads: list[tuple[str, str]]
+    ) -> dict[str, Any] | None:
+        """Returns the output of prefetched reads, or None if any is missing."""
+        with self._lock:
+            entry = self._entries.get(codespace_name)
+        if entry is None:
+            return None
+        start = time.monotonic()
+        entry.ready.wait(WAIT_SECONDS)
+        waited = time.monotonic() - start
+        with self._lock:
+            if self._entries.get(codespace_name) is not entry or not all(
+                read in entry.results for read in reads
+            ):
+                return None
+            output = "".join(entry.results[read] for read in reads)
+            # A round trip costs about as long as the prefetch took
+            saved = max(0.0, entry.seconds - waited)
+        return {"output": output, "saved_seconds": saved}
+
+    def record(self, tool_context: Any, hit: bool, saved_seconds: float = 0.0) -> None:
+        """Counts a read served from (or missing) the prefetch, per process and session."""
+        with self._lock:
+            self.stats["hits" if hit else "misses"] += 1
+            self.stats["saved_seconds"] += saved_seconds
+        if tool_context is None:
+            return
+        stats = dict(
+            tool_context.state.get(STATE_KEY)
+            or {"hits": 0, "misses": 0, "saved_seconds": 0.0}
+        )
+        stats["hits" if hit else "misses"] += 1
+        stats["saved_seconds"] = round(stats["saved_seconds"] + saved_seconds, 3)
+        stats["hit_rate"] = round(stats["hits"] / (stats["hits"] + stats["misses"]), 3)
+        tool_context.state[STATE_KEY] = stats
+
+
+def modifies_checkout(commands: str) -> bool:
+    """Whether commands switch or update the checked-out tree."""
+    return bool(_CHECKOUT_RE.search(commands))
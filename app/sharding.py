@@ -0,0 +1,251 @@
+"""Sharded pytest verification across codespaces, balanced by historical durations."""
+
+import json
+import os
+import re
+import shlex
+import threading
+from typing import TypedDict
+
+from google.adk.tools.tool_context import ToolContext
+
+from app import codespace_tools, workflow
+
+DURATIONS_FILE = os.environ.get(
+    "TEST_DURATIONS_FILE", ".repo_reviver/test_durations.json"
+)
+
+# Assumed duration for tests without history, in seconds
+DEFAULT_TEST_SECONDS = 1.0
+
+# Weight of the newest measurement when updating a test's duration
+DURATION_SMOOTHING = 0.5
+
+MAX_FAILED_OUTPUT = 3000
+
+_DURATION_RE = re.compile(r"^\s*([\d.]+)s\s+(setup|call|teardown)\s+(\S+::\S+)")
+_OUTCOME_RE = re.compile(r"^(PASSED|FAILED|ERROR|SKIPPED|XFAIL|XPASS)\s+(\S+::\S+)")
+_SUMMARY_RE = re.compile(r"(\d+) (passed|failed|errors?|skipped|xfailed|xpassed)")
+_SUMMARY_LINE_RE = re.compile(r"\d+ \w+.* in [\d.]+s\b")
+
+
+class Shard(TypedDict):
+    """A planned shard: its tests and their expected total duration."""
+
+    tests: list[str]
+    estimated_seconds: float
+
+
+class DurationStore:
+    """Per-repository test durations persisted as a local JSON file."""
+
+    def __init__(self, path: str = DURATIONS_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def _read(self) -> dict:
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def get(self, repo: str) -> dict[str, float]:
+        """Returns the known durations for a repository's tests."""
+        return self._read().get(repo, {})
+
+    def update(self, repo: str, durations: dict[str, float]) -> None:
+        """Merges new measurements into the stored durations."""
+        with self._lock:
+            data = self._read()
+            known = data.setdefault(repo, {})
+            for test_id, seconds in durations.items():
+                previous = known.get(test_id)
+                known[test_id] = round(
+                    seconds
+                    if previous is None
+                    else DURATION_SMOOTHING * seconds
+                    + (1 - DURATION_SMOOTHING) * previous,
+                    4,
+                )
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+
+
+def parse_collected_tests(output: str) -> list[str]:
+    """Parses test IDs from `pytest --collect-only -q` output."""
+    return [
+        line.strip()
+        for line in output.splitlines()
+        if "::" in line and not line.startswith((" ", "<", "="))
+    ]
+
+
+def plan_shards(
+    test_ids: list[str], durations: dict[str, float], num_shards: int
+) -> list[Shard]:
+    """Splits tests into shards of roughly equal expected duration.
+
+    Uses the longest-processing-time-first heuristic: tests are sorted by
+    expected duration and each is assigned to the currently lightest shard.
+    Tests without history are assumed to take the median known duration.
+
+    Args:
+        test_ids: Tests to distribute
+        durations: Known durations per test ID, in seconds
+        num_shards: Number of shards to create
+
+    Returns:
+        List of shards, each with its test IDs and estimated seconds
+    """
+    known = sorted(durations[t] for t in test_ids if t in durations)
+    fallback = known[len(known) // 2] if known else DEFAULT_TEST_SECONDS
+    expected = {t: durations.get(t, fallback) for t in test_ids}
+
+    shards: list[Shard] = [
+        {"tests": [], "estimated_seconds": 0.0} for _ in range(max(1, num_shards))
+    ]
+    for test_id in sorted(test_ids, key=lambda t: (-expected[t], t)):
+        lightest = min(shards, key=lambda shard: shard["estimated_seconds"])
+        lightest["tests"].append(test_id)
+        lightest["estimated_seconds"] += expected[test_id]
+    for shard in shards:
+        shard["estimated_seconds"] = round(shard["estimated_seconds"], 3)
+    return [shard for shard in shards if shard["tests"]]
+
+
+def build_shard_command(test_ids: list[str], shard_index: int) -> str:
+    """Builds the commands that run one shard with per-test durations reported."""
+    test_list = "\n".join(test_ids)
+    list_file = f"/tmp/repo_reviver_shard_{shard_index}.txt"
+    return f"""cat > {list_file} <<'REPO_REVIVER_SHARD'
+{test_list}
+REPO_REVIVER_SHARD
+mapfile -t TESTS < {list_file}
+python -m pytest -q -rA --durations=0 -p no:cacheprovider "${{TESTS[@]}}"
+"""
+
+
+def parse_shard_output(output: str) -> dict:
+    """Parses outcomes, per-test durations and counts from a shard's pytest output."""
+    durations: dict[str, float] = {}
+    failed_tests = []
+    counts: dict[str, int] = {}
+    for line in output.splitlines():
+        duration = _DURATION_RE.match(line)
+        if duration:
+            seconds, _, test_id = duration.groups()
+            durations[test_id] = round(durations.get(test_id, 0.0) + float(seconds), 4)
+            continue
+        outcome = _OUTCOME_RE.match(line)
+        if outcome and outcome.group(1) in ("FAILED", "ERROR"):
+            failed_tests.append(outcome.group(2))
+        if _SUMMARY_LINE_RE.search(line):
+            for number, kind in _SUMMARY_RE.findall(line):
+                kind = "errors" if kind.startswith("error") else kind
+                counts[kind] = int(number)
+    return {"durations": durations, "failed_tests": failed_tests, "counts": counts}
+
+
+def run_sharded_tests(
+    codespace_names: list[str],
+    cwd: str = "repo",
+    num_shards: int = 0,
+    tool_context: ToolContext | None = None,
+) -> dict:
+    """Runs a pytest suite split into parallel shards across codespaces.
+
+    Discovers tests with `pytest --collect-only`, balances them into shards by
+    historical duration, runs the shards concurrently (several shards on one
+    codespace run as separate processes) and merges the results. Durations are
+    saved so sharding improves across runs. Use it for Python projects whose
+    full suite is too slow for a single `run_in_codespace` call.
+
+    Args:
+        codespace_names: Codespaces to run shards on (the repo must be cloned in each)
+        cwd: Directory of the project inside the codespaces
+        num_shards: Number of shards (default: 2 per codespace)
+
+    Returns:
+        dict with merged pass/fail counts, failed tests and per-shard timings
+    """
+    if not codespace_names:
+        return {"status": "error", "error": "No codespaces given"}
+
+    collected = codespace_tools.run_in_codespace(
+        codespace_names[0],
+        f"cd {shlex.quote(cwd)} && python -m pytest --collect-only -q",
+    )
+    if collected["status"] != "success":
+        return {
+            "status": "error",
+            "error": "Test discovery failed",
+            "details": collected,
+        }
+    test_ids = parse_collected_tests(collected["output"])
+    if not test_ids:
+        return {
+            "status": "error",
+            "error": "No tests collected",
+            "output": collected["output"][-MAX_FAILED_OUTPUT:],
+        }
+
+    repo = workflow.get_progress(tool_context).get("repo") or cwd
+    store = DurationStore()
+    history = store.get(repo)
+    shards = plan_shards(test_ids, history, num_shards or 2 * len(codespace_names))
+
+    targets = [
+        {
+            "codespace_name": codespace_names[index % len(codespace_names)],
+            "cwd": cwd,
+            "label": f"shard-{index}",
+            "commands": build_shard_command(shard["tests"], index),
+        }
+        for index, shard in enumerate(shards)
+    ]
+    fan_out = codespace_tools.run_in_codespaces(targets, max_concurrency=len(targets))
+
+    counts: dict[str, int] = {}
+    failed_tests = []
+    measured: dict[str, float] = {}
+    shard_reports = []
+    for shard, result in zip(shards, fan_out["results"], strict=True):
+        # pytest exits non-zero when tests fail, so parse both outcomes
+        output = result.get("output") or ""
+        parsed = parse_shard_output(output)
+        measured.update(parsed["durations"])
+        failed_tests.extend(parsed["failed_tests"])
+        for kind, number in parsed["counts"].items():
+            counts[kind] = counts.get(kind, 0) + number
+        report = {
+            "shard": result["target"],
+            "codespace_name": result["codespace_name"],
+            "tests": len(shard["tests"]),
+            "estimated_seconds": shard["estimated_seconds"],
+            "duration_seconds": result.get("duration_seconds"),
+            "counts": parsed["counts"],
+        }
+        if not parsed["counts"]:
+            # No pytest summary: the shard crashed or timed out
+            report["error"] = result.get("error")
+            report["output_tail"] = output[-MAX_FAILED_OUTPUT:]
+        shard_reports.append(report)
+
+    if measured:
+        store.update(repo, measured)
+
+    crashed = [report for report in shard_reports if "error" in report]
+    return {
+        "status": "success" if not failed_tests and not crashed else "failed",
+        "total_tests": len(test_ids),
+        "counts": counts,
+        "failed_tests": failed_tests,
+        "wall_seconds": fan_out["wall_seconds"],
+        "serial_seconds": fan_out["serial_seconds"],
+        "used_history": bool(history),
+        "shards": shard_reports,
+    }
@@ -0,0 +1,119 @@
+"""Resumable revival workflow checkpoints stored in ADK session state."""
+
+import datetime
+import re
+from typing import Any
+
+# Session state key holding the revival progress for the session
+STATE_KEY = "revival"
+
+CODESPACE_CREATED = "codespace_created"
+CLONED = "cloned"
+BRANCH_CREATED = "branch_created"
+FIXES_APPLIED = "fixes_applied"
+PR_OPENED = "pr_opened"
+
+PHASES = [CODESPACE_CREATED, CLONED, BRANCH_CREATED, FIXES_APPLIED, PR_OPENED]
+
+_BRANCH_RE = re.compile(r"git\s+(?:checkout\s+-[bB]|switch\s+-[cC])\s+(\S+)")
+_COMMIT_RE = re.compile(r"git\s+commit\b")
+_PR_CREATE_RE = re.compile(r"gh\s+pr\s+create\b")
+_PR_URL_RE = re.compile(r"https://github\.com/\S+/pull/\d+")
+
+
+def get_progress(tool_context: Any) -> dict:
+    """Returns the revival progress recorded in the session, if any."""
+    if tool_context is None:
+        return {}
+    return dict(tool_context.state.get(STATE_KEY) or {})
+
+
+def start_revival(
+    tool_context: Any, repo: str, codespace_name: str, seconds: float
+) -> None:
+    """Records a freshly created codespace, resetting progress for a new repo."""
+    if tool_context is None:
+        return
+    progress = get_progress(tool_context)
+    if progress.get("repo") != repo:
+        progress = {"repo": repo, "phases": {}}
+    progress["codespace_name"] = codespace_name
+    tool_context.state[STATE_KEY] = progress
+    record_phase(
+        tool_context, CODESPACE_CREATED, seconds=seconds, codespace_name=codespace_name
+    )
+
+
+def record_phase(tool_context: Any, phase: str, **details: Any) -> None:
+    """Records a completed workflow phase in session state.
+
+    The whole progress dict is reassigned so the session service persists the
+    change as a state delta on the tool response event.
+    """
+    if tool_context is None:
+        return
+    progress = get_progress(tool_context)
+    phases = dict(progress.get("phases") or {})
+    phases[phase] = {"at": datetime.datetime.now().isoformat(), **details}
+    progress["phases"] = phases
+    tool_context.state[STATE_KEY] = progress
+
+
+def forget_codespace(tool_context: Any, codespace_name: str) -> None:
+    """Drops the codespace handle once it has been deleted."""
+    progress = get_progress(tool_context)
+    if progress.get("codespace_name") == codespace_name:
+        progress.pop("codespace_name")
+        tool_context.state[STATE_KEY] = progress
+
+
+def completed_phases(progress: dict) -> list[str]:
+    """Returns the completed phases in workflow order."""
+    phases = progress.get("phases") or {}
+    return [phase for phase in PHASES if phase in phases]
+
+
+def resume_summary(progress: dict, recovery_seconds: float) -> dict:
+    """Describes a resumed revival and how much time resuming saved.
+
+    `saved_seconds` compares the original cost of the skipped create/clone
+    phases with the time it took to reattach, i.e. recovery versus restarting
+    from scratch.
+    """
+    phases = progress.get("phases") or {}
+    skipped_cost = sum(
+        phases.get(phase, {}).get("seconds", 0.0)
+        for phase in (CODESPACE_CREATED, CLONED)
+    )
+    next_phase = next((p for p in PHASES if p not in phases), None)
+    return {
+        "resumed": True,
+        "completed_phases": completed_phases(progress),
+        "next_phase": next_phase,
+        "phase_details": phases,
+        "recovery_seconds": round(recovery_seconds, 3),
+        "saved_seconds": round(max(skipped_cost - recovery_seconds, 0.0), 3),
+    }
+
+
+def detect_phases(commands: str, output: str | None) -> list[tuple[str, dict]]:
+    """Infers completed workflow phases from a successful codespace command.
+
+    Args:
+        commands: Commands passed to `run_in_codespace`
+        output: stdout of the commands
+
+    Returns:
+        List of (phase, details) tuples
+    """
+    detected = []
+    branch = _BRANCH_RE.search(commands)
+    if branch:
+        detected.append((BRANCH_CREATED, {"branch": branch.group(1)}))
+    if _COMMIT_RE.search(commands):
+        detected.append((FIXES_APPLIED, {}))
+    if _PR_CREATE_RE.search(commands):
+        url = _PR_URL_RE.search(output or "")
+        if url:
+            detected.append((PR_OPENED, {"url": url.group(0)}))
+    return detected
@@ -0,0 +1,118 @@
+"""Throughput and allocation benchmark for CloudTraceLoggingSpanExporter.
+
+Compares the legacy ``to_json``/``json.loads``/``json.dumps`` span encoding with
+the direct encoder, then measures full ``export`` throughput against fake
+Logging, Storage and Trace clients.
+
+Usage:
+    uv run python tests/benchmarks/exporter_benchmark.py --spans 2000 --prompt-kb 64
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Sequence
+from typing import Any, cast
+
+from google.cloud import logging as google_cloud_logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.app_utils.tracing import (
+    MAX_ATTRIBUTES_BYTES,
+    CloudTraceLoggingSpanExporter,
+    estimate_json_size,
+    span_to_dict,
+)
+from tests.benchmarks.fakes import (
+    FakeLoggingClient,
+    FakeStorageClient,
+    FakeTraceClient,
+    make_spans,
+)
+
+
+def legacy_encode(span: Any) -> bool:
+    span_dict = json.loads(span.to_json())
+    return len(json.dumps(span_dict["attributes"]).encode()) > MAX_ATTRIBUTES_BYTES
+
+
+def direct_encode(span: Any) -> bool:
+    span_dict = span_to_dict(span)
+    attributes = span_dict["attributes"]
+    return (
+        estimate_json_size(attributes, limit=MAX_ATTRIBUTES_BYTES)
+        > MAX_ATTRIBUTES_BYTES
+    )
+
+
+def measure(
+    name: str, spans: Sequence[Any], fn: Callable[[Sequence[Any]], Any]
+) -> dict[str, Any]:
+    """Measure spans/sec, then peak traced memory and retained blocks per span."""
+    start = time.perf_counter()
+    fn(spans)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    fn(spans)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = after.compare_to(before, "filename")
+    allocated_blocks = sum(max(stat.count_diff, 0) for stat in stats)
+
+    return {
+        "name": name,
+        "spans_per_sec": round(len(spans) / elapsed, 1),
+        "peak_traced_kb": round(peak / 1024, 1),
+        "retained_blocks_per_span": round(allocated_blocks / len(spans), 2),
+    }
+
+
+def build_exporter() -> CloudTraceLoggingSpanExporter:
+    return CloudTraceLoggingSpanExporter(
+        project_id="benchmark",
+        client=FakeTraceClient(),
+        logging_client=cast(google_cloud_logging.Client, FakeLoggingClient()),
+        storage_client=FakeStorageClient(),
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--spans", type=int, default=1000)
+    parser.add_argument("--prompt-kb", type=int, default=32)
+    parser.add_argument("--batch-size", type=int, default=512)
+    args = parser.parse_args()
+
+    spans = make_spans(args.spans, prompt_bytes=args.prompt_kb * 1024)
+    exporter = build_exporter()
+
+    def export_all(items: Sequence[Any]) -> None:
+        for offset in range(0, len(items), args.batch_size):
+            exporter.export(items[offset : offset + args.batch_size])
+
+    results = [
+        measure(
+            "encode:legacy", spans, lambda items: [legacy_encode(s) for s in items]
+        ),
+        measure(
+            "encode:direct", spans, lambda items: [direct_encode(s) for s in items]
+        ),
+        measure("export", spans, export_all),
+    ]
+    print(
+        json.dumps(
+            {"spans": args.spans, "prompt_kb": args.prompt_kb, "results": results},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""In-process fakes for the Google Cloud clients used by the telemetry exporter."""
+
+import random
+import string
+import time
+from typing import Any
+
+from google.api_core import exceptions
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+
+class FakeLogBatch:
+    def __init__(self, logger: "FakeLogger") -> None:
+        self.logger = logger
+        self.entries: list[dict[str, Any]] = []
+
+    def log_struct(self, info: dict[str, Any], **kwargs: Any) -> None:
+        self.entries.append(info)
+
+    def commit(self, *, partial_success: bool = True) -> None:
+        if self.logger.commit_delay:
+            time.sleep(self.logger.commit_delay)
+        # Like Cloud Logging, partial success writes the valid entries of a
+        # batch before reporting the invalid ones
+        valid = [info for info in self.entries if self.logger.is_valid(info)]
+        if partial_success or len(valid) == len(self.entries):
+            self.logger.commits.append(len(valid))
+            self.logger.entries.extend(valid)
+        if len(valid) < len(self.entries):
+            raise exceptions.InvalidArgument("invalid log entry")
+
+
+class FakeLogger:
+    """Local logging sink recording committed batches, with optional latency.
+
+    ``commit_delay`` is the simulated latency of one write API call, i.e. of
+    each ``log_struct`` call and of each batch commit. Entries containing the
+    ``invalid_key`` are rejected like malformed entries.
+    """
+
+    def __init__(
+        self, commit_delay: float = 0.0, invalid_key: str | None = None
+    ) -> None:
+        self.commit_delay = commit_delay
+        self.invalid_key = invalid_key
+        self.entries: list[dict[str, Any]] = []
+        self.commits: list[int] = []
+
+    def is_valid(self, info: dict[str, Any]) -> bool:
+        return self.invalid_key is None or self.invalid_key not in info
+
+    def validate(self, info: dict[str, Any]) -> None:
+        if not self.is_valid(info):
+            raise exceptions.InvalidArgument("invalid log entry")
+
+    def log_struct(self, info: dict[str, Any], **kwargs: Any) -> None:
+        if self.commit_delay:
+            time.sleep(self.commit_delay)
+        self.validate(info)
+        self.entries.append(info)
+
+    def batch(self) -> FakeLogBatch:
+        return FakeLogBatch(self)
+
+
+class FakeLoggingClient:
+    def __init__(self) -> None:
+        self.fake_logger = FakeLogger()
+
+    def logger(self, name: str) -> FakeLogger:
+        return self.fake_logger
+
+
+class FakeBlob:
+    def __init__(self, bucket: "FakeBucket", name: str) -> None:
+        self.bucket = bucket
+        self.name = name
+        self.content_encoding: str | None = None
+        self.generation: int | None = None
+
+    def upload_from_string(
+        self,
+        data: Any,
+        content_type: str | None = None,
+        if_generation_match: int | None = None,
+        **kwargs: Any,
+    ) -> None:
+        if self.bucket.upload_delay:
+            time.sleep(self.bucket.upload_delay)
+        if self.bucket.failures_left:
+            self.bucket.failures_left -= 1
+            raise exceptions.ServiceUnavailable("upload failed")
+        current = self.bucket.generations.get(self.name, 0)
+        if if_generation_match is not None and if_generation_match != current:
+            raise exceptions.PreconditionFailed("generation mismatch")
+        self.bucket.uploads += 1
+        self.bucket.objects[self.name] = data
+        self.bucket.generations[self.name] = current + 1
+
+    def exists(self, **kwargs: Any) -> bool:
+        return self.name in self.bucket.objects
+
+    def download_as_bytes(self, **kwargs: Any) -> bytes:
+        if self.name not in self.bucket.objects:
+            raise exceptions.NotFound("no such object")
+        self.generation = self.bucket.generations[self.name]
+        data = self.bucket.objects[self.name]
+        return data.encode() if isinstance(data, str) else data
+
+
+class FakeBucket:
+    """Local bucket with optional upload latency and transient failures."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.objects: dict[str, Any] = {}
+        self.generations: dict[str, int] = {}
+        self.upload_delay = 0.0
+        self.failures_left = 0
+        self.uploads = 0
+        self.exists_calls = 0
+
+    def exists(self) -> bool:
+        self.exists_calls += 1
+        return True
+
+    def blob(self, name: str) -> FakeBlob:
+        return FakeBlob(self, name)
+
+
+class FakeStorageClient:
+    def __init__(self) -> None:
+        self.buckets: dict[str, FakeBucket] = {}
+
+    def bucket(self, name: str) -> FakeBucket:
+        return self.buckets.setdefault(name, FakeBucket(name))
+
+
+class FakeTraceClient:
+    def __init__(self) -> None:
+        self.requests: list[Any] = []
+
+    def batch_write_spans(self, request: Any) -> None:
+        self.requests.append(request)
+
+
+def make_spans(count: int, prompt_bytes: int = 8 * 1024, seed: int = 0) -> list[Any]:
+    """Create finished spans shaped like ADK LLM calls with large prompt attributes."""
+    rng = random.Random(seed)
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer("benchmark")
+    alphabet = string.ascii_letters + string.digits + ' \n"'
+    for index in range(count):
+        prompt = "".join(rng.choices(alphabet, k=prompt_bytes))
+        with tracer.start_as_current_span("invocation"):
+            with tracer.start_as_current_span(
+                "call_llm",
+                attributes={
+                    "gen_ai.system": "gcp.vertex.agent",
+                    "gen_ai.request.model": "gemini-2.5-flash",
+                    "gcp.vertex.agent.llm_request": prompt,
+                    "gcp.vertex.agent.llm_response": prompt[: prompt_bytes // 4],
+                    "gcp.vertex.agent.invocation_id": f"e-{index}",
+                    "gen_ai.usage.input_tokens": prompt_bytes // 4,
+                },
+            ):
+                pass
+    return list(exporter.get_finished_spans())
@@ -0,0 +1,86 @@
+"""Request latency benchmark for feedback ingestion under a burst.
+
+Submits a burst of feedback from concurrent request threads and compares a
+synchronous ``log_struct`` per request with ``BufferedFeedbackSink``, against
+a fake logger that takes ``--write-ms`` per write API call.
+
+Usage:
+    uv run python tests/benchmarks/feedback_benchmark.py --requests 2000 --threads 16
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, cast
+
+from google.cloud import logging as google_cloud_logging
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+from app.app_utils.feedback import BufferedFeedbackSink
+from app.app_utils.typing import Feedback
+from tests.benchmarks.fakes import FakeLogger
+
+
+def measure(
+    name: str, submit: Callable[[dict[str, Any]], None], requests: int, threads: int
+) -> dict[str, Any]:
+    """Run the burst and report per-request latency percentiles in milliseconds."""
+
+    def timed(index: int) -> float:
+        start = time.perf_counter()
+        submit({"score": index % 5, "text": "ok", "invocation_id": f"e-{index}"})
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        latencies = sorted(executor.map(timed, range(requests)))
+    elapsed = time.perf_counter() - start
+    return {
+        "name": name,
+        "p50_ms": round(latencies[len(latencies) // 2], 3),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)], 3),
+        "max_ms": round(latencies[-1], 3),
+        "burst_seconds": round(elapsed, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--write-ms", type=float, default=20.0)
+    args = parser.parse_args()
+
+    sync_logger = FakeLogger(commit_delay=args.write_ms / 1000)
+
+    def submit_sync(feedback: dict[str, Any]) -> None:
+        sync_logger.log_struct(
+            Feedback.model_validate(feedback).model_dump(), severity="INFO"
+        )
+
+    buffered_logger = FakeLogger(commit_delay=args.write_ms / 1000)
+    sink = BufferedFeedbackSink(cast(google_cloud_logging.Logger, buffered_logger))
+    results = [
+        measure("sync", submit_sync, args.requests, args.threads),
+        measure("buffered", sink.submit, args.requests, args.threads),
+    ]
+    start = time.perf_counter()
+    sink.shutdown()
+    results[-1]["drain_seconds"] = round(time.perf_counter() - start, 3)
+    results[-1]["write_calls"] = len(buffered_logger.commits)
+    assert len(buffered_logger.entries) == args.requests
+    print(
+        json.dumps(
+            {"requests": args.requests, "threads": args.threads, "results": results},
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
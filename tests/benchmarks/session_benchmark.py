@@ -0,0 +1,109 @@
+"""Deterministic full-session benchmark from a recorded cassette.
+
+Records one session of ``root_agent`` against the live model and GitHub, or
+replays it: model responses and ``gh``/``git`` outputs come from the cassette,
+so every run follows the same path. With ``--latency zero`` the wall time is
+the pure orchestration overhead (ADK, plugins, tools, telemetry).
+
+Usage:
+    uv run python tests/benchmarks/session_benchmark.py --record \
+        --cassette .repo_reviver/cassettes/itsdangerous.jsonl \
+        --prompt "Analyze https://github.com/pallets/itsdangerous"
+    uv run python tests/benchmarks/session_benchmark.py \
+        --cassette .repo_reviver/cassettes/itsdangerous.jsonl --runs 20 --latency zero
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", ".."))
+
+
+async def run_session(prompt: str) -> dict[str, Any]:
+    """Run one session of the app and time it."""
+    from google.adk.runners import InMemoryRunner
+    from google.genai import types
+
+    from app.agent import app
+
+    runner = InMemoryRunner(app=app)
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="benchmark"
+    )
+    message = types.Content(role="user", parts=[types.Part(text=prompt)])
+    events = 0
+    start = time.perf_counter()
+    async for _ in runner.run_async(
+        user_id="benchmark", session_id=session.id, new_message=message
+    ):
+        events += 1
+    return {"seconds": time.perf_counter() - start, "events": events}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cassette", required=True)
+    parser.add_argument("--prompt", help="Prompt of the session (replayed as recorded)")
+    parser.add_argument("--record", action="store_true", help="Record a new cassette")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--latency", choices=["original", "zero"], default="zero")
+    args = parser.parse_args()
+
+    # Read by app.agent when it is first imported
+    os.environ["REPO_REVIVER_CASSETTE"] = args.cassette
+    os.environ["REPO_REVIVER_CASSETTE_MODE"] = "record" if args.record else "replay"
+    os.environ["REPO_REVIVER_CASSETTE_LATENCY"] = args.latency
+    if not args.record:
+        # Replayed gh calls never reach GitHub
+        os.environ.setdefault("GH_RATE_LIMIT_PER_MINUTE", "0")
+
+    if args.record:
+        if not args.prompt:
+            parser.error("--record requires --prompt")
+        result = asyncio.run(run_session(args.prompt))
+        with open(args.cassette + ".prompt", "w") as f:
+            f.write(args.prompt)
+        print(json.dumps({"recorded": args.cassette, **result}, indent=2))
+        return
+
+    from app.agent import cassette_plugin
+
+    # Enabled by $REPO_REVIVER_CASSETTE above
+    assert cassette_plugin is not None
+    prompt = args.prompt
+    if prompt is None:
+        with open(args.cassette + ".prompt") as f:
+            prompt = f.read()
+    recorded_seconds = cassette_plugin.cassette.recorded_seconds
+    runs = []
+    for _ in range(args.runs):
+        # Every run consumes the cassette from the start
+        cassette_plugin.cassette.rewind()
+        runs.append(asyncio.run(run_session(prompt)))
+
+    seconds = sorted(run["seconds"] for run in runs)
+    print(
+        json.dumps(
+            {
+                "cassette": args.cassette,
+                "latency": args.latency,
+                "runs": args.runs,
+                "events": runs[0]["events"],
+                "recorded_call_seconds": round(recorded_seconds, 3),
+                "p50_seconds": round(statistics.median(seconds), 4),
+                "min_seconds": round(seconds[0], 4),
+                "max_seconds": round(seconds[-1], 4),
+            },
+            indent=2,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
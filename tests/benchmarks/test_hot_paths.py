@@ -0,0 +1,139 @@
+"""Microbenchmarks for tool and telemetry hot paths (pytest-benchmark).
+
+Not part of ``make test``; run with ``make bench``, which saves every run and
+fails when a benchmark regresses against the previous one.
+"""
+
+import os
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Any, cast
+
+import pytest
+from google.cloud import logging as google_cloud_logging
+from pytest_benchmark.fixture import BenchmarkFixture
+
+from app.app_utils.instrumentation import instrument_tool
+from app.app_utils.tracing import CloudTraceLoggingSpanExporter
+from app.codespace_tools import create_codespace, list_codespaces, run_in_codespace
+from app.git_operations import read_file, write_file
+from app.tools import analyze_repo_structure
+from tests.benchmarks.fakes import (
+    FakeLoggingClient,
+    FakeStorageClient,
+    FakeTraceClient,
+    make_spans,
+)
+from tests.load_test.mock_agent_engine import install_fake_gh
+
+# Each fake gh call starts a Python interpreter; keep those rounds bounded
+GH_ROUNDS = 10
+
+
+def _make_tree(root: str, directories: int, files_per_directory: int) -> None:
+    for directory in range(directories):
+        path = os.path.join(root, "src", f"package_{directory}")
+        os.makedirs(path)
+        for index in range(files_per_directory):
+            with open(os.path.join(path, f"module_{index}.py"), "w") as f:
+                f.write("x = 1\n")
+    for name in ("README.md", "Makefile", "requirements.txt"):
+        with open(os.path.join(root, name), "w") as f:
+            f.write("\n")
+
+
+@pytest.fixture(scope="module", params=[(10, 10), (100, 50)], ids=["100", "5000"])
+def synthetic_repo(
+    request: pytest.FixtureRequest, tmp_path_factory: pytest.TempPathFactory
+) -> str:
+    root = tmp_path_factory.mktemp("repo")
+    _make_tree(str(root), *request.param)
+    return str(root)
+
+
+@pytest.fixture(scope="module")
+def fake_gh(tmp_path_factory: pytest.TempPathFactory) -> Iterator[None]:
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setenv("PATH", os.environ.get("PATH", ""))
+        monkeypatch.setenv("MOCK_GH_LATENCY_SECONDS", "0")
+        install_fake_gh(str(tmp_path_factory.mktemp("gh")))
+        yield
+
+
+@pytest.fixture
+def exporter() -> Iterator[CloudTraceLoggingSpanExporter]:
+    exporter = CloudTraceLoggingSpanExporter(
+        project_id="benchmark",
+        client=FakeTraceClient(),
+        logging_client=cast(google_cloud_logging.Client, FakeLoggingClient()),
+        storage_client=FakeStorageClient(),
+    )
+    yield exporter
+    exporter.shutdown()
+
+
+def test_analyze_repo_structure(
+    benchmark: BenchmarkFixture, synthetic_repo: str
+) -> None:
+    result = benchmark(analyze_repo_structure, synthetic_repo)
+    assert "Makefile" in result
+
+
+@pytest.mark.parametrize("size_mb", [1, 16])
+def test_read_file(benchmark: BenchmarkFixture, tmp_path: Path, size_mb: int) -> None:
+    (tmp_path / "large.txt").write_text("line of text\n" * (size_mb * 80_000))
+    result = benchmark(read_file, str(tmp_path), "large.txt")
+    assert result["status"] == "success"
+
+
+@pytest.mark.parametrize("size_mb", [1, 16])
+def test_write_file(benchmark: BenchmarkFixture, tmp_path: Path, size_mb: int) -> None:
+    content = "line of text\n" * (size_mb * 80_000)
+    result = benchmark(write_file, str(tmp_path), "nested/large.txt", content)
+    assert result["status"] == "success"
+
+
+def test_create_codespace(benchmark: BenchmarkFixture, fake_gh: None) -> None:
+    # gh codespace create followed by the bootstrap over gh codespace ssh
+    result = benchmark.pedantic(
+        create_codespace, args=("owner/repo",), rounds=GH_ROUNDS
+    )
+    assert result["bootstrap"]["status"] == "success"
+
+
+def test_run_in_codespace(benchmark: BenchmarkFixture, fake_gh: None) -> None:
+    result = benchmark.pedantic(
+        run_in_codespace, args=("cs", "pytest -q"), rounds=GH_ROUNDS
+    )
+    assert result["status"] == "success"
+
+
+def test_list_codespaces(benchmark: BenchmarkFixture, fake_gh: None) -> None:
+    result = benchmark.pedantic(list_codespaces, rounds=GH_ROUNDS)
+    assert result["count"] == 0
+
+
+@pytest.mark.parametrize("output_mb", [1, 8])
+def test_large_command_log(
+    benchmark: BenchmarkFixture,
+    fake_gh: None,
+    monkeypatch: pytest.MonkeyPatch,
+    output_mb: int,
+) -> None:
+    # Capture, phase detection and output size metrics for a verbose command
+    monkeypatch.setenv("MOCK_GH_OUTPUT_BYTES", str(output_mb * 1024 * 1024))
+    tool = instrument_tool(run_in_codespace)
+    result = benchmark.pedantic(
+        tool, args=("cs", "npm test -- --verbose"), rounds=GH_ROUNDS
+    )
+    assert len(result["output"]) > output_mb * 1024 * 1024
+
+
+@pytest.mark.parametrize("prompt_kb", [2, 64])
+def test_exporter_export(
+    benchmark: BenchmarkFixture,
+    exporter: CloudTraceLoggingSpanExporter,
+    prompt_kb: int,
+) -> None:
+    spans: list[Any] = make_spans(200, prompt_bytes=prompt_kb * 1024)
+    benchmark(exporter.export, spans)
@@ -15,9 +15,16 @@
 import json
 import logging
 import os
+import random
 import time
+import uuid
 
-from locust import HttpUser, between, task
+from locust import HttpUser, LoadTestShape, between, task
+from locust.clients import ResponseContextManager
+
+# Locust puts the locustfile's directory on sys.path
+from scenarios import load_scenarios, pick_scenario
+from stream_timing import StreamTimer, parse_sse_line
 
 # Configure logging
 logging.basicConfig(
@@ -25,9 +32,15 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Local mock server (tests/load_test/mock_agent_engine.py), if any
+mock_url = os.environ.get("MOCK_AGENT_ENGINE_URL")
+
 # Initialize Vertex AI and load agent config
-with open("deployment_metadata.json") as f:
-    remote_agent_engine_id = json.load(f)["remote_agent_engine_id"]
+if mock_url:
+    remote_agent_engine_id = "projects/local/locations/local/reasoningEngines/mock"
+else:
+    with open("deployment_metadata.json") as f:
+        remote_agent_engine_id = json.load(f)["remote_agent_engine_id"]
 
 parts = remote_agent_engine_id.split("/")
 project_id = parts[1]
@@ -35,94 +48,181 @@ location = parts[3]
 engine_id = parts[5]
 
 # Convert remote agent engine ID to streaming URL.
-base_url = f"https://{location}-aiplatform.googleapis.com"
+base_url = mock_url or f"https://{location}-aiplatform.googleapis.com"
 url_path = f"/v1/projects/{project_id}/locations/{location}/reasoningEngines/{engine_id}:streamQuery"
 
 logger.info("Using remote agent engine ID: %s", remote_agent_engine_id)
 logger.info("Using base URL: %s", base_url)
 logger.info("Using URL path: %s", url_path)
 
+SCENARIOS = load_scenarios()
+logger.info("Replaying scenarios: %s", ", ".join(s.name for s in SCENARIOS))
+
+# Step ramp used to find the saturation point (see README)
+RAMP_STEP_USERS = int(os.environ.get("LOAD_TEST_STEP_USERS", "2"))
+RAMP_STEP_SECONDS = int(os.environ.get("LOAD_TEST_STEP_SECONDS", "120"))
+RAMP_MAX_USERS = int(os.environ.get("LOAD_TEST_MAX_USERS", "20"))
+# A step is saturated when its p95 exceeds this multiple of the first step's p95,
+# or when more than this fraction of its requests fail
+SATURATION_P95_FACTOR = float(os.environ.get("LOAD_TEST_SATURATION_P95_FACTOR", "2"))
+SATURATION_FAILURE_RATIO = float(
+    os.environ.get("LOAD_TEST_SATURATION_FAILURE_RATIO", "0.05")
+)
+# Labels for the deployment settings under test, logged with the result
+DEPLOYMENT_CONFIG = {
+    "container_concurrency": os.environ.get("CONTAINER_CONCURRENCY", "unset"),
+    "num_workers": os.environ.get("NUM_WORKERS", "unset"),
+}
 
-class ChatStreamUser(HttpUser):
-    """Simulates a user interacting with the chat stream API."""
+
+class RevivalUser(HttpUser):
+    """Replays revival prompts against the stream API and times each phase."""
 
     wait_time = between(1, 3)  # Wait 1-3 seconds between tasks
     host = base_url  # Set the base host URL for Locust
 
+    def on_start(self) -> None:
+        self.rng = random.Random()
+        self.user_id = f"load-test-{uuid.uuid4().hex[:8]}"
+
+    def _fire(
+        self,
+        name: str,
+        seconds: float,
+        response: ResponseContextManager,
+        length: int = 0,
+    ) -> None:
+        self.environment.events.request.fire(
+            request_type="PHASE",
+            name=name,
+            response_time=seconds * 1000,  # Convert to milliseconds
+            response_length=length,
+            response=response,
+            context={},
+        )
+
     @task
-    def chat_stream(self) -> None:
-        """Simulates a chat stream interaction."""
+    def revive(self) -> None:
+        """Sends one scenario prompt and records per-phase latencies."""
+        scenario = pick_scenario(SCENARIOS, self.rng)
         headers = {"Content-Type": "application/json"}
-        headers["Authorization"] = f"Bearer {os.environ['_AUTH_TOKEN']}"
+        if not mock_url:
+            headers["Authorization"] = f"Bearer {os.environ['_AUTH_TOKEN']}"
 
         data = {
             "class_method": "async_stream_query",
-            "input": {
-                "user_id": "test",
-                "message": "What's the weather in San Francisco?",
-            },
+            "input": {"user_id": self.user_id, "message": scenario.prompt},
         }
 
-        start_time = time.time()
+        timer = StreamTimer(time.perf_counter())
         with self.client.post(
             url_path,
             headers=headers,
             json=data,
             catch_response=True,
-            name="/streamQuery async_stream_query",
+            name=f"/streamQuery {scenario.name}",
             stream=True,
             params={"alt": "sse"},
         ) as response:
-            if response.status_code == 200:
-                events = []
-                has_error = False
-                for line in response.iter_lines():
-                    if line:
-                        line_str = line.decode("utf-8")
-                        events.append(line_str)
-
-                        if "429 Too Many Requests" in line_str:
-                            self.environment.events.request.fire(
-                                request_type="POST",
-                                name=f"{url_path} rate_limited 429s",
-                                response_time=0,
-                                response_length=len(line),
-                                response=response,
-                                context={},
-                            )
-
-                        # Check for error responses in the JSON payload
-                        try:
-                            event_data = json.loads(line_str)
-                            if isinstance(event_data, dict) and "code" in event_data:
-                                # Flag any non-2xx codes as errors
-                                if event_data["code"] >= 400:
-                                    has_error = True
-                                    error_msg = event_data.get(
-                                        "message", "Unknown error"
-                                    )
-                                    response.failure(f"Error in response: {error_msg}")
-                                    logger.error(
-                                        "Received error response: code=%s, message=%s",
-                                        event_data["code"],
-                                        error_msg,
-                                    )
-                        except json.JSONDecodeError:
-                            # If it's not valid JSON, continue processing
-                            pass
-
-                end_time = time.time()
-                total_time = end_time - start_time
-
-                # Only fire success event if no errors were found
-                if not has_error:
-                    self.environment.events.request.fire(
-                        request_type="POST",
-                        name="/streamQuery end",
-                        response_time=total_time * 1000,  # Convert to milliseconds
-                        response_length=len(events),
-                        response=response,
-                        context={},
-                    )
-            else:
+            if response.status_code != 200:
                 response.failure(f"Unexpected status code: {response.status_code}")
+                return
+
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                line_str = line.decode("utf-8")
+                if "429 Too Many Requests" in line_str:
+                    self._fire(f"{url_path} rate_limited 429s", 0, response, len(line))
+                event = parse_sse_line(line_str)
+                if event is not None:
+                    timer.feed(event, time.perf_counter())
+
+            total_time = timer.total(time.perf_counter())
+            if timer.errors:
+                response.failure(f"Error in response: {timer.errors[0]}")
+                logger.error("Received error response: %s", timer.errors[0])
+                return
+
+            for phase, seconds in timer.phases:
+                self._fire(phase, seconds, response)
+            self._fire("/streamQuery end", total_time, response, timer.events)
+
+
+class SaturationRamp(LoadTestShape):
+    """
+    Adds RAMP_STEP_USERS every RAMP_STEP_SECONDS up to RAMP_MAX_USERS and stops
+    at the first step whose end-to-end p95 or failure ratio shows saturation.
+
+    Used when the locustfile is run with ``LOAD_TEST_RAMP=1``; otherwise the
+    ``-u``/``-r``/``-t`` command line options apply.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.baseline_p95: float | None = None
+        self.step = 0
+        self.stopped = False
+
+    def _step_stats(self) -> tuple[float, float, int]:
+        entry = self.runner.stats.get("/streamQuery end", "PHASE")
+        total = self.runner.stats.total
+        failure_ratio = (
+            total.num_failures / total.num_requests if total.num_requests else 0.0
+        )
+        return (
+            entry.get_response_time_percentile(0.95),
+            failure_ratio,
+            entry.num_requests,
+        )
+
+    def tick(self) -> tuple[int, float] | None:
+        if self.stopped:
+            return None
+        step = int(self.get_run_time() // RAMP_STEP_SECONDS)
+        if step != self.step:
+            if self._saturated():
+                self.stopped = True
+                return None
+            self.step = step
+            # Measure every step on its own
+            self.runner.stats.reset_all()
+        users = RAMP_STEP_USERS * (self.step + 1)
+        if users > RAMP_MAX_USERS:
+            logger.info(
+                "No saturation up to %d users (%s)", RAMP_MAX_USERS, DEPLOYMENT_CONFIG
+            )
+            return None
+        return users, RAMP_STEP_USERS
+
+    def _saturated(self) -> bool:
+        users = RAMP_STEP_USERS * (self.step + 1)
+        p95, failure_ratio, requests = self._step_stats()
+        logger.info(
+            "Step %d: %d users, %d requests, p95 %.0f ms, failures %.1f%%",
+            self.step,
+            users,
+            requests,
+            p95,
+            failure_ratio * 100,
+        )
+        if self.baseline_p95 is None:
+            self.baseline_p95 = p95 or None
+            return False
+        if (
+            p95 > self.baseline_p95 * SATURATION_P95_FACTOR
+            or failure_ratio > SATURATION_FAILURE_RATIO
+        ):
+            logger.info(
+                "Saturated at %d users (last healthy: %d) with %s",
+                users,
+                users - RAMP_STEP_USERS,
+                DEPLOYMENT_CONFIG,
+            )
+            return True
+        return False
+
+
+if os.environ.get("LOAD_TEST_RAMP", "False").lower() not in ("true", "1", "yes"):
+    # Locust picks up any LoadTestShape subclass defined in the locustfile
+    del SaturationRamp
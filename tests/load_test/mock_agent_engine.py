@@ -0,0 +1,265 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Local stand-in for a deployed Agent Engine, for offline load testing.
+
+Hosts ``agent_engine`` from ``app/agent_engine_app.py`` behind the same
+``reasoningEngines/{id}:streamQuery`` and ``:query`` contract as Vertex AI,
+with a scripted model and a fake ``gh`` binary that inject configurable
+latencies. Everything else (ADK runner, plugins, tools, sessions, telemetry)
+is the real code, so its overhead is what the load test measures.
+
+    python -m tests.load_test.mock_agent_engine --model-latency 1 --gh-latency 0.5
+"""
+
+import asyncio
+import inspect
+import json
+import os
+import re
+import stat
+import sys
+import tempfile
+from collections.abc import AsyncGenerator, Callable
+from typing import TYPE_CHECKING, Any
+
+import click
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+if TYPE_CHECKING:
+    from fastapi import FastAPI
+
+ENGINE_PATH = "/v1/projects/{project}/locations/{location}/reasoningEngines/{engine_id}"
+
+DEFAULT_REPO = "petroslamb/resume-copilot"
+
+# HEAD of every repository the fake gh knows, from the API and after a clone
+MOCK_HEAD_SHA = "0" * 40
+
+FAKE_GH = """#!{python}
+# Fake gh CLI installed by tests/load_test/mock_agent_engine.py
+import json, os, sys, time, uuid
+
+time.sleep(float(os.environ.get("MOCK_GH_LATENCY_SECONDS", "0")))
+args = sys.argv[1:]
+command = args[1] if len(args) > 1 and args[0] == "codespace" else ""
+if args[:2] == ["api", "rate_limit"]:
+    reset = int(time.time()) + 3600
+    print(json.dumps({{"resources": {{"core": {{
+        "limit": 5000, "remaining": 5000, "used": 0, "reset": reset
+    }}}}}}))
+elif args[:1] == ["api"]:
+    # Only `--jq .sha` lookups of a commit are scripted
+    print("{head_sha}")
+elif command == "create":
+    print(f"mock-codespace-{{uuid.uuid4().hex[:12]}}")
+elif command == "view":
+    print(json.dumps({{"state": "Available"}}))
+elif command == "list":
+    print("[]")
+elif command == "ssh":
+    script = sys.stdin.read()
+    if "__RR__" in script:
+        for key, value in [
+            ("git_version", "git version 2.43.0"),
+            ("gh_version", "gh version 2.40.0"),
+            ("user", "codespace"),
+            ("pwd", "/workspaces"),
+            ("git_identity", "configured"),
+            ("clone", "cloned"),
+            ("branch", "main"),
+            ("head_sha", "{head_sha}"),
+            ("entry", "README.md"),
+            ("entry", "pyproject.toml"),
+            ("manifest", "pyproject.toml"),
+        ]:
+            print(f"__RR__ {{key}}={{value}}")
+    else:
+        print("mock output")
+        # Simulated command log, e.g. verbose test output
+        print("x" * int(os.environ.get("MOCK_GH_OUTPUT_BYTES", "0")))
+"""
+
+
+def install_fake_gh(directory: str) -> str:
+    """Writes the fake gh executable into ``directory`` and puts it first on PATH."""
+    path = os.path.join(directory, "gh")
+    with open(path, "w") as f:
+        f.write(FAKE_GH.format(python=sys.executable, head_sha=MOCK_HEAD_SHA))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = directory + os.pathsep + os.environ.get("PATH", "")
+    return path
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Model that replays a fixed revival: create a codespace, run a command in
+    it, delete it and answer. Each step is chosen from the tool responses
+    already in the request, so concurrent sessions do not interfere.
+    """
+
+    model: str = "mock-model"
+    latency_seconds: float = 0.0
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return ["mock-model"]
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(self.latency_seconds)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[self._next_part(llm_request)]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=1000, candidates_token_count=50
+            ),
+        )
+
+    def _next_part(self, llm_request: LlmRequest) -> types.Part:
+        responses: dict[str, dict] = {}
+        prompt = ""
+        for content in llm_request.contents:
+            for part in content.parts or []:
+                if part.function_response and part.function_response.name:
+                    responses[part.function_response.name] = (
+                        part.function_response.response or {}
+                    )
+                elif part.text and content.role == "user" and not prompt:
+                    prompt = part.text
+
+        if "create_codespace" not in responses:
+            match = re.search(r"github\.com/([\w.-]+/[\w.-]+)", prompt)
+            repo = match.group(1) if match else DEFAULT_REPO
+            return types.Part.from_function_call(
+                name="create_codespace", args={"repo_url": repo}
+            )
+        codespace_name = responses["create_codespace"].get("codespace_name")
+        if not codespace_name:
+            return types.Part.from_text(text="Could not create a codespace.")
+        if "run_in_codespace" not in responses:
+            return types.Part.from_function_call(
+                name="run_in_codespace",
+                args={
+                    "codespace_name": codespace_name,
+                    "commands": "cd repo && git log -1 --oneline && ls",
+                },
+            )
+        if "delete_codespace" not in responses:
+            return types.Part.from_function_call(
+                name="delete_codespace", args={"codespace_name": codespace_name}
+            )
+        return types.Part.from_text(text="Analysis complete: no issues found.")
+
+
+def create_server(agent_engine: Any) -> "FastAPI":
+    """
+    Builds the FastAPI app serving ``agent_engine`` like a Vertex AI deployment.
+
+    ``:streamQuery`` streams one JSON event per line; ``:query`` returns
+    ``{"output": ...}``. Only operations registered by the app are callable.
+    """
+    from fastapi import FastAPI, HTTPException, Request
+    from fastapi.responses import StreamingResponse
+    from starlette.concurrency import iterate_in_threadpool
+
+    operations = agent_engine.register_operations()
+    server = FastAPI(title="Mock Agent Engine")
+
+    def resolve(class_method: str, modes: tuple[str, ...]) -> Callable[..., Any]:
+        if not any(class_method in operations.get(mode, []) for mode in modes):
+            raise HTTPException(404, f"Unknown class_method: {class_method}")
+        return getattr(agent_engine, class_method)
+
+    @server.post(ENGINE_PATH + ":streamQuery")
+    async def stream_query(request: Request) -> StreamingResponse:
+        body = await request.json()
+        method = resolve(
+            body.get("class_method", "stream_query"), ("stream", "async_stream")
+        )
+        kwargs = body.get("input", {})
+
+        async def events() -> AsyncGenerator[str, None]:
+            try:
+                if inspect.isasyncgenfunction(method):
+                    async for event in method(**kwargs):
+                        yield json.dumps(event) + "\n"
+                else:
+                    # Keep the event loop free while a sync generator blocks
+                    async for event in iterate_in_threadpool(method(**kwargs)):
+                        yield json.dumps(event) + "\n"
+            except Exception as e:
+                # Vertex AI reports errors raised mid-stream as an error event
+                yield json.dumps({"code": 500, "message": str(e)}) + "\n"
+
+        return StreamingResponse(events(), media_type="application/json")
+
+    @server.post(ENGINE_PATH + ":query")
+    async def query(request: Request) -> dict:
+        body = await request.json()
+        method = resolve(body.get("class_method", "query"), ("", "async"))
+        output = method(**body.get("input", {}))
+        if inspect.isawaitable(output):
+            output = await output
+        return {"output": output}
+
+    return server
+
+
+def load_agent_engine(model_latency: float) -> Any:
+    """Imports the app offline, with the scripted model in place of Gemini."""
+    os.environ.setdefault("GOOGLE_CLOUD_PROJECT", "local")
+    os.environ.setdefault("GOOGLE_GENAI_USE_VERTEXAI", "False")
+    os.environ.setdefault("TELEMETRY_EXPORTER", "local")
+    # The fake gh has no GitHub limits to respect
+    os.environ.setdefault("GH_RATE_LIMIT_PER_MINUTE", "0")
+
+    from app.agent import root_agent
+    from app.agent_engine_app import agent_engine
+
+    root_agent.model = ScriptedLlm(latency_seconds=model_latency)
+    agent_engine.set_up()
+    return agent_engine
+
+
+@click.command()
+@click.option("--host", default="127.0.0.1", help="Interface to listen on")
+@click.option("--port", type=int, default=8080, help="Port to listen on")
+@click.option(
+    "--model-latency", type=float, default=1.0, help="Seconds per model response"
+)
+@click.option("--gh-latency", type=float, default=0.5, help="Seconds per gh command")
+def serve_command(
+    host: str, port: int, model_latency: float, gh_latency: float
+) -> None:
+    """Serve the agent locally behind the Agent Engine streamQuery contract."""
+    import uvicorn
+
+    os.environ["MOCK_GH_LATENCY_SECONDS"] = str(gh_latency)
+    with tempfile.TemporaryDirectory(prefix="mock-gh-") as directory:
+        install_fake_gh(directory)
+        server = create_server(load_agent_engine(model_latency))
+        click.echo(
+            f"Mock Agent Engine on http://{host}:{port} "
+            f"(model {model_latency}s, gh {gh_latency}s)"
+        )
+        uvicorn.run(server, host=host, port=port)
+
+
+if __name__ == "__main__":
+    serve_command()
@@ -0,0 +1,71 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Revival prompts replayed by the load test, weighted by how often they occur."""
+
+import json
+import os
+import random
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    prompt: str
+    weight: int = 1
+
+
+DEFAULT_SCENARIOS = [
+    Scenario(
+        "analyze_python",
+        "Analyze https://github.com/pallets/itsdangerous and report outdated "
+        "dependencies and failing tests. Do not open a pull request.",
+        weight=4,
+    ),
+    Scenario(
+        "analyze_node",
+        "Analyze https://github.com/expressjs/cors: check the Node version, "
+        "install dependencies and run the test suite. Report findings only.",
+        weight=3,
+    ),
+    Scenario(
+        "revive_python",
+        "Revive https://github.com/petroslamb/resume-copilot: update its "
+        "dependencies, fix failing tests and prepare the fixes on a branch.",
+        weight=2,
+    ),
+    Scenario(
+        "list_and_cleanup",
+        "List my codespaces and delete any that belong to finished revivals.",
+        weight=1,
+    ),
+]
+
+
+def load_scenarios(path: str | None = None) -> list[Scenario]:
+    """Load scenarios from a JSONL file ($LOAD_TEST_SCENARIOS) or use the defaults.
+
+    Each line holds ``name``, ``prompt`` and an optional ``weight``.
+    """
+    path = path or os.environ.get("LOAD_TEST_SCENARIOS")
+    if not path:
+        return DEFAULT_SCENARIOS
+    with open(path) as f:
+        return [Scenario(**json.loads(line)) for line in f if line.strip()]
+
+
+def pick_scenario(scenarios: list[Scenario], rng: random.Random) -> Scenario:
+    """Choose a scenario according to its weight."""
+    return rng.choices(scenarios, weights=[s.weight for s in scenarios])[0]
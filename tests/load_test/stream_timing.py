@@ -0,0 +1,103 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Per-phase timing of an Agent Engine ``async_stream_query`` SSE stream."""
+
+import json
+from typing import Any
+
+
+def parse_sse_line(line: str) -> dict[str, Any] | None:
+    """Decode one SSE line (``data: {...}`` or bare JSON) into an event dict."""
+    line = line.strip()
+    if line.startswith("data:"):
+        line = line[len("data:") :].strip()
+    if not line:
+        return None
+    try:
+        event = json.loads(line)
+    except json.JSONDecodeError:
+        return None
+    return event if isinstance(event, dict) else None
+
+
+def _parts(event: dict[str, Any]) -> list[dict[str, Any]]:
+    return (event.get("content") or {}).get("parts") or []
+
+
+def _get(part: dict[str, Any], snake: str, camel: str) -> dict[str, Any] | None:
+    return part.get(snake) or part.get(camel)
+
+
+class StreamTimer:
+    """
+    Derives phase timings from the arrival times of streamed ADK events.
+
+    - ``time_to_first_event``: request start to the first event
+    - ``model_turn``: from the request start or the last tool response to the
+      next model event (a tool call or text)
+    - ``tool:<name>``: from a tool call event to its matching response event
+    """
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.first_event_at: float | None = None
+        self.phases: list[tuple[str, float]] = []
+        self.errors: list[str] = []
+        self.events = 0
+        self._model_turn_start: float | None = start
+        self._pending_tools: dict[str, tuple[str, float]] = {}
+
+    def feed(self, event: dict[str, Any], now: float) -> None:
+        """Record one event received at ``now`` (seconds, same clock as ``start``)."""
+        self.events += 1
+        if self.first_event_at is None:
+            self.first_event_at = now
+            self.phases.append(("time_to_first_event", now - self.start))
+        if isinstance(event.get("code"), int) and event["code"] >= 400:
+            self.errors.append(str(event.get("message", "Unknown error")))
+            return
+        if event.get("partial"):
+            return
+
+        responses = []
+        is_model_output = False
+        for part in _parts(event):
+            call = _get(part, "function_call", "functionCall")
+            response = _get(part, "function_response", "functionResponse")
+            if call:
+                is_model_output = True
+                key = call.get("id") or call.get("name", "")
+                self._pending_tools[key] = (call.get("name", "unknown"), now)
+            elif response:
+                responses.append(response)
+            elif part.get("text"):
+                is_model_output = True
+
+        if is_model_output and self._model_turn_start is not None:
+            self.phases.append(("model_turn", now - self._model_turn_start))
+            self._model_turn_start = None
+        for response in responses:
+            key = response.get("id") or response.get("name", "")
+            name, called_at = self._pending_tools.pop(
+                key, (response.get("name", "unknown"), now)
+            )
+            self.phases.append((f"tool:{name}", now - called_at))
+            # The model is invoked again once all tool responses are in
+            if not self._pending_tools:
+                self._model_turn_start = now
+
+    def total(self, end: float) -> float:
+        """Seconds from the request start to ``end``."""
+        return end - self.start
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+import pytest
+
+from app import codespace_tools, prefetch
+from app.app_utils import analysis_cache, codespace_quota, rate_limit
+
+
+@pytest.fixture(autouse=True)
+def isolated_github_state(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Gives each test its own rate limiter, codespace slots, caches and prefetches."""
+    monkeypatch.setattr(rate_limit, "_governor", rate_limit.GitHubGovernor(None))
+    monkeypatch.setattr(codespace_quota, "_scheduler", None)
+    monkeypatch.setattr(
+        analysis_cache, "ANALYSIS_CACHE_DIR", str(tmp_path / "analysis")
+    )
+    monkeypatch.setattr(analysis_cache, "_cache", None)
+    monkeypatch.setattr(
+        codespace_tools,
+        "prefetcher",
+        prefetch.Prefetcher(codespace_tools.prefetcher.run),
+    )
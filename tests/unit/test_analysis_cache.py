@@ -0,0 +1,105 @@
+import subprocess
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app import analysis, codespace_tools
+from app.app_utils import analysis_cache
+from app.app_utils.analysis_cache import AnalysisCache
+from app.app_utils.artifacts import LocalBlobStore
+
+SHA = "0123abcd" * 5
+
+
+def test_sections_are_keyed_by_commit_and_analyzer_version(tmp_path: Path) -> None:
+    """Verifies sections merge per commit and other commits or versions miss."""
+    store = LocalBlobStore(str(tmp_path))
+    cache = AnalysisCache(store)
+    cache.save("Owner/Repo", SHA, "structure", {"manifests": ["setup.py"]})
+    cache.save("owner/repo", SHA, "manifests", {"setup.py": {"install_requires": []}})
+
+    assert cache.get("owner/repo", SHA) == {
+        "structure": {"manifests": ["setup.py"]},
+        "manifests": {"setup.py": {"install_requires": []}},
+    }
+    assert cache.get("owner/repo", "f" * 40) == {}
+    assert AnalysisCache(store, analyzer_version="2").get("owner/repo", SHA) == {}
+    assert cache.stats == {"hits": 1, "misses": 1, "saved": 2}
+    with pytest.raises(ValueError):
+        cache.save("owner/repo", SHA, "tests", {})
+
+
+def test_outdated_dependencies_expire(tmp_path: Path) -> None:
+    """Verifies outdated-dependency results expire while the structure is kept."""
+    now = [0.0]
+    cache = AnalysisCache(LocalBlobStore(str(tmp_path)), clock=lambda: now[0])
+    cache.save("owner/repo", SHA, "structure", {"root_entries": ["README.md"]})
+    cache.save("owner/repo", SHA, "outdated_dependencies", {"outdated": []})
+
+    now[0] = analysis_cache.SECTION_TTL_SECONDS["outdated_dependencies"] + 1
+    assert list(cache.get("owner/repo", SHA)) == ["structure"]
+
+
+def test_bootstrap_scan_is_served_before_a_codespace_exists(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    """Verifies a later session looks up the structure saved by a bootstrap."""
+    cache = AnalysisCache(LocalBlobStore(str(tmp_path)))
+    monkeypatch.setattr(analysis_cache, "_cache", cache)
+    bootstrap_output = (
+        f"__RR__ clone=cloned\n__RR__ head_sha={SHA}\n__RR__ entry=README.md\n"
+    )
+
+    def fake_run(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
+        if args[:3] == ["gh", "codespace", "ssh"]:
+            return subprocess.CompletedProcess(args, 0, stdout=bootstrap_output)
+        if args[:3] == ["gh", "api", "repos/owner/repo/commits/HEAD"]:
+            return subprocess.CompletedProcess(args, 0, stdout=SHA + "\n")
+        raise subprocess.CalledProcessError(1, args)
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+
+    assert analysis.lookup_repo_analysis("owner/repo")["cached"] is False
+    codespace_tools.bootstrap_codespace("cs-1", "owner/repo")
+    result = analysis.lookup_repo_analysis("https://github.com/owner/repo")
+
+    assert result["cached"] is True
+    assert result["head_sha"] == SHA
+    assert result["analysis"]["structure"]["root_entries"] == ["README.md"]
+    assert result["missing_sections"] == ["manifests", "outdated_dependencies"]
+
+    saved = analysis.save_repo_analysis(
+        "owner/repo", SHA, "outdated_dependencies", {"outdated": []}
+    )
+    assert saved["status"] == "success"
+    assert analysis.lookup_repo_analysis("owner/repo")["missing_sections"] == [
+        "manifests"
+    ]
+
+
+@pytest.mark.parametrize(
+    ("head_sha", "section", "result"),
+    [
+        (SHA, "structure", {"root_entries": []}),
+        ("HEAD", "manifests", {}),
+        (SHA, "manifests", {"package.json": "lodash@4"}),
+        (SHA, "outdated_dependencies", {"outdated": ["lodash"]}),
+        (SHA, "manifests", {"package.json": {"x": "y" * 300_000}}),
+    ],
+)
+def test_malformed_results_are_not_shared(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    head_sha: str,
+    section: str,
+    result: dict,
+) -> None:
+    """Verifies results of the wrong shape are rejected before other sessions see them."""
+    cache = AnalysisCache(LocalBlobStore(str(tmp_path)))
+    monkeypatch.setattr(analysis_cache, "_cache", cache)
+
+    saved = analysis.save_repo_analysis("owner/repo", head_sha, section, result)
+
+    assert saved["status"] == "error"
+    assert cache.stats["saved"] == 0
@@ -0,0 +1,192 @@
+import asyncio
+import hashlib
+import json
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import pytest
+from google.genai import types
+
+from app.app_utils.artifacts import (
+    ContentAddressedArtifactService,
+    GcsBlobStore,
+    LocalBlobStore,
+)
+from tests.benchmarks.fakes import FakeStorageClient
+
+APP_NAME = "app"
+USER_ID = "u"
+
+
+def _save(
+    service: ContentAddressedArtifactService,
+    filename: str,
+    artifact: types.Part,
+    session_id: str,
+) -> int:
+    return asyncio.run(
+        service.save_artifact(
+            app_name=APP_NAME,
+            user_id=USER_ID,
+            filename=filename,
+            artifact=artifact,
+            session_id=session_id,
+        )
+    )
+
+
+def test_identical_payloads_are_stored_once(tmp_path: Path) -> None:
+    """Verifies repeated reports across sessions upload one compressed blob."""
+    service = ContentAddressedArtifactService(LocalBlobStore(str(tmp_path)))
+    report = types.Part.from_bytes(
+        data=b"dependency report\n" * 1000, mime_type="text/markdown"
+    )
+    for session_id in ("s1", "s2", "s3"):
+        assert _save(service, "report.md", report, session_id) == 0
+
+    assert len(list((tmp_path / "blobs").iterdir())) == 1
+    assert service.stats["saved"] == 3
+    assert service.stats["deduplicated"] == 2
+    assert service.stats["uploaded_bytes"] < service.stats["payload_bytes"] / 30
+
+    # A new service instance (e.g. another worker) also skips the upload
+    other = ContentAddressedArtifactService(LocalBlobStore(str(tmp_path)))
+    _save(other, "report.md", report, "s4")
+    assert other.stats["uploaded_bytes"] == 0
+
+
+def test_versions_and_round_trip(tmp_path: Path) -> None:
+    """Verifies versions, text and binary round trips and manifests per scope."""
+    service = ContentAddressedArtifactService(LocalBlobStore(str(tmp_path)))
+    _save(service, "log.txt", types.Part.from_text(text="first"), "s1")
+    assert _save(service, "log.txt", types.Part.from_text(text="second"), "s1") == 1
+    png = types.Part.from_bytes(data=b"\x89PNG", mime_type="image/png")
+    _save(service, "user:avatar.png", png, "s1")
+
+    def load(filename: str, session_id: str, version: int | None = None) -> Any:
+        return asyncio.run(
+            service.load_artifact(
+                app_name=APP_NAME,
+                user_id=USER_ID,
+                filename=filename,
+                session_id=session_id,
+                version=version,
+            )
+        )
+
+    assert load("log.txt", "s1").text == "second"
+    assert load("log.txt", "s1", version=0).text == "first"
+    assert load("user:avatar.png", "s2").inline_data.data == b"\x89PNG"
+    # Already compressed formats are stored without gzip
+    assert (tmp_path / "blobs" / hashlib.sha256(b"\x89PNG").hexdigest()).exists()
+
+    def keys() -> list[str]:
+        return asyncio.run(
+            service.list_artifact_keys(
+                app_name=APP_NAME, user_id=USER_ID, session_id="s1"
+            )
+        )
+
+    assert keys() == ["log.txt", "user:avatar.png"]
+    assert asyncio.run(
+        service.list_versions(
+            app_name=APP_NAME, user_id=USER_ID, filename="log.txt", session_id="s1"
+        )
+    ) == [0, 1]
+    version = asyncio.run(
+        service.get_artifact_version(
+            app_name=APP_NAME, user_id=USER_ID, filename="log.txt", session_id="s1"
+        )
+    )
+    assert version is not None
+    assert version.version == 1
+    assert version.mime_type == "text/plain"
+
+    asyncio.run(
+        service.delete_artifact(
+            app_name=APP_NAME, user_id=USER_ID, filename="log.txt", session_id="s1"
+        )
+    )
+    assert load("log.txt", "s1") is None
+    assert keys() == ["user:avatar.png"]
+
+
+def test_gcs_store_manifest_conflict_retries(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Verifies a manifest changed by another writer is re-read, not overwritten."""
+    client = FakeStorageClient()
+    store = GcsBlobStore("bucket", client)
+    service = ContentAddressedArtifactService(store)
+    other = ContentAddressedArtifactService(GcsBlobStore("bucket", client))
+
+    original_write = store.write
+    raced: list[str] = []
+
+    def racing_write(
+        name: str, data: bytes, content_type: str, generation: int | None = None
+    ) -> bool:
+        if name.startswith("manifests/") and not raced:
+            raced.append(name)
+            _save(other, "diff.patch", types.Part.from_text(text="other"), "s1")
+        return original_write(name, data, content_type, generation)
+
+    monkeypatch.setattr(store, "write", racing_write)
+    assert _save(service, "diff.patch", types.Part.from_text(text="mine"), "s1") == 1
+    versions = asyncio.run(
+        service.list_versions(
+            app_name=APP_NAME, user_id=USER_ID, filename="diff.patch", session_id="s1"
+        )
+    )
+    assert versions == [0, 1]
+
+
+def test_gcs_store_skips_uploading_blobs_stored_elsewhere(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Verifies a new instance does not re-upload a blob another instance stored."""
+    client = FakeStorageClient()
+    first = ContentAddressedArtifactService(GcsBlobStore("bucket", client))
+    _save(first, "diff.patch", types.Part.from_text(text="same"), "s1")
+
+    store = GcsBlobStore("bucket", client)
+    second = ContentAddressedArtifactService(store)
+    original_write = store.write
+    written: list[str] = []
+
+    def recording_write(
+        name: str, data: bytes, content_type: str, generation: int | None = None
+    ) -> bool:
+        written.append(name)
+        return original_write(name, data, content_type, generation)
+
+    monkeypatch.setattr(store, "write", recording_write)
+    _save(second, "diff.patch", types.Part.from_text(text="same"), "s2")
+    assert [name for name in written if not name.startswith("manifests/")] == []
+    assert second.stats["uploaded_bytes"] == 0
+
+
+def _increment(root: str, times: int) -> None:
+    """Increments a shared counter object with conditional writes."""
+    store = LocalBlobStore(root)
+    for _ in range(times):
+        while True:
+            stored = store.read("counter.json")
+            count, generation = (json.loads(stored[0]), stored[1]) if stored else (0, 0)
+            if store.write(
+                "counter.json", json.dumps(count + 1).encode(), "", generation
+            ):
+                break
+
+
+def test_local_store_conditional_writes_across_processes(tmp_path: Path) -> None:
+    """Verifies no update is lost when processes share a local store."""
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        for future in [
+            executor.submit(_increment, str(tmp_path), 25) for _ in range(4)
+        ]:
+            future.result()
+
+    stored = LocalBlobStore(str(tmp_path)).read("counter.json")
+    assert stored is not None
+    assert json.loads(stored[0]) == 100
+    assert stored[1] == 100
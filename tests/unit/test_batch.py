@@ -0,0 +1,96 @@
+import asyncio
+import json
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app.app_utils.batch import (
+    BatchCheckpoint,
+    load_batch_items,
+    run_batch,
+)
+
+
+def _write_jsonl(path: Path, entries: list[dict[str, Any]]) -> None:
+    path.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+
+
+def test_load_batch_items(tmp_path: Path) -> None:
+    """Verifies ids, prompts and duplicate handling when loading a batch."""
+    input_file = tmp_path / "repos.jsonl"
+    _write_jsonl(
+        input_file,
+        [
+            {"repo_url": "owner/a"},
+            {"request_id": "r-2", "repo": "owner/b", "prompt": "Fix b"},
+            {"repo_url": "owner/a"},
+            {"title": "no repo"},
+        ],
+    )
+    items = load_batch_items(str(input_file))
+    assert [item["id"] for item in items] == ["owner/a", "r-2"]
+    assert items[0]["prompt"] == "Analyze and revive owner/a"
+    assert items[1]["prompt"] == "Fix b"
+
+
+@pytest.mark.asyncio
+async def test_run_batch_respects_concurrency(tmp_path: Path) -> None:
+    """Verifies that no more than `concurrency` revivals run at once."""
+    items = [{"id": str(i), "repo_url": f"owner/{i}", "prompt": ""} for i in range(6)]
+    running = 0
+    peak = 0
+
+    async def revive(item: dict[str, Any]) -> dict[str, Any]:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"status": "success"}
+
+    summary = await run_batch(
+        items,
+        revive,
+        BatchCheckpoint(str(tmp_path / "checkpoint.jsonl")),
+        str(tmp_path / "results.jsonl"),
+        concurrency=2,
+    )
+    assert peak == 2
+    assert summary["succeeded"] == 6
+    results = (tmp_path / "results.jsonl").read_text().splitlines()
+    assert len(results) == 6
+    assert "duration_seconds" in json.loads(results[0])
+
+
+@pytest.mark.asyncio
+async def test_run_batch_resumes_from_checkpoint(tmp_path: Path) -> None:
+    """Verifies that finished items are skipped and failures are recorded."""
+    checkpoint_file = str(tmp_path / "checkpoint.jsonl")
+    items = [{"id": str(i), "repo_url": f"owner/{i}", "prompt": ""} for i in range(3)]
+
+    checkpoint = BatchCheckpoint(checkpoint_file)
+    checkpoint.update("0", "success")
+    checkpoint.update("1", "running", attempts=1)
+    revived = []
+
+    async def revive(item: dict[str, Any]) -> dict[str, Any]:
+        revived.append(item["id"])
+        if item["id"] == "2":
+            raise RuntimeError("codespace quota exceeded")
+        return {"status": "success"}
+
+    summary = await run_batch(
+        items,
+        revive,
+        BatchCheckpoint(checkpoint_file),
+        str(tmp_path / "results.jsonl"),
+    )
+    assert sorted(revived) == ["1", "2"]
+    assert summary["skipped"] == 1
+    assert summary["failed"] == 1
+
+    reloaded = BatchCheckpoint(checkpoint_file)
+    assert (reloaded.get("1") or {})["attempts"] == 2
+    assert (reloaded.get("2") or {})["error"] == "codespace quota exceeded"
+    assert all(reloaded.is_finished(str(i)) for i in range(3))
@@ -0,0 +1,78 @@
+import subprocess
+from typing import Any
+
+import pytest
+
+from app import codespace_tools
+from app.bootstrap import build_bootstrap_script, parse_bootstrap_output
+
+BOOTSTRAP_OUTPUT = """Welcome to Codespaces!
+__RR__ git_version=git version 2.47.1
+__RR__ gh_version=gh version 2.63.0 (2024-11-27)
+__RR__ user=codespace
+__RR__ pwd=/workspaces/resume-copilot
+__RR__ git_identity=configured
+__RR__ clone=cloned
+__RR__ branch=main
+__RR__ head_sha=0123abcd
+__RR__ entry=README.md
+__RR__ entry=src/
+__RR__ manifest=package.json
+__RR__ manifest=api/requirements.txt
+"""
+
+
+def test_bootstrap_script_clones_repo() -> None:
+    """Verifies the script configures git and clones the requested repo."""
+    script = build_bootstrap_script("petroslamb/resume-copilot")
+    assert "git config --global user.email agent@reporeviver.com" in script
+    assert (
+        "git clone --quiet https://github.com/petroslamb/resume-copilot repo" in script
+    )
+
+
+def test_parse_bootstrap_output() -> None:
+    """Verifies marker lines are parsed and surrounding noise is ignored."""
+    summary = parse_bootstrap_output(BOOTSTRAP_OUTPUT)
+    assert summary["status"] == "success"
+    assert summary["environment"]["gh_version"] == "gh version 2.63.0 (2024-11-27)"
+    assert summary["environment"]["git_identity_configured"] is True
+    assert summary["repository"]["root_entries"] == ["README.md", "src/"]
+    assert summary["repository"]["manifests"] == [
+        "package.json",
+        "api/requirements.txt",
+    ]
+
+
+def test_parse_bootstrap_output_clone_failure() -> None:
+    """Verifies a failed clone is reported as a bootstrap error."""
+    summary = parse_bootstrap_output(
+        "__RR__ clone=failed\n__RR__ clone_error=fatal: repository not found\n"
+    )
+    assert summary["status"] == "error"
+    assert summary["clone"]["error"] == "fatal: repository not found"
+
+
+def test_create_codespace_runs_bootstrap(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Verifies create_codespace returns the bootstrap summary in one call."""
+    calls: list[list[str]] = []
+
+    def fake_run(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
+        if args[:2] == ["gh", "api"]:
+            # Rate-limit check of the GitHub governor
+            raise subprocess.CalledProcessError(1, args)
+        calls.append(args)
+        if args[:3] == ["gh", "codespace", "create"]:
+            return subprocess.CompletedProcess(args, 0, stdout="fuzzy-space-123\n")
+        return subprocess.CompletedProcess(args, 0, stdout=BOOTSTRAP_OUTPUT)
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+    monkeypatch.setattr(codespace_tools, "BOOTSTRAP_ENABLED", True)
+
+    result = codespace_tools.create_codespace(
+        "https://github.com/petroslamb/resume-copilot"
+    )
+    assert result["codespace_name"] == "fuzzy-space-123"
+    assert result["bootstrap"]["clone"]["status"] == "cloned"
+    assert calls[0][4] == "petroslamb/resume-copilot"
+    assert calls[1] == ["gh", "codespace", "ssh", "-c", "fuzzy-space-123"]
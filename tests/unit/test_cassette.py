@@ -0,0 +1,89 @@
+import asyncio
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from app.app_utils.cassette import (
+    RECORD,
+    REPLAY,
+    ZERO_LATENCY,
+    Cassette,
+    CassetteMissError,
+    CassettePlugin,
+    CassetteSubprocess,
+)
+
+
+def test_subprocess_record_and_replay(tmp_path: Path) -> None:
+    """Verifies recorded outputs, failures and repeats are replayed in order."""
+    path = str(tmp_path / "session.jsonl")
+    recorder = CassetteSubprocess(Cassette(path, mode=RECORD))
+    first = recorder.run(["sh", "-c", "echo one"], capture_output=True, text=True)
+    with pytest.raises(subprocess.CalledProcessError):
+        recorder.run(
+            ["sh", "-c", "echo bad >&2; exit 3"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    recorder.run(["sh", "-c", "echo one"], capture_output=True, text=True)
+
+    player = CassetteSubprocess(Cassette(path, mode=REPLAY, latency=ZERO_LATENCY))
+    replayed = player.run(["sh", "-c", "echo one"], capture_output=True, text=True)
+    assert (replayed.returncode, replayed.stdout) == (0, first.stdout)
+    with pytest.raises(subprocess.CalledProcessError) as error:
+        player.run(
+            ["sh", "-c", "echo bad >&2; exit 3"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    assert (error.value.returncode, error.value.stderr) == (3, "bad\n")
+    assert player.run(["sh", "-c", "echo one"], capture_output=True).stdout == b"one\n"
+    with pytest.raises(CassetteMissError):
+        player.run(["sh", "-c", "echo one"], capture_output=True, text=True)
+
+
+def test_model_record_and_replay(tmp_path: Path) -> None:
+    """Verifies model responses are replayed for the same conversation."""
+    path = str(tmp_path / "session.jsonl")
+    context: Any = SimpleNamespace(agent_name="repo_reviver", invocation_id="e-1")
+    request = LlmRequest(
+        contents=[types.Content(role="user", parts=[types.Part(text="Revive a/b")])]
+    )
+    response = LlmResponse(
+        content=types.Content(
+            role="model",
+            parts=[
+                types.Part.from_function_call(
+                    name="create_codespace", args={"repo_url": "a/b"}
+                )
+            ],
+        )
+    )
+
+    recorder = CassettePlugin(Cassette(path, mode=RECORD))
+    assert (
+        asyncio.run(
+            recorder.before_model_callback(
+                callback_context=context, llm_request=request
+            )
+        )
+        is None
+    )
+    asyncio.run(
+        recorder.after_model_callback(callback_context=context, llm_response=response)
+    )
+
+    player = CassettePlugin(Cassette(path, mode=REPLAY, latency=ZERO_LATENCY))
+    replayed = asyncio.run(
+        player.before_model_callback(callback_context=context, llm_request=request)
+    )
+    assert replayed is not None
+    assert replayed.content == response.content
@@ -0,0 +1,43 @@
+from collections.abc import Iterator
+
+import pytest
+from google.auth.credentials import AnonymousCredentials
+
+from app.app_utils import clients
+
+
+@pytest.fixture(autouse=True)
+def anonymous_credentials(monkeypatch: pytest.MonkeyPatch) -> Iterator[list[int]]:
+    calls: list[int] = []
+
+    def fake_default() -> tuple[AnonymousCredentials, str]:
+        calls.append(1)
+        return AnonymousCredentials(), "project"
+
+    monkeypatch.setattr(clients.google.auth, "default", fake_default)
+    clients.reset_clients()
+    yield calls
+    clients.reset_clients()
+
+
+def test_clients_are_shared_per_project(anonymous_credentials: list[int]) -> None:
+    """Verifies clients, credentials and the HTTP pool are created once and shared."""
+    storage_client = clients.get_storage_client("project")
+    assert clients.get_storage_client("project") is storage_client
+    assert clients.get_storage_client("other") is not storage_client
+    assert clients.get_logging_client("project") is clients.get_logging_client(
+        "project"
+    )
+
+    session = clients.get_http_session()
+    assert storage_client._http is session
+    assert clients.storage_client_kwargs()["_http"] is session
+    assert len(anonymous_credentials) == 1
+
+
+def test_http_pool_is_sized(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Verifies the shared session mounts a keep-alive adapter with the pool size."""
+    monkeypatch.setattr(clients, "HTTP_POOL_SIZE", 7)
+    adapter = clients.get_http_session().get_adapter("https://storage.googleapis.com")
+    assert isinstance(adapter, clients.KeepAliveHTTPAdapter)
+    assert adapter._pool_maxsize == 7
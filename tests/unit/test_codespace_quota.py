@@ -0,0 +1,217 @@
+import asyncio
+import itertools
+import subprocess
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app import codespace_tools
+from app.app_utils import codespace_quota, rate_limit
+from app.app_utils.codespace_quota import CodespaceScheduler, Lease, QueueTimeout
+from app.app_utils.rate_limit import GitHubGovernor
+from app.app_utils.tool_threads import off_loop
+
+
+def _queue(
+    scheduler: CodespaceScheduler,
+    tenant: str,
+    granted: list[Lease],
+    priority: int = 0,
+) -> threading.Thread:
+    """Starts a thread acquiring a slot, recording the grant order."""
+
+    def run() -> None:
+        lease = scheduler.acquire(tenant, priority, timeout=5)
+        granted.append(lease)
+
+    queued = len(scheduler._waiting) + 1
+    thread = threading.Thread(target=run)
+    thread.start()
+    deadline = time.monotonic() + 5
+    while len(scheduler._waiting) < queued and time.monotonic() < deadline:
+        time.sleep(0.001)
+    return thread
+
+
+def _release_in_order(
+    scheduler: CodespaceScheduler, granted: list[Lease], count: int
+) -> list[str]:
+    """Frees one slot at a time and returns the tenants served."""
+    served: list[str] = []
+    for _ in range(count):
+        scheduler.release(granted[-1])
+        deadline = time.monotonic() + 5
+        while len(granted) == len(served) + 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        served.append(granted[-1].tenant)
+    return served
+
+
+def test_tenant_quota_queues_until_a_codespace_is_deleted() -> None:
+    """Verifies a tenant over its quota waits while other tenants are served."""
+    scheduler = CodespaceScheduler(capacity=10, tenant_quota=2)
+    first = scheduler.acquire("alice")
+    scheduler.assign(first, "cs-1")
+    scheduler.acquire("alice")
+
+    with pytest.raises(QueueTimeout):
+        scheduler.acquire("alice", timeout=0.05)
+    assert scheduler.acquire("bob", timeout=0.05).waited_seconds < 0.05
+
+    granted: list[Lease] = []
+    thread = _queue(scheduler, "alice", granted)
+    scheduler.release_codespace("cs-1")
+    thread.join()
+
+    assert granted[0].waited_seconds > 0
+    snapshot = scheduler.snapshot()
+    assert snapshot["tenants"]["alice"] == {"active": 2, "queued": 0}
+    assert snapshot["timeouts"] == 1
+    assert snapshot["queued"] == 2
+
+
+def test_burst_of_one_tenant_does_not_starve_others() -> None:
+    """Verifies fair queuing interleaves tenants and honors weights and priority."""
+    scheduler = CodespaceScheduler(
+        capacity=1, tenant_quota=10, weights={"heavy": 1, "light": 1}
+    )
+    granted = [scheduler.acquire("holder")]
+    threads = [_queue(scheduler, "heavy", granted) for _ in range(4)]
+    threads.append(_queue(scheduler, "light", granted))
+    threads.append(_queue(scheduler, "urgent", granted, priority=1))
+
+    served = _release_in_order(scheduler, granted, 6)
+    for thread in threads:
+        thread.join()
+
+    assert served[0] == "urgent"
+    assert served.index("light") <= 2
+    assert served.count("heavy") == 4
+
+
+def test_account_limit_holds_creations_until_a_slot_frees() -> None:
+    """Verifies a creation rejected for the account limit keeps waiting its turn."""
+    scheduler = CodespaceScheduler(capacity=10, tenant_quota=10)
+    other = scheduler.acquire("bob")
+    lease = scheduler.acquire("alice")
+
+    result: dict[str, Lease] = {}
+    thread = threading.Thread(
+        target=lambda: result.setdefault("lease", scheduler.account_full(lease))
+    )
+    thread.start()
+    time.sleep(0.05)
+    assert "lease" not in result
+
+    scheduler.release(other)
+    thread.join(timeout=5)
+    assert result["lease"] is lease
+    assert scheduler.snapshot()["account_full"] == 1
+
+
+def test_leases_of_forgotten_codespaces_expire() -> None:
+    """Verifies slots are reclaimed when a codespace is never deleted."""
+    now = [0.0]
+    scheduler = CodespaceScheduler(
+        capacity=1, tenant_quota=1, lease_seconds=60, clock=lambda: now[0]
+    )
+    scheduler.acquire("alice")
+    now[0] = 61
+
+    assert scheduler.acquire("alice", timeout=0).tenant == "alice"
+    assert scheduler.snapshot()["expired"] == 1
+
+
+def test_create_codespace_waits_for_the_account_limit(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Verifies create_codespace retries after the account limit and reports the wait."""
+    scheduler = CodespaceScheduler(capacity=10, tenant_quota=2)
+    monkeypatch.setattr(codespace_quota, "_scheduler", scheduler)
+    monkeypatch.setattr(codespace_quota, "ACCOUNT_FULL_BACKOFF_SECONDS", 0.05)
+    monkeypatch.setattr(codespace_tools, "BOOTSTRAP_ENABLED", False)
+    attempts = []
+
+    def fake_run(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
+        if args[:2] == ["gh", "api"]:
+            raise subprocess.CalledProcessError(1, args)
+        if args[:3] == ["gh", "codespace", "delete"]:
+            return subprocess.CompletedProcess(args, 0, stdout="")
+        attempts.append(args)
+        if len(attempts) == 1:
+            raise subprocess.CalledProcessError(
+                1,
+                args,
+                stderr="You have reached the maximum number of running codespaces",
+            )
+        return subprocess.CompletedProcess(args, 0, stdout="cs-1\n")
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+    tool_context: Any = SimpleNamespace(
+        state={"tenant": "acme"}, session=SimpleNamespace(user_id="user")
+    )
+
+    result = codespace_tools.create_codespace("owner/repo", tool_context=tool_context)
+
+    assert result["status"] == "success"
+    assert len(attempts) == 2
+    assert result["queue_wait_seconds"] >= 0.05
+    assert scheduler.snapshot()["tenants"] == {"acme": {"active": 1, "queued": 0}}
+
+    codespace_tools.delete_codespace("cs-1")
+    assert scheduler.snapshot()["tenants"] == {}
+
+
+def test_sessions_beyond_the_quota_queue_without_blocking_the_event_loop(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Verifies queued creations wait in threads while other sessions progress."""
+    scheduler = CodespaceScheduler(capacity=10, tenant_quota=2)
+    monkeypatch.setattr(codespace_quota, "_scheduler", scheduler)
+    monkeypatch.setattr(rate_limit, "_governor", GitHubGovernor(None))
+    monkeypatch.setattr(codespace_tools, "BOOTSTRAP_ENABLED", False)
+    names = itertools.count(1)
+
+    def fake_run(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
+        if args[:2] == ["gh", "api"]:
+            raise subprocess.CalledProcessError(1, args)
+        if args[:3] == ["gh", "codespace", "create"]:
+            return subprocess.CompletedProcess(args, 0, stdout=f"cs-{next(names)}\n")
+        return subprocess.CompletedProcess(args, 0, stdout="")
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+    create_codespace = off_loop(codespace_tools.create_codespace)
+    delete_codespace = off_loop(codespace_tools.delete_codespace)
+    ticks = []
+
+    async def session() -> float:
+        tool_context: Any = SimpleNamespace(
+            state={"tenant": "acme"}, session=SimpleNamespace(user_id="user")
+        )
+        created = await create_codespace("owner/repo", tool_context=tool_context)
+        assert created["status"] == "success"
+        # The model thinking between tool calls
+        await asyncio.sleep(0.05)
+        await delete_codespace(created["codespace_name"], tool_context=tool_context)
+        return created["queue_wait_seconds"]
+
+    async def ticker() -> None:
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def main() -> list[float]:
+        task = asyncio.create_task(ticker())
+        waits = await asyncio.gather(*(session() for _ in range(5)))
+        task.cancel()
+        return waits
+
+    waits = asyncio.run(main())
+
+    assert sum(1 for wait in waits if wait > 0) >= 3
+    assert scheduler.snapshot()["max_queue"] >= 3
+    assert scheduler.snapshot()["tenants"] == {}
+    assert len(ticks) >= 10
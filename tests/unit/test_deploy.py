@@ -0,0 +1,140 @@
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from google.genai import errors
+from vertexai._genai import agent_engines, types
+
+from app.app_utils.deploy import (
+    find_existing_agent,
+    hash_source_files,
+    plan_deployment,
+    update_settings,
+)
+
+
+def test_source_hash_ignores_bytecode(tmp_path: Path) -> None:
+    """Verifies the source hash changes with code but not with bytecode caches."""
+    package = tmp_path / "app"
+    (package / "__pycache__").mkdir(parents=True)
+    (package / "agent.py").write_text("x = 1\n")
+    before = hash_source_files([str(package)])
+
+    (package / "__pycache__" / "agent.cpython-311.pyc").write_bytes(b"\0")
+    assert hash_source_files([str(package)]) == before
+
+    (package / "agent.py").write_text("x = 2\n")
+    assert hash_source_files([str(package)]) != before
+
+
+def test_plan_deployment() -> None:
+    """Verifies no-op, config-only, full and new-target deploys are told apart."""
+    fingerprint = {
+        "project": "p",
+        "location": "europe-west1",
+        "source_hash": "s",
+        "requirements_hash": "r",
+        "entrypoint": "app.agent_engine_app.agent_engine",
+        "config_hash": "c",
+    }
+    previous = {"remote_agent_engine_id": "projects/1/engines/2", **fingerprint}
+    assert plan_deployment(previous, fingerprint) == "skip"
+    assert plan_deployment(previous, fingerprint, force=True) == "full"
+    assert plan_deployment(previous, {**fingerprint, "config_hash": "c2"}) == "config"
+    assert plan_deployment(previous, {**fingerprint, "source_hash": "s2"}) == "full"
+    assert (
+        plan_deployment(previous, {**fingerprint, "entrypoint": "app.other.agent"})
+        == "full"
+    )
+    assert plan_deployment(previous, {**fingerprint, "project": "p2"}) == "create"
+    assert plan_deployment({"remote_agent_engine_id": "None"}, fingerprint) == "create"
+
+
+def test_find_existing_agent_uses_recorded_name() -> None:
+    """Verifies the recorded engine is fetched directly, listing only as fallback."""
+    engine = SimpleNamespace(
+        api_resource=SimpleNamespace(name="engines/2", display_name="rr")
+    )
+    calls = []
+
+    def get(name: str) -> SimpleNamespace:
+        calls.append("get")
+        if name != "engines/2":
+            raise errors.ClientError(
+                404, {"error": {"code": 404, "message": "gone", "status": "NOT_FOUND"}}
+            )
+        return engine
+
+    def list_engines() -> list[SimpleNamespace]:
+        calls.append("list")
+        return [engine]
+
+    client = SimpleNamespace(agent_engines=SimpleNamespace(get=get, list=list_engines))
+    assert (
+        find_existing_agent(
+            client, {"remote_agent_engine_id": "engines/2"}, "rr", "full"
+        )
+        is engine
+    )
+    assert calls == ["get"]
+    assert (
+        find_existing_agent(
+            client, {"remote_agent_engine_id": "engines/9"}, "rr", "full"
+        )
+        is engine
+    )
+    assert calls == ["get", "get", "list"]
+
+
+def test_settings_update_sends_the_deployment_spec() -> None:
+    """Verifies a settings-only update sends env vars, scaling and resources."""
+    name = "projects/p/locations/l/reasoningEngines/1"
+    requests: list[dict[str, Any]] = []
+    engine: Any = SimpleNamespace(api_resource=SimpleNamespace(name=name))
+
+    def update(name: str, config: types.UpdateAgentEngineConfig) -> SimpleNamespace:
+        # Encoded as the client sends it
+        requests.append(
+            agent_engines._UpdateAgentEngineRequestParameters_to_vertex(
+                types._UpdateAgentEngineRequestParameters(name=name, config=config)
+            )
+        )
+        return SimpleNamespace(name="operations/1")
+
+    client = SimpleNamespace(
+        agent_engines=SimpleNamespace(
+            _update=update,
+            _get_agent_operation=lambda operation_name: SimpleNamespace(
+                name=operation_name, done=True, error=None
+            ),
+            get=lambda name: engine,
+        )
+    )
+    config = types.AgentEngineConfig(
+        display_name="rr",
+        env_vars={"NUM_WORKERS": "4"},
+        min_instances=1,
+        max_instances=5,
+        resource_limits={"cpu": "4", "memory": "8Gi"},
+        container_concurrency=9,
+    )
+
+    assert update_settings(client, name, config) is engine
+    [request] = requests
+    assert request["displayName"] == "rr"
+    assert request["spec"].model_dump(exclude_none=True) == {
+        "deployment_spec": {
+            "env": [{"name": "NUM_WORKERS", "value": "4"}],
+            "min_instances": 1,
+            "max_instances": 5,
+            "resource_limits": {"cpu": "4", "memory": "8Gi"},
+            "container_concurrency": 9,
+        }
+    }
+    assert set(request["_query"]["updateMask"].split(",")) >= {
+        "spec.deployment_spec.env",
+        "spec.deployment_spec.min_instances",
+        "spec.deployment_spec.max_instances",
+        "spec.deployment_spec.resource_limits",
+        "spec.deployment_spec.container_concurrency",
+    }
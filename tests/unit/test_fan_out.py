@@ -0,0 +1,74 @@
+import subprocess
+import threading
+import time
+from typing import Any
+
+import pytest
+
+from app import codespace_tools
+
+
+def test_run_in_codespaces_runs_targets_concurrently(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Verifies targets run in parallel and wall time tracks the slowest one."""
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def fake_run(
+        args: list[str], input: str | None = None, **kwargs: Any
+    ) -> subprocess.CompletedProcess[str | None]:
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.05)
+        with lock:
+            running -= 1
+        return subprocess.CompletedProcess(args, 0, stdout=input, stderr="")
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+    targets = [
+        {
+            "codespace_name": "cs-1",
+            "cwd": f"repo/packages/{name}",
+            "commands": "npm test",
+        }
+        for name in ("api", "web", "cli")
+    ]
+    result = codespace_tools.run_in_codespaces(targets, max_concurrency=3)
+
+    assert result["status"] == "success"
+    assert peak == 3
+    assert result["wall_seconds"] < result["serial_seconds"]
+    assert [r["target"] for r in result["results"]] == [
+        "repo/packages/api",
+        "repo/packages/web",
+        "repo/packages/cli",
+    ]
+    assert result["results"][0]["output"].startswith("cd repo/packages/api || exit 1\n")
+
+
+def test_run_in_codespaces_partial_failure(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Verifies one failing target does not fail the others."""
+
+    def fake_run(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
+        if args[-1] == "cs-bad":
+            raise subprocess.CalledProcessError(
+                1, args, output="", stderr="tests failed"
+            )
+        return subprocess.CompletedProcess(args, 0, stdout="ok", stderr="")
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+    result = codespace_tools.run_in_codespaces(
+        [
+            {"codespace_name": "cs-good", "commands": "make test"},
+            {"codespace_name": "cs-bad", "commands": "make test"},
+            {"codespace_name": "cs-good"},
+        ]
+    )
+    assert result["status"] == "partial"
+    assert result["succeeded"] == 1
+    assert [r["status"] for r in result["results"]] == ["success", "error", "error"]
+    assert result["results"][1]["error"] == "tests failed"
@@ -0,0 +1,48 @@
+import time
+from typing import cast
+
+import pytest
+from google.cloud import logging as google_cloud_logging
+from pydantic import ValidationError
+
+from app.app_utils.feedback import BufferedFeedbackSink
+from tests.benchmarks.fakes import FakeLogger
+
+
+def _logger(fake: FakeLogger) -> google_cloud_logging.Logger:
+    return cast(google_cloud_logging.Logger, fake)
+
+
+def test_submit_does_not_wait_for_writes() -> None:
+    """Verifies feedback is accepted immediately and written in one batch on shutdown."""
+    logger = FakeLogger(commit_delay=0.2)
+    sink = BufferedFeedbackSink(_logger(logger), flush_interval=60)
+    start = time.perf_counter()
+    for index in range(50):
+        sink.submit({"score": 5, "invocation_id": f"e-{index}"})
+    assert time.perf_counter() - start < 0.2
+
+    with pytest.raises(ValidationError):
+        sink.submit({"score": "invalid", "invocation_id": "e-x"})
+
+    sink.shutdown()
+    assert logger.commits == [50]
+    assert logger.entries[0]["log_type"] == "feedback"
+
+
+def test_submit_batch_reports_rejected_entries() -> None:
+    """Verifies a batch keeps valid entries and reports invalid ones by index."""
+    logger = FakeLogger()
+    sink = BufferedFeedbackSink(_logger(logger))
+    result = sink.submit_batch(
+        [
+            {"score": 1, "invocation_id": "e-1"},
+            {"score": "bad", "invocation_id": "e-2"},
+            {"score": 3, "invocation_id": "e-3"},
+        ]
+    )
+    assert result["accepted"] == 2
+    assert [rejected["index"] for rejected in result["rejected"]] == [1]
+    assert sink.flush(timeout=5)
+    assert [entry["invocation_id"] for entry in logger.entries] == ["e-1", "e-3"]
+    sink.shutdown()
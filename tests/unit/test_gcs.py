@@ -0,0 +1,129 @@
+import gzip
+import json
+import time
+from typing import cast
+
+import pytest
+from google.cloud import logging as google_cloud_logging
+
+from app.app_utils import gcs
+from app.app_utils.gcs import SpanPayloadOffloader
+from app.app_utils.tracing import (
+    MAX_ATTRIBUTES_BYTES,
+    CloudTraceLoggingSpanExporter,
+    estimate_json_size,
+)
+from tests.benchmarks.fakes import (
+    FakeLoggingClient,
+    FakeStorageClient,
+    FakeTraceClient,
+    make_spans,
+)
+
+
+def test_offload_is_content_addressed_and_compressed() -> None:
+    """Verifies identical payloads are gzipped and stored once under their hash."""
+    storage_client = FakeStorageClient()
+    offloader = SpanPayloadOffloader(storage_client, "bucket")
+    payload = json.dumps({"prompt": "x" * 10_000})
+    uris = [offloader.offload(payload) for _ in range(3)]
+    offloader.shutdown()
+
+    bucket = storage_client.bucket("bucket")
+    assert len(set(uris)) == 1
+    assert uris[0] is not None
+    assert uris[0].startswith("gs://bucket/spans/") and uris[0].endswith(".json.gz")
+    assert bucket.uploads == 1
+    (stored,) = bucket.objects.values()
+    assert gzip.decompress(stored).decode() == payload
+    assert offloader.stats["deduplicated"] == 2
+    assert offloader.stats["compressed_bytes"] < offloader.stats["raw_bytes"]
+
+
+def test_known_digests_are_bounded(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Verifies only the most recently offloaded digests are remembered."""
+    monkeypatch.setattr(gcs, "KNOWN_DIGESTS_SIZE", 2)
+    storage_client = FakeStorageClient()
+    offloader = SpanPayloadOffloader(storage_client, "bucket")
+    for payload in ["a", "b", "a", "c", "a"]:
+        offloader.offload(json.dumps({"prompt": payload}))
+    offloader.shutdown()
+
+    assert len(offloader._known_digests) == 2
+    # "a" stayed recently used, so "b" was evicted and "a" never re-uploaded
+    assert storage_client.bucket("bucket").uploads == 3
+    assert offloader.stats["deduplicated"] == 2
+
+
+def test_offload_retries_and_caches_bucket_check() -> None:
+    """Verifies transient upload errors are retried and the bucket is checked once."""
+    storage_client = FakeStorageClient()
+    bucket = storage_client.bucket("bucket")
+    bucket.failures_left = 2
+    offloader = SpanPayloadOffloader(storage_client, "bucket", retry_backoff=0.01)
+    for _ in range(5):
+        assert offloader.bucket_exists()
+    offloader.offload("{}")
+    offloader.shutdown()
+
+    assert bucket.exists_calls == 1
+    assert bucket.uploads == 1
+    assert offloader.stats["failed"] == 0
+
+
+def test_export_does_not_wait_for_uploads() -> None:
+    """Verifies oversized spans are exported without waiting on slow GCS uploads."""
+    storage_client = FakeStorageClient()
+    bucket = storage_client.bucket("bucket")
+    bucket.upload_delay = 0.5
+    logging_client = FakeLoggingClient()
+    exporter = CloudTraceLoggingSpanExporter(
+        project_id="project",
+        logging_client=cast(google_cloud_logging.Client, logging_client),
+        storage_client=storage_client,
+        bucket_name="bucket",
+        client=FakeTraceClient(),
+    )
+    spans = make_spans(4, prompt_bytes=300 * 1024)
+
+    start = time.perf_counter()
+    exporter.export(spans)
+    assert time.perf_counter() - start < 0.5
+    exporter.shutdown()
+
+    llm_entries = [
+        entry
+        for entry in logging_client.fake_logger.entries
+        if entry["name"] == "call_llm"
+    ]
+    assert len(llm_entries) == 4
+    for entry in llm_entries:
+        attributes = entry["attributes"]
+        assert "gcp.vertex.agent.llm_request" not in attributes
+        assert attributes["gen_ai.request.model"] == "gemini-2.5-flash"
+        assert attributes["uri_payload"].removeprefix("gs://bucket/") in bucket.objects
+
+
+def test_many_small_attributes_are_offloaded_until_the_entry_fits() -> None:
+    """Verifies values below the per-value threshold move out when they add up."""
+    storage_client = FakeStorageClient()
+    exporter = CloudTraceLoggingSpanExporter(
+        project_id="project",
+        logging_client=cast(google_cloud_logging.Client, FakeLoggingClient()),
+        storage_client=storage_client,
+        bucket_name="bucket",
+        client=FakeTraceClient(),
+    )
+    attributes = {f"attr_{i:03}": "x" * (3 * 1024 + i) for i in range(120)}
+
+    span_dict = exporter._process_large_attributes(
+        {"attributes": dict(attributes)}, span_id="span"
+    )
+    exporter.shutdown()
+
+    retained = span_dict["attributes"]
+    assert estimate_json_size(retained) <= MAX_ATTRIBUTES_BYTES
+    assert retained["uri_payload"].startswith("gs://bucket/")
+    # The largest values were moved, the smaller ones stay searchable
+    assert "attr_119" not in retained
+    assert retained["attr_000"] == attributes["attr_000"]
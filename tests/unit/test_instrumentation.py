@@ -0,0 +1,85 @@
+from collections.abc import Iterator
+from typing import Any
+
+import pytest
+from google.adk.tools.function_tool import FunctionTool
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+from app.agent import root_agent
+from app.app_utils.instrumentation import instrument_tool
+from app.codespace_tools import run_in_codespace
+
+
+@pytest.fixture
+def metric_reader() -> InMemoryMetricReader:
+    return InMemoryMetricReader()
+
+
+@pytest.fixture
+def meter_provider(metric_reader: InMemoryMetricReader) -> Iterator[MeterProvider]:
+    provider = MeterProvider(metric_readers=[metric_reader])
+    yield provider
+    provider.shutdown()
+
+
+def _points(reader: InMemoryMetricReader, name: str) -> list[Any]:
+    data = reader.get_metrics_data()
+    assert data is not None
+    return [
+        point
+        for resource_metrics in data.resource_metrics
+        for scope_metrics in resource_metrics.scope_metrics
+        for metric in scope_metrics.metrics
+        if metric.name == name
+        for point in metric.data.data_points
+    ]
+
+
+def test_wrapped_tool_declaration_is_unchanged() -> None:
+    """Verifies the model sees the same declaration for an instrumented tool."""
+    wrapped = next(
+        t
+        for t in root_agent.tools
+        if callable(t) and getattr(t, "__name__", None) == "run_in_codespace"
+    )
+    assert callable(wrapped)
+    assert wrapped is not run_in_codespace
+    declaration = FunctionTool(wrapped)._get_declaration()
+    assert declaration == FunctionTool(run_in_codespace)._get_declaration()
+    assert declaration is not None and declaration.parameters is not None
+    assert "tool_context" not in (declaration.parameters.properties or {})
+
+
+def test_records_duration_size_status_and_retries(
+    meter_provider: MeterProvider, metric_reader: InMemoryMetricReader
+) -> None:
+    """Verifies calls, payload size and retries of a failing then passing tool."""
+    outcomes = iter(["error", "error", "success"])
+
+    def flaky_tool(commands: str) -> dict:
+        return {"status": next(outcomes), "output": "x" * 100}
+
+    flaky_tool = instrument_tool(flaky_tool, meter_provider=meter_provider)
+
+    for _ in range(3):
+        flaky_tool(commands="make test")
+
+    calls = {
+        point.attributes["status"]: point.value
+        for point in _points(metric_reader, "repo_reviver.tool.calls")
+        if point.attributes["tool"] == "flaky_tool"
+    }
+    assert calls == {"error": 2, "success": 1}
+    (retries,) = [
+        p
+        for p in _points(metric_reader, "repo_reviver.tool.retries")
+        if p.attributes["tool"] == "flaky_tool"
+    ]
+    assert retries.value == 2
+    (size,) = [
+        p
+        for p in _points(metric_reader, "repo_reviver.tool.output_bytes")
+        if p.attributes["tool"] == "flaky_tool"
+    ]
+    assert size.count == 3 and size.min > 100
@@ -0,0 +1,98 @@
+import asyncio
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+from opentelemetry.sdk.metrics import MeterProvider
+
+from app.app_utils.instrumentation import instrument_tool
+from app.app_utils.ledger import CostLedger, LedgerPlugin
+
+
+def _tool_context(session_id: str, call_id: str) -> Any:
+    return SimpleNamespace(
+        session=SimpleNamespace(id=session_id), function_call_id=call_id
+    )
+
+
+async def _call_tool(
+    plugin: LedgerPlugin,
+    name: str,
+    args: dict[str, Any],
+    context: Any,
+    result: dict[str, Any],
+) -> None:
+    """Runs an instrumented tool, then the plugin callback, like ADK does."""
+
+    def tool_function(**kwargs: Any) -> dict[str, Any]:
+        time.sleep(0.01)
+        return result
+
+    tool_function.__name__ = name
+    instrument_tool(tool_function, meter_provider=MeterProvider())(**args)
+    tool: Any = SimpleNamespace(name=name)
+    await plugin.after_tool_callback(
+        tool=tool, tool_args=args, tool_context=context, result=result
+    )
+
+
+def test_records_session_costs(tmp_path: Path) -> None:
+    """Verifies codespace lifetime, tool calls, tokens and GCS bytes roll up per session."""
+    ledger = CostLedger(str(tmp_path / "ledger.db"))
+    plugin = LedgerPlugin(ledger)
+
+    async def revive(session_id: str, prompt_tokens: int) -> None:
+        created = {
+            "status": "success",
+            "codespace_name": f"cs-{session_id}",
+            "machine_type": "basicLinux32gb",
+        }
+        await _call_tool(
+            plugin,
+            "create_codespace",
+            {"repo_url": "o/r"},
+            _tool_context(session_id, "1"),
+            created,
+        )
+        await _call_tool(
+            plugin,
+            "run_in_codespace",
+            {"commands": "ls"},
+            _tool_context(session_id, "2"),
+            {"status": "error"},
+        )
+        callback_context: Any = SimpleNamespace(session=SimpleNamespace(id=session_id))
+        llm_response: Any = SimpleNamespace(
+            partial=False,
+            model_version="gemini-2.5-flash",
+            usage_metadata=SimpleNamespace(
+                prompt_token_count=prompt_tokens, candidates_token_count=10
+            ),
+        )
+        await plugin.after_model_callback(
+            callback_context=callback_context, llm_response=llm_response
+        )
+        if session_id == "s1":
+            await _call_tool(
+                plugin,
+                "delete_codespace",
+                {"codespace_name": "cs-s1"},
+                _tool_context(session_id, "3"),
+                {"status": "success"},
+            )
+
+    asyncio.run(revive("s1", 100))
+    asyncio.run(revive("s2", 5000))
+    ledger.gcs_offload("s2", 2048)
+
+    rows = ledger.report(sort_by="prompt_tokens")
+    assert [row["session_id"] for row in rows] == ["s2", "s1"]
+    s2, s1 = rows
+    assert s2["open_codespaces"] == 1 and s1["open_codespaces"] == 0
+    assert s1["machine_types"] == "basicLinux32gb"
+    assert s1["tool_calls"] == 3 and s2["tool_calls"] == 2
+    # Durations measured by the tool instrumentation
+    assert s1["tool_seconds"] >= 0.03
+    assert s2["gcs_bytes"] == 2048
+    assert s2["response_tokens"] == 10
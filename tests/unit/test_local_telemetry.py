@@ -0,0 +1,58 @@
+from pathlib import Path
+
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.trace import Status, StatusCode
+
+from app.app_utils.local_telemetry import (
+    LocalJsonlSpanExporter,
+    iter_spans,
+    latency_report,
+    span_files,
+)
+
+
+def test_exports_tool_spans_and_reports_latency(tmp_path: Path) -> None:
+    """Verifies spans round-trip through local files into a per-tool report."""
+    provider = TracerProvider()
+    provider.add_span_processor(
+        SimpleSpanProcessor(LocalJsonlSpanExporter(directory=str(tmp_path)))
+    )
+    tracer = provider.get_tracer(__name__)
+    for index in range(3):
+        with tracer.start_as_current_span(
+            "execute_tool run_in_codespace",
+            attributes={"gen_ai.tool.name": "run_in_codespace"},
+        ) as span:
+            if index == 0:
+                span.set_status(Status(StatusCode.ERROR))
+    with tracer.start_as_current_span("call_llm"):
+        pass
+
+    spans = list(iter_spans(str(tmp_path)))
+    assert [span["name"] for span in spans][-1] == "call_llm"
+    assert all(span["duration_ms"] >= 0 for span in spans)
+
+    (row,) = latency_report(iter(spans))
+    assert row["name"] == "run_in_codespace"
+    assert row["count"] == 3
+    assert row["errors"] == 1
+    assert {row["name"] for row in latency_report(iter(spans), all_spans=True)} == {
+        "run_in_codespace",
+        "call_llm",
+    }
+
+
+def test_rotates_and_prunes_files(tmp_path: Path) -> None:
+    """Verifies files rotate at the size limit and old files are removed."""
+    exporter = LocalJsonlSpanExporter(
+        directory=str(tmp_path), max_file_bytes=1, max_files=2
+    )
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer(__name__)
+    for _ in range(5):
+        with tracer.start_as_current_span("span"):
+            pass
+    assert len(span_files(str(tmp_path))) == 2
+    assert len(list(iter_spans(str(tmp_path)))) == 2
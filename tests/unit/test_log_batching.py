@@ -0,0 +1,97 @@
+import time
+from typing import Any, cast
+
+from google.cloud import logging as google_cloud_logging
+
+from app.app_utils.log_batching import DROP_OLDEST, BatchedLogWriter
+from app.app_utils.tracing import CloudTraceLoggingSpanExporter
+from tests.benchmarks.fakes import (
+    FakeLogger,
+    FakeLoggingClient,
+    FakeStorageClient,
+    FakeTraceClient,
+    make_spans,
+)
+
+
+def _logger(fake: FakeLogger) -> google_cloud_logging.Logger:
+    return cast(google_cloud_logging.Logger, fake)
+
+
+def test_writes_in_batches_by_count() -> None:
+    """Verifies entries are committed in batches of max_batch_entries."""
+    logger = FakeLogger()
+    writer = BatchedLogWriter(_logger(logger), max_batch_entries=10, flush_interval=60)
+    for index in range(25):
+        writer.write({"index": index})
+    assert writer.flush(timeout=5)
+    assert logger.commits == [10, 10, 5]
+    assert [entry["index"] for entry in logger.entries] == list(range(25))
+    writer.shutdown()
+
+
+def test_flushes_after_interval() -> None:
+    """Verifies a partial batch is written once the flush interval passes."""
+    logger = FakeLogger()
+    writer = BatchedLogWriter(
+        _logger(logger), max_batch_entries=100, flush_interval=0.05
+    )
+    writer.write({"index": 0})
+    deadline = time.monotonic() + 2
+    while not logger.commits and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert logger.commits == [1]
+    writer.shutdown()
+
+
+def test_drops_when_sink_is_slow() -> None:
+    """Verifies the overflow policy and counters when the sink falls behind."""
+    logger = FakeLogger(commit_delay=0.2)
+    writer = BatchedLogWriter(
+        _logger(logger),
+        max_batch_entries=2,
+        max_queue_entries=4,
+        overflow_policy=DROP_OLDEST,
+        flush_interval=60,
+    )
+    for index in range(20):
+        writer.write({"index": index})
+    writer.shutdown()
+    assert writer.stats["dropped"] > 0
+    assert writer.stats["written"] + writer.stats["dropped"] == 20
+    # The newest entries survive with drop_oldest
+    assert logger.entries[-1]["index"] == 19
+
+
+def test_retries_rejected_batch_entry_by_entry() -> None:
+    """Verifies one invalid entry only drops itself, not its whole batch."""
+    logger = FakeLogger(invalid_key="bad")
+    writer = BatchedLogWriter(_logger(logger), max_batch_entries=5, flush_interval=60)
+    entries: list[dict[str, Any]] = [{"index": index} for index in range(5)]
+    entries[2]["bad"] = True
+    for entry in entries:
+        writer.write(entry)
+    assert writer.flush(timeout=5)
+    # Entries of the rejected batch are written once, by the retry
+    assert [entry["index"] for entry in logger.entries] == [0, 1, 3, 4]
+    assert writer.stats["written"] == 4
+    assert writer.stats["dropped"] == 1
+    assert writer.stats["failed_batches"] == 1
+    writer.shutdown()
+
+
+def test_exporter_queues_span_logs() -> None:
+    """Verifies the exporter hands entries to the writer and flushes on demand."""
+    logging_client = FakeLoggingClient()
+    exporter = CloudTraceLoggingSpanExporter(
+        project_id="test",
+        client=FakeTraceClient(),
+        logging_client=cast(google_cloud_logging.Client, logging_client),
+        storage_client=FakeStorageClient(),
+    )
+    spans = make_spans(3, prompt_bytes=256)
+    exporter.export(spans)
+    assert exporter.force_flush()
+    assert len(logging_client.fake_logger.entries) == len(spans)
+    assert logging_client.fake_logger.commits == [len(spans)]
+    exporter.shutdown()
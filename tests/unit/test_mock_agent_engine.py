@@ -0,0 +1,117 @@
+import subprocess
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+
+import pytest
+from fastapi.testclient import TestClient
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from tests.load_test.mock_agent_engine import (
+    MOCK_HEAD_SHA,
+    ScriptedLlm,
+    create_server,
+    install_fake_gh,
+)
+
+ENGINE = "/v1/projects/p/locations/l/reasoningEngines/e"
+
+
+class FakeAgentEngine:
+    def __init__(self) -> None:
+        self.feedback: list[dict] = []
+
+    def register_operations(self) -> dict[str, list[str]]:
+        return {"": ["register_feedback"], "async_stream": ["async_stream_query"]}
+
+    async def async_stream_query(
+        self, message: str, user_id: str
+    ) -> AsyncIterator[dict[str, Any]]:
+        yield {"content": {"parts": [{"text": message}]}}
+        raise RuntimeError("boom")
+
+    def register_feedback(self, feedback: dict) -> None:
+        self.feedback.append(feedback)
+
+
+def _function_response(name: str, response: dict) -> types.Content:
+    return types.Content(
+        role="user",
+        parts=[types.Part.from_function_response(name=name, response=response)],
+    )
+
+
+def test_scripted_llm_steps() -> None:
+    """Verifies the scripted model walks through a revival from tool responses."""
+    llm = ScriptedLlm()
+    contents = [
+        types.Content(
+            role="user",
+            parts=[types.Part.from_text(text="Analyze https://github.com/a/b")],
+        )
+    ]
+    call = llm._next_part(LlmRequest(contents=contents)).function_call
+    assert call is not None
+    assert call.name == "create_codespace"
+    assert call.args == {"repo_url": "a/b"}
+
+    contents.append(_function_response("create_codespace", {"codespace_name": "cs"}))
+    call = llm._next_part(LlmRequest(contents=contents)).function_call
+    assert call is not None
+    assert call.name == "run_in_codespace"
+
+    contents.append(_function_response("run_in_codespace", {"status": "success"}))
+    contents.append(_function_response("delete_codespace", {"status": "success"}))
+    assert llm._next_part(LlmRequest(contents=contents)).text
+
+
+def test_server_streams_events_and_errors() -> None:
+    """Verifies streamQuery emits JSON lines and reports mid-stream errors."""
+    client = TestClient(create_server(FakeAgentEngine()))
+    response = client.post(
+        f"{ENGINE}:streamQuery",
+        json={
+            "class_method": "async_stream_query",
+            "input": {"message": "hi", "user_id": "u"},
+        },
+    )
+    lines = response.text.splitlines()
+    assert response.status_code == 200
+    assert '"hi"' in lines[0]
+    assert '"code": 500' in lines[1]
+
+
+def test_server_query_and_unknown_method() -> None:
+    """Verifies :query calls registered operations only."""
+    engine = FakeAgentEngine()
+    client = TestClient(create_server(engine))
+    response = client.post(
+        f"{ENGINE}:query",
+        json={"class_method": "register_feedback", "input": {"feedback": {"s": 1}}},
+    )
+    assert response.json() == {"output": None}
+    assert engine.feedback == [{"s": 1}]
+    response = client.post(f"{ENGINE}:query", json={"class_method": "set_up"})
+    assert response.status_code == 404
+
+
+def test_fake_gh(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Verifies the fake gh binary answers codespace and API commands."""
+    monkeypatch.setenv("PATH", "")
+    install_fake_gh(str(tmp_path))
+    result = subprocess.run(
+        ["gh", "codespace", "create", "-R", "a/b"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.startswith("mock-codespace-")
+
+    result = subprocess.run(
+        ["gh", "api", "repos/a/b/commits/HEAD", "--jq", ".sha"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.strip() == MOCK_HEAD_SHA
@@ -0,0 +1,103 @@
+import base64
+import subprocess
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app import codespace_tools, prefetch
+from app.prefetch import (
+    build_prefetch_script,
+    parse_prefetch_output,
+    parse_reads,
+    predict_reads,
+)
+
+BOOTSTRAP_OUTPUT = """\
+__RR__ clone=cloned
+__RR__ head_sha=0123abcd
+__RR__ entry=README.md
+__RR__ entry=src/
+__RR__ manifest=package.json
+"""
+
+
+def _marker(kind: str, content: str, arg: str) -> str:
+    return f"{prefetch.MARKER} {kind} {base64.b64encode(content.encode()).decode()} {arg}\n"
+
+
+def test_prefetched_reads_match_the_real_commands(tmp_path: Path) -> None:
+    """Verifies served reads reproduce cat and ls output exactly."""
+    repo = tmp_path / "repo"
+    repo.mkdir()
+    (repo / "README.md").write_text("# Demo\n")
+    (repo / "package.json").write_text('{"name": "demo"}')
+    files = predict_reads(["README.md", "src/"], ["package.json", "missing.txt"])
+    script = build_prefetch_script("repo", files)
+    output = subprocess.run(
+        ["bash"], input=script, cwd=tmp_path, capture_output=True, text=True
+    ).stdout
+    results = parse_prefetch_output(output, "repo")
+
+    for commands in ("cd repo && cat README.md package.json", "ls -A repo"):
+        real = subprocess.run(
+            ["bash"], input=commands, cwd=tmp_path, capture_output=True, text=True
+        ).stdout
+        reads = parse_reads(commands)
+        assert reads is not None
+        assert "".join(results[read] for read in reads) == real
+    assert ("cat", "repo/missing.txt") not in results
+
+
+def test_only_plain_reads_are_servable() -> None:
+    """Verifies commands with side effects or shell syntax are not served."""
+    assert parse_reads("cd repo\nls -la") == [("ls:al", "repo")]
+    assert parse_reads("cat repo/README.md") == [("cat", "repo/README.md")]
+    assert parse_reads("cd repo && npm test") is None
+    assert parse_reads("cat repo/*.md") is None
+    assert parse_reads("cat README.md > copy.md") is None
+    assert parse_reads("cd .. && cat secrets") is None
+
+
+def test_reads_after_bootstrap_skip_the_round_trip(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Verifies hits, invalidation on writes and per-session stats."""
+    scripts: list[str] = []
+
+    def fake_run(
+        args: list[str], input: str = "", **kwargs: Any
+    ) -> subprocess.CompletedProcess[str]:
+        scripts.append(input)
+        if prefetch.MARKER in input:
+            output = _marker("cat", "# Demo\n", "README.md") + _marker(
+                "ls:", "README.md\npackage.json\n", "."
+            )
+            return subprocess.CompletedProcess(args, 0, stdout=output, stderr="")
+        if "__RR__" in input:
+            return subprocess.CompletedProcess(args, 0, stdout=BOOTSTRAP_OUTPUT)
+        return subprocess.CompletedProcess(args, 0, stdout="remote\n", stderr="")
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+    tool_context: Any = SimpleNamespace(state={})
+
+    codespace_tools.bootstrap_codespace("cs-1", "owner/repo")
+    hit = codespace_tools.run_in_codespace(
+        "cs-1", "cd repo && cat README.md && ls", tool_context=tool_context
+    )
+    assert hit["output"] == "# Demo\nREADME.md\npackage.json\n"
+    assert len(scripts) == 2
+
+    codespace_tools.run_in_codespace("cs-1", "cd repo && npm install")
+    miss = codespace_tools.run_in_codespace(
+        "cs-1", "cat repo/README.md", tool_context=tool_context
+    )
+    assert miss["output"] == "remote\n"
+    assert len(scripts) == 4
+
+    stats = tool_context.state[prefetch.STATE_KEY]
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_rate"] == 0.5
+    assert stats["saved_seconds"] >= 0
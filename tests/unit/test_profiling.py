@@ -0,0 +1,82 @@
+import asyncio
+import marshal
+from types import SimpleNamespace
+from typing import Any
+
+from google.adk.agents.run_config import RunConfig
+from google.adk.artifacts import InMemoryArtifactService
+
+from app.app_utils.profiling import (
+    PROFILE_METADATA_KEY,
+    ProfilingPlugin,
+    request_profile,
+)
+
+
+def _invocation_context(invocation_id: str, profile: bool = False) -> Any:
+    run_config = request_profile(None) if profile else {}
+    return SimpleNamespace(
+        invocation_id=invocation_id,
+        run_config=RunConfig.model_validate(run_config),
+        artifact_service=InMemoryArtifactService(),
+        app_name="app",
+        user_id="user",
+        session=SimpleNamespace(id="session"),
+    )
+
+
+def _busy_work() -> int:
+    return sum(i * i for i in range(20_000))
+
+
+async def _run(plugin: ProfilingPlugin, context: Any) -> None:
+    await plugin.before_run_callback(invocation_context=context)
+    _busy_work()
+    await plugin.after_run_callback(invocation_context=context)
+
+
+def test_saves_profile_artifacts_when_requested() -> None:
+    """Verifies a requested profile is saved as .prof and .txt artifacts."""
+    plugin = ProfilingPlugin()
+    context = _invocation_context("e-1", profile=True)
+    asyncio.run(_run(plugin, context))
+
+    service = context.artifact_service
+    keys = asyncio.run(
+        service.list_artifact_keys(app_name="app", user_id="user", session_id="session")
+    )
+    assert sorted(keys) == ["profile-e-1.prof", "profile-e-1.txt"]
+    raw = asyncio.run(
+        service.load_artifact(
+            app_name="app",
+            user_id="user",
+            session_id="session",
+            filename="profile-e-1.prof",
+        )
+    )
+    assert raw is not None and raw.inline_data is not None
+    assert raw.inline_data.data is not None
+    stats = marshal.loads(raw.inline_data.data)
+    assert any(function[2] == "_busy_work" for function in stats)
+
+
+def test_disabled_by_default() -> None:
+    """Verifies nothing is captured unless profiling is requested."""
+    plugin = ProfilingPlugin()
+    context = _invocation_context("e-2")
+    asyncio.run(_run(plugin, context))
+    keys = asyncio.run(
+        context.artifact_service.list_artifact_keys(
+            app_name="app", user_id="user", session_id="session"
+        )
+    )
+    assert keys == []
+
+
+def test_request_profile_keeps_run_config() -> None:
+    """Verifies the profile request is merged into an existing run config."""
+    run_config = {"max_llm_calls": 10, "custom_metadata": {"team": "a"}}
+    requested = RunConfig.model_validate(request_profile(run_config))
+    assert requested.max_llm_calls == 10
+    assert requested.custom_metadata == {"team": "a", PROFILE_METADATA_KEY: True}
+    assert run_config["custom_metadata"] == {"team": "a"}
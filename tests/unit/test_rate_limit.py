@@ -0,0 +1,240 @@
+import asyncio
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app import codespace_tools
+from app.app_utils import rate_limit
+from app.app_utils.rate_limit import (
+    GitHubGovernor,
+    InMemoryTokenBucket,
+    SqliteTokenBucket,
+    count_gh_api_calls,
+)
+from app.app_utils.tool_threads import off_loop
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.now += seconds
+
+
+def test_token_bucket_refills_at_rate_and_pauses() -> None:
+    """Verifies tokens are spent, refill over time and are withheld during a pause."""
+    clock = FakeClock()
+    bucket = InMemoryTokenBucket(rate_per_second=2, capacity=2, clock=clock)
+
+    assert bucket.take(1) == 0
+    assert bucket.take(1) == 0
+    assert bucket.take(1) == pytest.approx(0.5)
+    clock.sleep(0.5)
+    assert bucket.take(1) == 0
+
+    bucket.pause(10)
+    assert bucket.take(1) == pytest.approx(10)
+    clock.sleep(10.5)
+    assert bucket.take(1) == 0
+
+
+@pytest.mark.parametrize("sqlite", [False, True])
+def test_cost_above_capacity_takes_a_full_bucket(tmp_path: Path, sqlite: bool) -> None:
+    """Verifies a call costing more than the burst waits for a full bucket, not forever."""
+    clock = FakeClock()
+    bucket = (
+        SqliteTokenBucket(
+            str(tmp_path / "rate_limit.db"), rate_per_second=1, capacity=2, clock=clock
+        )
+        if sqlite
+        else InMemoryTokenBucket(rate_per_second=1, capacity=2, clock=clock)
+    )
+    governor = GitHubGovernor(bucket, refresh_seconds=0, sleep=clock.sleep)
+
+    assert bucket.take(1) == 0
+    start = clock.now
+    governor.acquire(cost=5)
+    assert clock.now - start == pytest.approx(1)
+    assert bucket.take(1) == pytest.approx(1)
+
+
+def test_sqlite_bucket_is_shared_between_instances(tmp_path: Path) -> None:
+    """Verifies two buckets on the same file (as in two workers) share one budget."""
+    clock = FakeClock()
+    path = str(tmp_path / "rate_limit.db")
+    first = SqliteTokenBucket(path, rate_per_second=1, capacity=3, clock=clock)
+    second = SqliteTokenBucket(path, rate_per_second=1, capacity=3, clock=clock)
+
+    assert first.take(2) == 0
+    assert second.take(1) == 0
+    assert first.take(1) == pytest.approx(1)
+    second.pause(5)
+    clock.sleep(2)
+    assert first.take(1) == pytest.approx(3)
+
+
+def test_governor_serves_callers_in_order() -> None:
+    """Verifies callers queued behind an exhausted bucket are served first come, first served."""
+    bucket = InMemoryTokenBucket(rate_per_second=50, capacity=1)
+    governor = GitHubGovernor(bucket, refresh_seconds=0)
+    order: list[int] = []
+
+    def caller(index: int) -> None:
+        governor.acquire()
+        order.append(index)
+
+    threads = []
+    for index in range(5):
+        threads.append(threading.Thread(target=caller, args=(index,)))
+        threads[-1].start()
+        time.sleep(0.005)
+    for thread in threads:
+        thread.join()
+
+    assert order == [0, 1, 2, 3, 4]
+    assert governor.stats["calls"] == 5
+    assert governor.stats["waited_seconds"] > 0
+
+
+def test_governor_retries_rate_limited_commands_after_backoff() -> None:
+    """Verifies a rate-limited gh command pauses the bucket and is retried."""
+    clock = FakeClock()
+    bucket = InMemoryTokenBucket(rate_per_second=1, capacity=5, clock=clock)
+    governor = GitHubGovernor(bucket, refresh_seconds=0, sleep=clock.sleep)
+    attempts: list[float] = []
+
+    def command() -> str:
+        attempts.append(clock.now)
+        if len(attempts) == 1:
+            raise subprocess.CalledProcessError(
+                1, ["gh"], stderr="HTTP 403: API rate limit exceeded"
+            )
+        return "ok"
+
+    assert governor.call(command) == "ok"
+    assert attempts[1] - attempts[0] >= rate_limit.BACKOFF_SECONDS
+    assert governor.stats["rate_limited"] == 1
+    assert governor.stats["retries"] == 1
+
+    def partial_script() -> str:
+        attempts.append(clock.now)
+        raise subprocess.CalledProcessError(1, ["gh"], stderr="HTTP 429")
+
+    with pytest.raises(subprocess.CalledProcessError):
+        governor.call(partial_script, retry=False)
+    assert len(attempts) == 3
+    assert governor.stats["retries"] == 1
+
+
+def test_governor_pauses_when_core_limit_is_nearly_exhausted() -> None:
+    """Verifies the reserve of core requests pauses callers until the reset."""
+    clock = FakeClock()
+    bucket = InMemoryTokenBucket(rate_per_second=1, capacity=5, clock=clock)
+    reset = time.time() + 30
+    governor = GitHubGovernor(
+        bucket,
+        refresh_seconds=60,
+        reserve=50,
+        rate_limit_reader=lambda: {"remaining": 10, "reset": reset},
+        sleep=clock.sleep,
+    )
+
+    start = clock.now
+    governor.acquire()
+
+    assert clock.now - start == pytest.approx(30, abs=1)
+
+
+def test_ssh_scripts_are_charged_for_embedded_gh_calls(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Verifies gh commands inside codespace scripts count against the limit."""
+    assert count_gh_api_calls("gh pr create --fill\ngh api user\ngh --version") == 2
+
+    charged: list[float] = []
+    governor = GitHubGovernor(None)
+
+    def acquire(cost: float = 1) -> float:
+        charged.append(cost)
+        return 0.0
+
+    monkeypatch.setattr(governor, "acquire", acquire)
+    monkeypatch.setattr(rate_limit, "_governor", governor)
+    monkeypatch.setattr(
+        codespace_tools.subprocess,
+        "run",
+        lambda args, **kwargs: subprocess.CompletedProcess(
+            args, 0, stdout="", stderr=""
+        ),
+    )
+
+    codespace_tools.run_in_codespace("cs-1", "cd repo\ngh pr create --fill")
+
+    assert charged == [2]
+
+
+def test_off_loop_tools_wait_without_blocking_the_event_loop() -> None:
+    """Verifies a tool waiting for tokens leaves the event loop serving others."""
+    governor = GitHubGovernor(
+        InMemoryTokenBucket(rate_per_second=10, capacity=1), refresh_seconds=0
+    )
+
+    def tool(name: str) -> dict:
+        """Calls GitHub once."""
+        governor.acquire()
+        return {"status": "success", "name": name}
+
+    wrapped = off_loop(tool)
+    ticks = []
+
+    async def ticker() -> None:
+        while True:
+            ticks.append(time.monotonic())
+            await asyncio.sleep(0.01)
+
+    async def main() -> list[dict]:
+        task = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(wrapped(name=str(i)) for i in range(4)))
+        task.cancel()
+        return results
+
+    start = time.monotonic()
+    results = asyncio.run(main())
+
+    assert [result["name"] for result in results] == ["0", "1", "2", "3"]
+    # Three callers waited 0.1s each for a token while the loop kept ticking
+    assert time.monotonic() - start >= 0.25
+    assert len(ticks) >= 10
+    assert wrapped.__doc__ == tool.__doc__
+
+
+def test_failing_scripts_mentioning_rate_limits_do_not_pause_gh(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    """Verifies only gh's own rate-limit errors of ssh calls pause other callers."""
+    governor = GitHubGovernor(InMemoryTokenBucket(rate_per_second=1, capacity=5))
+    monkeypatch.setattr(rate_limit, "_governor", governor)
+    stderr = "FAILED test_limiter.py::test_429 - HTTP 429: Too Many Requests\n"
+
+    def fake_run(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
+        raise subprocess.CalledProcessError(
+            1, args, output="rate limit exceeded after 10 requests\n", stderr=stderr
+        )
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+
+    result = codespace_tools.run_in_codespace("cs-1", "cd repo && pytest -q")
+    assert result["status"] == "error"
+    assert governor.stats["rate_limited"] == 0
+
+    stderr = "error getting codespace info: HTTP 403: API rate limit exceeded\n"
+    codespace_tools.run_in_codespace("cs-1", "cd repo && pytest -q")
+    assert governor.stats["rate_limited"] == 1
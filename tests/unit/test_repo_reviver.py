@@ -3,6 +3,7 @@ from app.agent import root_agent
 from app.codespace_tools import (
     create_codespace,
     run_in_codespace,
+    run_in_codespaces,
     delete_codespace,
     list_codespaces
 )
@@ -10,7 +11,7 @@ from app.codespace_tools import (
 def test_agent_initialization():
     """Verifies that the agent is initialized correctly."""
     assert root_agent.name == "repo_reviver"
-    assert len(root_agent.tools) == 4  # 4 codespace tools
+    assert len(root_agent.tools) == 8  # 6 codespace tools + 2 analysis cache tools
     assert root_agent.sub_agents is None or len(root_agent.sub_agents) == 0  # No sub-agents
 
 def test_codespace_tools_available():
@@ -18,15 +19,19 @@ def test_codespace_tools_available():
     tool_names = [t.__name__ for t in root_agent.tools]
     assert "create_codespace" in tool_names
     assert "run_in_codespace" in tool_names
+    assert "run_in_codespaces" in tool_names
+    assert "run_sharded_tests" in tool_names
     assert "delete_codespace" in tool_names
     assert "list_codespaces" in tool_names
+    assert "lookup_repo_analysis" in tool_names
+    assert "save_repo_analysis" in tool_names
 
 def test_single_agent_architecture():
     """Verifies that we have a single-agent architecture (no delegation)."""
     # Root agent should have no sub-agents
     assert root_agent.sub_agents is None or len(root_agent.sub_agents) == 0
     # Root agent should have all tools directly
-    assert len(root_agent.tools) == 4
+    assert len(root_agent.tools) == 8
     # This architecture avoids Gemini's multi-tool limitation
 
 def test_tool_function_signatures():
@@ -41,6 +46,11 @@ def test_tool_function_signatures():
     assert "codespace_name" in sig.parameters
     assert "commands" in sig.parameters
     
+    # Test run_in_codespaces signature
+    sig = inspect.signature(run_in_codespaces)
+    assert "targets" in sig.parameters
+    assert "max_concurrency" in sig.parameters
+    
     # Test delete_codespace signature
     sig = inspect.signature(delete_codespace)
     assert "codespace_name" in sig.parameters
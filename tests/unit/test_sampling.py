@@ -0,0 +1,93 @@
+from typing import Any
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from app.app_utils.sampling import (
+    TRUNCATION_SUFFIX,
+    TailSamplingSpanProcessor,
+    parse_truncation_rules,
+)
+
+
+def _tracer(
+    **kwargs: Any,
+) -> tuple[trace.Tracer, TailSamplingSpanProcessor, InMemorySpanExporter]:
+    exporter = InMemorySpanExporter()
+    sampler = TailSamplingSpanProcessor(SimpleSpanProcessor(exporter), **kwargs)
+    provider = TracerProvider()
+    provider.add_span_processor(sampler)
+    return provider.get_tracer(__name__), sampler, exporter
+
+
+def _run_trace(tracer: trace.Tracer, error: bool = False, prompt: str = "hi") -> None:
+    with tracer.start_as_current_span("invocation"):
+        with tracer.start_as_current_span(
+            "call_llm", attributes={"gcp.vertex.agent.llm_request": prompt}
+        ) as span:
+            if error:
+                span.set_status(Status(StatusCode.ERROR, "boom"))
+
+
+def test_keeps_errors_and_samples_normal_traces() -> None:
+    """Verifies error traces are always kept and normal traces are sampled whole."""
+    tracer, sampler, exporter = _tracer(sample_rate=0.2)
+    for _ in range(500):
+        _run_trace(tracer)
+    for _ in range(10):
+        _run_trace(tracer, error=True)
+
+    stats = sampler.stats
+    assert stats["kept_errors"] == 10
+    assert 50 < stats["traces_kept"] - 10 < 150
+    assert stats["traces_kept"] + stats["traces_dropped"] == 510
+    spans = exporter.get_finished_spans()
+    assert len(spans) == stats["spans_kept"] == 2 * stats["traces_kept"]
+    assert len([s for s in spans if s.status.status_code == StatusCode.ERROR]) == 10
+
+
+def test_keeps_slow_traces_and_truncates_attributes() -> None:
+    """Verifies slow traces are kept and long attributes are truncated."""
+    tracer, sampler, exporter = _tracer(
+        sample_rate=0.0,
+        slow_threshold=0.0,
+        truncation_rules=parse_truncation_rules("gcp.vertex.agent.llm_*=100"),
+    )
+    _run_trace(tracer, prompt="x" * 1000)
+
+    assert sampler.stats["kept_slow"] == 1
+    llm_span = next(s for s in exporter.get_finished_spans() if s.name == "call_llm")
+    assert llm_span.attributes is not None
+    assert (
+        llm_span.attributes["gcp.vertex.agent.llm_request"]
+        == "x" * 100 + TRUNCATION_SUFFIX
+    )
+    assert sampler.stats["attributes_truncated"] == 1
+
+
+def test_force_flush_decides_unfinished_traces() -> None:
+    """Verifies spans of traces whose root never ended are decided on flush."""
+    tracer, sampler, exporter = _tracer(sample_rate=0.0)
+    root = tracer.start_span("invocation")
+    with tracer.start_as_current_span(
+        "tool", context=trace.set_span_in_context(root)
+    ) as child:
+        child.set_status(Status(StatusCode.ERROR))
+    assert exporter.get_finished_spans() == ()
+    sampler.force_flush()
+    assert [s.name for s in exporter.get_finished_spans()] == ["tool"]
+    root.end()
+
+
+def test_shutdown_decides_buffered_traces() -> None:
+    """Verifies traces still waiting for their root are decided on shutdown."""
+    tracer, sampler, exporter = _tracer(sample_rate=1.0, decision_wait=3600)
+    root = tracer.start_span("invocation")
+    with tracer.start_as_current_span("tool", context=trace.set_span_in_context(root)):
+        pass
+    sampler.shutdown()
+    assert [s.name for s in exporter.get_finished_spans()] == ["tool"]
+    assert sampler.stats["traces_kept"] == 1
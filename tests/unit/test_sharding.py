@@ -0,0 +1,74 @@
+import subprocess
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from app import codespace_tools, sharding
+
+SHARD_OUTPUT = """..F
+=================================== FAILURES ===================================
+============================= slowest durations ==============================
+2.10s call     tests/test_api.py::test_slow
+0.20s setup    tests/test_api.py::test_slow
+0.50s call     tests/test_cli.py::test_flag
+=========================== short test summary info ============================
+PASSED tests/test_api.py::test_slow
+PASSED tests/test_cli.py::test_flag
+FAILED tests/test_cli.py::test_broken - AssertionError: boom
+========================= 1 failed, 2 passed in 2.95s ==========================
+"""
+
+
+def test_plan_shards_balances_by_duration() -> None:
+    """Verifies shards are balanced using known and median-estimated durations."""
+    durations = {"t::a": 8.0, "t::b": 4.0, "t::c": 3.0, "t::d": 1.0}
+    shards = sharding.plan_shards(
+        ["t::a", "t::b", "t::c", "t::d", "t::new"], durations, 2
+    )
+    # The new test is estimated at the median known duration (4.0s)
+    assert shards[0]["tests"] == ["t::a", "t::c"]
+    assert shards[1]["tests"] == ["t::b", "t::new", "t::d"]
+    assert [shard["estimated_seconds"] for shard in shards] == [11.0, 9.0]
+
+
+def test_parse_shard_output() -> None:
+    """Verifies per-test durations, failures and counts are parsed."""
+    parsed = sharding.parse_shard_output(SHARD_OUTPUT)
+    assert parsed["durations"]["tests/test_api.py::test_slow"] == 2.3
+    assert parsed["failed_tests"] == ["tests/test_cli.py::test_broken"]
+    assert parsed["counts"] == {"failed": 1, "passed": 2}
+
+
+def test_duration_store_smooths_measurements(tmp_path: Path) -> None:
+    """Verifies durations persist across runs and are smoothed."""
+    store = sharding.DurationStore(str(tmp_path / "durations.json"))
+    store.update("owner/repo", {"t::a": 4.0})
+    store.update("owner/repo", {"t::a": 2.0})
+    assert sharding.DurationStore(store.path).get("owner/repo") == {"t::a": 3.0}
+
+
+def test_run_sharded_tests_merges_results(
+    monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    """Verifies discovery, shard fan-out and merged reporting."""
+    durations_file = str(tmp_path / "d.json")
+    store_class = sharding.DurationStore
+    monkeypatch.setattr(sharding, "DurationStore", lambda: store_class(durations_file))
+
+    def fake_run(
+        args: list[str], input: str = "", **kwargs: Any
+    ) -> subprocess.CompletedProcess[str]:
+        if "--collect-only" in input:
+            collected = "tests/test_api.py::test_slow\ntests/test_cli.py::test_flag\n\n2 tests collected"
+            return subprocess.CompletedProcess(args, 0, stdout=collected, stderr="")
+        raise subprocess.CalledProcessError(1, args, output=SHARD_OUTPUT, stderr="")
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+    result = sharding.run_sharded_tests(["cs-1", "cs-2"], num_shards=2)
+
+    assert result["status"] == "failed"
+    assert result["total_tests"] == 2
+    assert result["counts"] == {"failed": 2, "passed": 4}
+    assert [shard["codespace_name"] for shard in result["shards"]] == ["cs-1", "cs-2"]
+    assert "tests/test_api.py::test_slow" in store_class(durations_file).get("repo")
@@ -0,0 +1,68 @@
+from tests.load_test.stream_timing import StreamTimer, parse_sse_line
+
+
+def _call(name: str, call_id: str) -> dict:
+    return {"content": {"parts": [{"function_call": {"id": call_id, "name": name}}]}}
+
+
+def _response(name: str, call_id: str) -> dict:
+    return {
+        "content": {"parts": [{"function_response": {"id": call_id, "name": name}}]}
+    }
+
+
+def test_parse_sse_line() -> None:
+    """Verifies SSE data lines and bare JSON lines are decoded, others skipped."""
+    assert parse_sse_line('data: {"a": 1}') == {"a": 1}
+    assert parse_sse_line('{"a": 1}') == {"a": 1}
+    assert parse_sse_line("data:") is None
+    assert parse_sse_line("not json") is None
+
+
+def test_stream_timer_phases() -> None:
+    """Verifies model turns and tool calls are timed from event arrivals."""
+    timer = StreamTimer(start=0.0)
+    timer.feed(_call("analyze_repository", "1"), now=2.0)
+    timer.feed(_response("analyze_repository", "1"), now=7.0)
+    timer.feed({"content": {"parts": [{"text": "partial"}]}, "partial": True}, 8.0)
+    timer.feed({"content": {"parts": [{"text": "Done"}]}}, now=10.0)
+
+    assert timer.phases == [
+        ("time_to_first_event", 2.0),
+        ("model_turn", 2.0),
+        ("tool:analyze_repository", 5.0),
+        ("model_turn", 3.0),
+    ]
+    assert timer.events == 4
+    assert timer.total(12.0) == 12.0
+
+
+def test_stream_timer_parallel_calls_and_camel_case() -> None:
+    """Verifies parallel tool calls are matched by ID in camelCase events."""
+    timer = StreamTimer(start=0.0)
+    timer.feed(
+        {
+            "content": {
+                "parts": [
+                    {"functionCall": {"id": "a", "name": "get_status"}},
+                    {"functionCall": {"id": "b", "name": "list_codespaces"}},
+                ]
+            }
+        },
+        now=1.0,
+    )
+    timer.feed({"content": {"parts": [{"functionResponse": {"id": "b"}}]}}, now=2.0)
+    timer.feed({"content": {"parts": [{"functionResponse": {"id": "a"}}]}}, now=4.0)
+    timer.feed({"content": {"parts": [{"text": "ok"}]}}, now=5.0)
+
+    assert ("tool:list_codespaces", 1.0) in timer.phases
+    assert ("tool:get_status", 3.0) in timer.phases
+    # The next model turn starts once the last pending tool has responded
+    assert timer.phases[-1] == ("model_turn", 1.0)
+
+
+def test_stream_timer_errors() -> None:
+    """Verifies error events are collected."""
+    timer = StreamTimer(start=0.0)
+    timer.feed({"code": 429, "message": "Too Many Requests"}, now=1.0)
+    assert timer.errors == ["Too Many Requests"]
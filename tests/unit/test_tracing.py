@@ -0,0 +1,57 @@
+import json
+
+from opentelemetry import trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import Status, StatusCode
+
+from app.app_utils import tracing
+from app.app_utils.tracing import estimate_json_size, span_to_dict
+
+
+def _finished_spans() -> tuple[ReadableSpan, ...]:
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    tracer = provider.get_tracer(__name__)
+    with tracer.start_as_current_span("invocation") as parent:
+        with tracer.start_as_current_span(
+            "call_llm",
+            attributes={"gen_ai.prompt": 'Say "hi"\nñ', "tokens": (1, 2, 3)},
+            links=[trace.Link(parent.get_span_context(), {"why": "retry"})],
+        ) as span:
+            span.add_event("chunk", {"index": 1})
+            span.set_status(Status(StatusCode.ERROR, "boom"))
+    return exporter.get_finished_spans()
+
+
+def test_span_to_dict_matches_json_round_trip() -> None:
+    """Verifies the direct encoder matches json.loads(span.to_json())."""
+    for span in _finished_spans():
+        assert span_to_dict(span) == json.loads(span.to_json())
+
+
+def test_estimate_json_size() -> None:
+    """Verifies the size estimate tracks the real encoded size and stops early."""
+    attributes = {"prompt": 'line "one"\n' * 1000, "tokens": [1, 2, 3], "ok": True}
+    actual = len(json.dumps(attributes, ensure_ascii=False).encode())
+    assert abs(estimate_json_size(attributes) - actual) <= 8
+
+    huge = {f"attr_{i}": "x" * 1024 for i in range(1000)}
+    estimate = estimate_json_size(huge, limit=10 * 1024)
+    assert 10 * 1024 < estimate < 12 * 1024
+
+
+def test_resource_cache_is_bounded() -> None:
+    """Verifies formatted resources of discarded providers are evicted."""
+    resources = [
+        Resource.create({"index": i}) for i in range(tracing.RESOURCE_CACHE_SIZE + 5)
+    ]
+    for resource in resources:
+        assert (
+            tracing._format_resource(resource)["attributes"]["index"]
+            == (resource.attributes["index"])
+        )
+    assert len(tracing._resource_cache) == tracing.RESOURCE_CACHE_SIZE
@@ -0,0 +1,86 @@
+import subprocess
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from app import codespace_tools, workflow
+
+
+def _tool_context(state: dict[str, Any] | None = None) -> Any:
+    return SimpleNamespace(
+        state=dict(state or {}), session=SimpleNamespace(user_id="user")
+    )
+
+
+def test_detect_phases() -> None:
+    """Verifies branch, commit and PR phases are inferred from commands."""
+    commands = (
+        "cd repo && git checkout -b fix/revival-123 && git add . && "
+        "git commit -m 'Fixes' && git push origin HEAD && gh pr create --fill"
+    )
+    output = "https://github.com/owner/repo/pull/42\n"
+    detected = dict(workflow.detect_phases(commands, output))
+    assert detected[workflow.BRANCH_CREATED] == {"branch": "fix/revival-123"}
+    assert workflow.FIXES_APPLIED in detected
+    assert detected[workflow.PR_OPENED] == {
+        "url": "https://github.com/owner/repo/pull/42"
+    }
+    assert workflow.detect_phases("cd repo && cat package.json", "{}") == []
+
+
+def test_create_codespace_records_checkpoints(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Verifies a new revival records codespace and clone checkpoints."""
+    monkeypatch.setattr(codespace_tools, "BOOTSTRAP_ENABLED", True)
+    monkeypatch.setattr(
+        codespace_tools.subprocess,
+        "run",
+        lambda args, **kwargs: subprocess.CompletedProcess(
+            args, 0, stdout="cs-1\n" if "create" in args else "__RR__ clone=cloned\n"
+        ),
+    )
+    tool_context = _tool_context()
+    codespace_tools.create_codespace("owner/repo", tool_context=tool_context)
+
+    progress = tool_context.state[workflow.STATE_KEY]
+    assert progress["codespace_name"] == "cs-1"
+    assert workflow.completed_phases(progress) == [
+        workflow.CODESPACE_CREATED,
+        workflow.CLONED,
+    ]
+
+
+def test_create_codespace_resumes_existing(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Verifies a resumed session reattaches instead of creating a codespace."""
+    monkeypatch.setattr(codespace_tools, "BOOTSTRAP_ENABLED", False)
+    calls = []
+
+    def fake_run(args: list[str], **kwargs: Any) -> subprocess.CompletedProcess[str]:
+        calls.append(args[:3])
+        return subprocess.CompletedProcess(args, 0, stdout='{"state": "Shutdown"}')
+
+    monkeypatch.setattr(codespace_tools.subprocess, "run", fake_run)
+    tool_context = _tool_context(
+        {
+            workflow.STATE_KEY: {
+                "repo": "owner/repo",
+                "codespace_name": "cs-1",
+                "phases": {
+                    workflow.CODESPACE_CREATED: {"seconds": 40.0},
+                    workflow.CLONED: {"seconds": 20.0},
+                    workflow.BRANCH_CREATED: {"branch": "fix/revival-1"},
+                },
+            }
+        }
+    )
+    result = codespace_tools.create_codespace(
+        "https://github.com/owner/repo", tool_context=tool_context
+    )
+    assert result["resumed"] is True
+    assert result["codespace_name"] == "cs-1"
+    assert result["next_phase"] == workflow.FIXES_APPLIED
+    assert result["saved_seconds"] > 0
+    assert ["gh", "codespace", "create"] not in calls
+
+    codespace_tools.delete_codespace("cs-1", tool_context=tool_context)
+    assert "codespace_name" not in tool_context.state[workflow.STATE_KEY]